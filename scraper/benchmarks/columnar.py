@@ -0,0 +1,89 @@
+"""Benchmark filtering the columnar export against walking record dicts.
+
+Usage: python benchmarks/columnar.py [--count N] [--repeat N]
+
+Builds --count synthetic restaurants across a few neighborhoods and prices
+and times "dinner at most $50 in Back Bay or the South End", once over
+``to_dict`` records and once as ``Columns`` masks. Loading the columns,
+which builds every mask, is timed from a written ``.columns`` file.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from scraper.models import Availability, Pricing, Restaurant
+from scraper.storage import ColumnarWriter, Columns
+
+NEIGHBORHOODS = ["Back Bay", "South End", "North End", "Seaport", "Cambridge"]
+CUISINES = ["Steakhouse", "Italian", "Seafood", "French", "Japanese", "American"]
+
+
+def synthetic_restaurant(i: int) -> Restaurant:
+    """Build a listing-shaped restaurant with varied categories and prices."""
+    return Restaurant(
+        slug=f"restaurant-{i}",
+        name=f"Restaurant {i}",
+        cuisine=[CUISINES[i % len(CUISINES)], CUISINES[i // 7 % len(CUISINES)]],
+        neighborhood=NEIGHBORHOODS[i % len(NEIGHBORHOODS)],
+        availability=Availability(lunch=i % 2 == 0, dinner=True, brunch=i % 3 == 0),
+        pricing=Pricing(lunch=28, dinner=35 + i % 30, brunch=None),
+        features=["outdoor dining"] if i % 4 == 0 else [],
+    )
+
+
+def best_of(func, repeat: int) -> float:
+    """Best wall-clock time of ``repeat`` calls, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000, help="Restaurants to build")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is kept)")
+    args = parser.parse_args()
+
+    restaurants = [synthetic_restaurant(i) for i in range(args.count)]
+    records = [r.to_dict() for r in restaurants]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = ColumnarWriter(Path(tmp) / "restaurants.columns").write(restaurants)
+        start = time.perf_counter()
+        columns = Columns.read(path)
+        load_time = time.perf_counter() - start
+    wanted = {"Back Bay", "South End"}
+
+    def walk() -> list[str]:
+        return [
+            r["slug"]
+            for r in records
+            if r["pricing"]["dinner"] is not None
+            and r["pricing"]["dinner"] <= 50
+            and r["neighborhood"] in wanted
+        ]
+
+    def masks() -> list[str]:
+        mask = columns.price_at_most("dinner", 50) & columns.any_of("neighborhood", *wanted)
+        return columns.select(mask)
+
+    start = time.perf_counter()
+    first = masks()
+    first_time = time.perf_counter() - start
+    assert walk() == first
+    walk_time = best_of(walk, args.repeat)
+    mask_time = best_of(masks, args.repeat)
+
+    print(f"{args.count} restaurants, {len(walk())} matches, best of {args.repeat} runs")
+    print(f"dict walk: {walk_time * 1000:>8.1f} ms")
+    print(f"columns:   {mask_time * 1000:>8.1f} ms ({walk_time / mask_time:.1f}x)")
+    print(f"load, building masks: {load_time * 1000:.1f} ms")
+    print(f"first query after load: {first_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark the BeautifulSoup and lxml listing parsers.
+
+Usage: python benchmarks/listing_parsers.py [--entries N] [--repeat N] [PAGE.html ...]
+
+Without pages, a synthetic listing page with --entries restaurants is used.
+Cached listing pages (data/raw/listings/*.html) make a realistic input.
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from scraper.parser import ListingParser, LxmlListingParser
+
+ENTRY = """
+<div id="restaurantID-restaurant-{i}" class="restaurantEntry">
+    <div class="restaurantInfoBasic">
+        <div class="restaurantLogo">
+            <a href="/restaurant/restaurant-{i}"><img src="/static/images/logo-{i}.gif" /></a>
+        </div>
+        <h4>
+            <a href="/restaurant/restaurant-{i}">Restaurant {i}</a>
+            <br />
+            <a href="/?cuisine=steakhouse"><span class="restClass">Steakhouse</span></a>
+            <span class="restClass">|</span>
+            <a href="/?neighborhood=back-bay"><span class="restClass">Back Bay</span></a>
+        </h4>
+        <p><a href="/map/back-bay/restaurant-{i}/">{i} Boylston Street, Boston, MA 02115</a></p>
+        <p><strong>Lunch</strong>: $28 <strong>Dinner</strong>: $45</p>
+    </div>
+    <div class="restaurantButtons">
+        <a href="/restaurant/restaurant-{i}" class="viewMenusButton">view menus</a>
+    </div>
+    <div class="restaurantFeatureIcons">
+        <img src="/static/images/icon-outdoor.png" alt="outdoor dining" />
+    </div>
+</div>
+"""
+
+
+def synthetic_page(entries: int) -> str:
+    """Build a listing page shaped like the real site."""
+    body = "".join(ENTRY.format(i=i) for i in range(entries))
+    return (
+        "<!DOCTYPE html><html><head><title>Restaurant Week Boston</title>"
+        "<script>var tracking = {};</script></head><body>"
+        '<div class="paginationControls">page 1 of 9</div>'
+        f'<div class="restaurantList">{body}</div></body></html>'
+    )
+
+
+def best_of(func, html: str, repeat: int) -> float:
+    """Best wall-clock time of ``repeat`` calls, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(html)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pages", nargs="*", type=Path, help="Listing pages to parse")
+    parser.add_argument("--entries", type=int, default=50, help="Entries on the synthetic page")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per parser (best is kept)")
+    args = parser.parse_args()
+
+    pages = [p.read_text(encoding="utf-8") for p in args.pages] or [synthetic_page(args.entries)]
+    engines = {"bs4": ListingParser(), "lxml": LxmlListingParser()}
+
+    for name, engine in engines.items():
+        assert engine.parse(pages[0]) == engines["bs4"].parse(pages[0]), name
+
+    results: dict[str, tuple[float, float]] = {}
+    for name, engine in engines.items():
+        parse = sum(best_of(engine.parse, html, args.repeat) for html in pages)
+        total = sum(best_of(engine.get_total_pages, html, args.repeat) for html in pages)
+        results[name] = (parse, total)
+
+    print(f"{len(pages)} page(s), best of {args.repeat} runs, ms per page")
+    print(f"{'engine':<8} {'parse':>10} {'total pages':>12}")
+    for name, (parse, total) in results.items():
+        print(f"{name:<8} {parse * 1000 / len(pages):>10.2f} {total * 1000 / len(pages):>12.2f}")
+    base_parse, base_total = results["bs4"]
+    fast_parse, fast_total = results["lxml"]
+    print(
+        f"speedup: parse {base_parse / fast_parse:.1f}x, total pages {base_total / fast_total:.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
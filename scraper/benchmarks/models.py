@@ -0,0 +1,113 @@
+"""Benchmark model memory and serialization on a synthetic crawl.
+
+Usage: python benchmarks/models.py [--count N] [--repeat N]
+
+Builds --count restaurants shaped like a full crawl's output (details, three
+menus, features) and reports the memory they take and the time to serialize
+them, through ``to_dict`` + ``json.dumps`` and through ``encode_restaurant``,
+plus how much smaller numbering terms through vocabularies makes the output.
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from scraper.models import (
+    Availability,
+    Coordinates,
+    Course,
+    MealMenu,
+    Menu,
+    Pricing,
+    Restaurant,
+)
+from scraper.storage import Vocabularies, encode_restaurant
+
+COURSES = ["First Course", "Entrée", "Dessert"]
+
+
+def synthetic_restaurant(i: int) -> Restaurant:
+    """Build a restaurant with everything a detail page and its menus add."""
+    menus = [
+        MealMenu(
+            meal_type=meal,
+            price=price,
+            courses=[
+                Course(name=course, options=[f"{course} dish {n} of {i}" for n in range(3)])
+                for course in COURSES
+            ],
+        )
+        for meal, price in (("lunch", 28), ("dinner", 45), ("brunch", 35))
+    ]
+    return Restaurant(
+        slug=f"restaurant-{i}",
+        name=f"Restaurant {i}",
+        cuisine=["Steakhouse"],
+        neighborhood="Back Bay",
+        address=f"{i} Boylston Street, Boston, MA 02115",
+        phone="(617) 555-0100",
+        website=f"https://restaurant-{i}.example.com",
+        image_url=f"https://www.restaurantweekboston.com/static/images/{i}.jpg",
+        detail_url=f"https://www.restaurantweekboston.com/restaurant/restaurant-{i}/",
+        availability=Availability(lunch=True, dinner=True, brunch=True),
+        pricing=Pricing(lunch=28, dinner=45, brunch=35),
+        menu=Menu(menus=menus),
+        coordinates=Coordinates(42.35 + i / 1e6, -71.06),
+        features=["outdoor dining", "vegetarian"],
+    )
+
+
+def best_of(func, repeat: int) -> float:
+    """Best wall-clock time of ``repeat`` calls, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000, help="Restaurants to build")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+    args = parser.parse_args()
+
+    gc.collect()
+    tracemalloc.start()
+    restaurants = [synthetic_restaurant(i) for i in range(args.count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    def via_dict() -> list[str]:
+        vocabularies = Vocabularies()
+        return [
+            json.dumps(vocabularies.encode(r.to_dict()), ensure_ascii=False, separators=(",", ":"))
+            for r in restaurants
+        ]
+
+    def direct() -> list[str]:
+        vocabularies = Vocabularies()
+        return [encode_restaurant(r, vocabularies) for r in restaurants]
+
+    assert via_dict()[:100] == direct()[:100]
+    dict_time = best_of(via_dict, args.repeat)
+    direct_time = best_of(direct, args.repeat)
+    numbered = sum(map(len, direct()))
+    terms = sum(
+        len(json.dumps(r.to_dict(), ensure_ascii=False, separators=(",", ":"))) for r in restaurants
+    )
+
+    print(f"{args.count} restaurants, best of {args.repeat} runs")
+    print(f"memory:        {size / 2**20:>8.1f} MiB ({size / args.count:.0f} bytes each)")
+    print(f"to_dict+dumps: {dict_time * 1000:>8.0f} ms")
+    print(f"encode:        {direct_time * 1000:>8.0f} ms ({dict_time / direct_time:.1f}x)")
+    print(
+        f"output:        {numbered / 2**20:>8.1f} MiB ({terms / 2**20:.1f} MiB with terms inline)"
+    )
+
+
+if __name__ == "__main__":
+    main()
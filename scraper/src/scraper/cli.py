@@ -2,18 +2,70 @@
 
 import argparse
 import sys
-
-from scraper.config import BASE_URL, DEFAULT_DELAY, LISTING_PAGE_URL, LISTING_URL
-from scraper.fetcher import Cache, RateLimitedClient
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any
+
+from scraper.config import (
+    ADAPTIVE_MAX_RATE,
+    BASE_URL,
+    CACHE_TTL,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_DELAY,
+    NDJSON_OUTPUT_FILE,
+    OUTPUT_FILE,
+)
+from scraper.crawler import AsyncCrawler, PipelineCrawler, listing_url
+from scraper.fetcher import (
+    BACKENDS,
+    DETAILS,
+    LISTINGS,
+    MENUS,
+    AdaptiveRateLimiter,
+    Cache,
+    CachedFetcher,
+    CrawlJournal,
+    FetchResult,
+    RateLimitedClient,
+    RateLimiter,
+    open_cache,
+)
+from scraper.log import log
 from scraper.models import Menu, Restaurant
-from scraper.parser import DetailParser, ListingParser
-from scraper.storage import JsonWriter
-
-
-def log(message: str, verbose: bool = True) -> None:
-    """Print a log message if verbose is enabled."""
-    if verbose:
-        print(message, file=sys.stderr)
+from scraper.parser import (
+    DETAIL_SPEC,
+    LISTING_SPEC,
+    DetailParser,
+    ListingParser,
+    LxmlListingParser,
+    ParseMemo,
+)
+from scraper.storage import (
+    ColumnarWriter,
+    JsonWriter,
+    NdjsonWriter,
+    PreviousRun,
+    columnar_path,
+    read_output,
+)
+
+LISTING_ENGINES: dict[str, type[ListingParser]] = {
+    "lxml": LxmlListingParser,
+    "bs4": ListingParser,
+}
+
+
+def parse_with(memo: ParseMemo | None, func: Callable[..., Any], *args: Any) -> Any:
+    """Call a parser method through the parse memo, if there is one."""
+    return memo.call(func, *args) if memo is not None else func(*args)
+
+
+def load_listing(fetcher: CachedFetcher, page: int, verbose: bool) -> FetchResult:
+    """Load a listing page from the cache or the network."""
+    result = fetcher.load(LISTINGS, Cache.listing_key(page), listing_url(page))
+    log(f"  Loaded page {page} ({result.source})", verbose)
+    return result
 
 
 def fetch_listings(
@@ -23,32 +75,49 @@ def fetch_listings(
     use_cache: bool,
     max_pages: int | None,
     verbose: bool,
+    revalidate: bool = False,
+    memo: ParseMemo | None = None,
+    journal: CrawlJournal | None = None,
 ) -> list[Restaurant]:
     """Fetch and parse all listing pages."""
-    restaurants: list[Restaurant] = []
+    return list(
+        iter_listings(
+            client, cache, parser, use_cache, max_pages, verbose, revalidate, memo, journal
+        )
+    )
+
+
+def iter_listings(
+    client: RateLimitedClient,
+    cache: Cache,
+    parser: ListingParser,
+    use_cache: bool,
+    max_pages: int | None,
+    verbose: bool,
+    revalidate: bool = False,
+    memo: ParseMemo | None = None,
+    journal: CrawlJournal | None = None,
+) -> Iterator[Restaurant]:
+    """Yield each new restaurant as soon as its listing page is parsed."""
+    fetcher = CachedFetcher(
+        client, cache, use_cache=use_cache, revalidate=revalidate, journal=journal
+    )
     seen_slugs: set[str] = set()
 
     log("Fetching first listing page...", verbose)
 
-    if use_cache and cache.has_listing(1):
-        html = cache.get_listing(1)
-        log("  Using cached page 1", verbose)
-    else:
-        html = client.get(LISTING_URL)
-        if use_cache:
-            cache.save_listing(1, html)
-        log("  Fetched page 1", verbose)
+    result = load_listing(fetcher, 1, verbose)
 
-    if not html:
-        return restaurants
+    if not result.content:
+        return
 
-    page_restaurants = parser.parse(html)
-    for r in page_restaurants:
+    first_page = parse_with(memo, parser.parse_page, result.content, result.encoding)
+    for r in first_page.restaurants:
         if r.slug not in seen_slugs:
-            restaurants.append(r)
             seen_slugs.add(r.slug)
+            yield r
 
-    total_pages = parser.get_total_pages(html)
+    total_pages = first_page.total_pages
     log(f"Found {total_pages} total pages", verbose)
 
     if max_pages:
@@ -58,73 +127,116 @@ def fetch_listings(
     for page in range(2, total_pages + 1):
         log(f"Fetching page {page}/{total_pages}...", verbose)
 
-        if use_cache and cache.has_listing(page):
-            html = cache.get_listing(page)
-            log(f"  Using cached page {page}", verbose)
-        else:
-            url = LISTING_PAGE_URL.format(page=page)
-            html = client.get(url)
-            if use_cache:
-                cache.save_listing(page, html)
-            log(f"  Fetched page {page}", verbose)
-
-        if html:
-            page_restaurants = parser.parse(html)
+        result = load_listing(fetcher, page, verbose)
+
+        if result.content:
+            page_restaurants = parse_with(memo, parser.parse, result.content, result.encoding)
             for r in page_restaurants:
                 if r.slug not in seen_slugs:
-                    restaurants.append(r)
                     seen_slugs.add(r.slug)
+                    yield r
 
-    log(f"Found {len(restaurants)} unique restaurants", verbose)
-    return restaurants
+    log(f"Found {len(seen_slugs)} unique restaurants", verbose)
 
 
 def fetch_details(
     client: RateLimitedClient,
     cache: Cache,
     parser: DetailParser,
-    restaurants: list[Restaurant],
+    restaurants: Iterable[Restaurant],
     use_cache: bool,
     verbose: bool,
+    revalidate: bool = False,
+    memo: ParseMemo | None = None,
+    journal: CrawlJournal | None = None,
+    reuse: Callable[[Restaurant], Restaurant | None] | None = None,
+    on_error: Callable[[Restaurant], None] | None = None,
 ) -> list[Restaurant]:
     """Fetch and parse detail pages for all restaurants."""
-    total = len(restaurants)
+    return list(
+        iter_details(
+            client,
+            cache,
+            parser,
+            restaurants,
+            use_cache,
+            verbose,
+            revalidate,
+            memo,
+            journal,
+            reuse,
+            on_error,
+        )
+    )
+
+
+def iter_details(
+    client: RateLimitedClient,
+    cache: Cache,
+    parser: DetailParser,
+    restaurants: Iterable[Restaurant],
+    use_cache: bool,
+    verbose: bool,
+    revalidate: bool = False,
+    memo: ParseMemo | None = None,
+    journal: CrawlJournal | None = None,
+    reuse: Callable[[Restaurant], Restaurant | None] | None = None,
+    on_error: Callable[[Restaurant], None] | None = None,
+) -> Iterator[Restaurant]:
+    """Yield each restaurant once its detail page and menus are fetched.
+
+    Given ``iter_listings``, each restaurant's details are fetched as soon as
+    its listing page is parsed. Restaurants ``reuse`` returns a record for
+    are taken as is. ``on_error`` is told about each restaurant whose detail
+    page or a menu could not be fetched.
+    """
+    fetcher = CachedFetcher(
+        client, cache, use_cache=use_cache, revalidate=revalidate, journal=journal
+    )
+    total = len(restaurants) if isinstance(restaurants, list) else None
 
     for i, restaurant in enumerate(restaurants, 1):
+        if reuse is not None:
+            previous = reuse(restaurant)
+            if previous is not None:
+                yield previous
+                continue
+
         if not restaurant.detail_url:
+            yield restaurant
             continue
 
-        log(f"Fetching details {i}/{total}: {restaurant.name}...", verbose)
+        progress = f"{i}/{total}" if total is not None else str(i)
+        log(f"Fetching details {progress}: {restaurant.name}...", verbose)
 
-        if use_cache and cache.has_detail(restaurant.slug):
-            html = cache.get_detail(restaurant.slug)
-            log(f"  Using cached detail for {restaurant.slug}", verbose)
-        else:
-            try:
-                html = client.get(restaurant.detail_url)
-                if use_cache:
-                    cache.save_detail(restaurant.slug, html)
-                log(f"  Fetched detail for {restaurant.slug}", verbose)
-            except Exception as e:
-                log(f"  Error fetching {restaurant.slug}: {e}", verbose)
-                continue
+        try:
+            result = fetcher.load(DETAILS, Cache.detail_key(restaurant.slug), restaurant.detail_url)
+        except Exception as e:
+            log(f"  Error fetching {restaurant.slug}: {e}", verbose)
+            if on_error is not None:
+                on_error(restaurant)
+            yield restaurant
+            continue
+        log(f"  Loaded detail for {restaurant.slug} ({result.source})", verbose)
 
-        if html:
-            parser.parse(html, restaurant)
+        if result.content:
+            restaurant = parse_with(memo, parser.parse, result.content, restaurant, result.encoding)
 
-            menu_urls = getattr(restaurant, "_menu_urls", {})
+            menu_urls = restaurant.menu_urls
             if menu_urls:
-                fetch_menus(client, parser, restaurant, menu_urls, verbose)
+                fetch_menus(fetcher, parser, restaurant, menu_urls, verbose, memo, on_error)
 
-    return restaurants
+        yield restaurant
 
 
 def fetch_menus(
-    client: RateLimitedClient,
+    fetcher: CachedFetcher,
     parser: DetailParser,
     restaurant: Restaurant,
     menu_urls: dict[str, str],
     verbose: bool,
+    memo: ParseMemo | None = None,
+    on_error: Callable[[Restaurant], None] | None = None,
 ) -> None:
     """Fetch menu data from AJAX endpoints."""
     menus = []
@@ -135,28 +247,24 @@ def fetch_menus(
 
         full_url = f"{BASE_URL}{url_path}"
         try:
-            menu_html = client.get(full_url)
-            if menu_html:
-                price = None
-                if meal_type == "lunch":
-                    price = restaurant.pricing.lunch
-                elif meal_type == "dinner":
-                    price = restaurant.pricing.dinner
-                elif meal_type == "brunch":
-                    price = restaurant.pricing.brunch
-
-                meal_menu = parser.parse_menu_html(menu_html, meal_type, price)
+            menu = fetcher.load(MENUS, full_url, full_url)
+            if menu.content:
+                price = restaurant.pricing.for_meal(meal_type)
+                meal_menu = parse_with(
+                    memo, parser.parse_menu_html, menu.content, meal_type, price, menu.encoding
+                )
                 if meal_menu.courses:
                     menus.append(meal_menu)
                     log(f"    Fetched {meal_type} menu ({len(meal_menu.courses)} courses)", verbose)
         except Exception as e:
             log(f"    Error fetching {meal_type} menu: {e}", verbose)
+            if on_error is not None:
+                on_error(restaurant)
 
     if menus:
         restaurant.menu = Menu(menus=menus)
 
-    if hasattr(restaurant, "_menu_urls"):
-        delattr(restaurant, "_menu_urls")
+    restaurant.menu_urls = {}
 
 
 def main() -> int:
@@ -173,13 +281,66 @@ def main() -> int:
     arg_parser.add_argument(
         "--use-cache",
         action="store_true",
-        help="Use cached HTML files if available",
+        help="Use cached HTML (listings, details and menus) if available",
+    )
+    arg_parser.add_argument(
+        "--revalidate",
+        action="store_true",
+        help="Revalidate cached HTML with conditional requests (ETag / Last-Modified) "
+        "instead of trusting it",
+    )
+    arg_parser.add_argument(
+        "--cache-backend",
+        choices=BACKENDS,
+        default="files",
+        help="Cache storage: one file per page, or a single compressed pack file (default: files)",
+    )
+    arg_parser.add_argument(
+        "--no-parse-cache",
+        action="store_true",
+        help="With --use-cache, --revalidate, --journal or --resume, parse every page again "
+        "instead of reusing results for unchanged HTML",
+    )
+    arg_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Fetch detail pages and menus only for restaurants whose listing entry changed "
+        "since the last --incremental run to the same output, reusing the rest",
+    )
+    arg_parser.add_argument(
+        "--journal",
+        action="store_true",
+        help="Record the crawl's progress, caching every page, so it can be continued with "
+        "--resume if it stops",
+    )
+    arg_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the last --journal crawl, reusing the pages it already fetched "
+        "(the output and crawl options must match)",
+    )
+    arg_parser.add_argument(
+        "--ignore-ttl",
+        action="store_true",
+        help="With --use-cache, trust cached HTML however old it is",
     )
     arg_parser.add_argument(
         "--listings-only",
         action="store_true",
         help="Only fetch listings, skip detail pages",
     )
+    arg_parser.add_argument(
+        "--listing-engine",
+        choices=list(LISTING_ENGINES),
+        default="lxml",
+        help="Listing page parser: lxml's native tree, or BeautifulSoup (default: lxml)",
+    )
+    arg_parser.add_argument(
+        "--rule-stats",
+        action="store_true",
+        help="Report how often each extraction rule found its field "
+        "(rules run in --parse-workers processes are not counted)",
+    )
     arg_parser.add_argument(
         "--pages",
         type=int,
@@ -192,49 +353,257 @@ def main() -> int:
         default=DEFAULT_DELAY,
         help=f"Delay between requests in seconds (default: {DEFAULT_DELAY})",
     )
+    arg_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Crawl with up to N requests in flight using the async engine",
+    )
+    arg_parser.add_argument(
+        "--listing-concurrency",
+        type=int,
+        default=None,
+        help="Maximum listing pages fetched at once with --concurrency "
+        "(default: same as --concurrency)",
+    )
+    arg_parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Overlap fetching, parsing and writing in a staged pipeline "
+        f"(uses --concurrency, default: {DEFAULT_CONCURRENCY})",
+    )
+    arg_parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=None,
+        help="Bound on pages buffered between pipeline stages (default: 2 x concurrency)",
+    )
+    arg_parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=None,
+        help="Parse pages on a pool of N worker processes "
+        f"(uses --concurrency, default: {DEFAULT_CONCURRENCY})",
+    )
+    arg_parser.add_argument(
+        "--rate",
+        type=float,
+        default=None,
+        help="Global request budget in requests per second with --concurrency, "
+        "or the starting rate with --adaptive (default: 1 / --delay)",
+    )
+    arg_parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Tune the request rate from server feedback (AIMD, honours Retry-After)",
+    )
+    arg_parser.add_argument(
+        "--max-rate",
+        type=float,
+        default=ADAPTIVE_MAX_RATE,
+        help=f"Upper bound for --adaptive in requests per second (default: {ADAPTIVE_MAX_RATE})",
+    )
     arg_parser.add_argument(
         "-o",
         "--output",
         type=str,
         default=None,
-        help="Output file path (default: data/restaurants.json)",
+        help="Output file path (default: data/restaurants.json or data/restaurants.ndjson)",
+    )
+    arg_parser.add_argument(
+        "--format",
+        choices=["json", "ndjson"],
+        default="json",
+        help="Output format; ndjson writes each restaurant as it finishes",
+    )
+    arg_parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Write JSON output without indentation",
+    )
+    arg_parser.add_argument(
+        "--vocabularies",
+        action="store_true",
+        help="Store each cuisine, neighborhood and feature once in a table, with records "
+        "referring to it by number (read back with read_output)",
+    )
+    arg_parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Also write a columnar export next to the output (e.g. restaurants.json.columns)",
     )
 
     args = arg_parser.parse_args()
 
-    cache = Cache()
-    listing_parser = ListingParser()
+    if args.concurrency is not None and args.concurrency < 1:
+        arg_parser.error("--concurrency must be at least 1")
+    if args.parse_workers is not None and args.parse_workers < 1:
+        arg_parser.error("--parse-workers must be at least 1")
+    if (args.pipeline or args.parse_workers) and not args.concurrency:
+        args.concurrency = DEFAULT_CONCURRENCY
+    if args.queue_size is not None:
+        if not args.pipeline:
+            arg_parser.error("--queue-size requires --pipeline")
+        if args.queue_size < 1:
+            arg_parser.error("--queue-size must be at least 1")
+    if args.incremental and args.listings_only:
+        arg_parser.error("--incremental cannot be used with --listings-only")
+    if args.listing_concurrency is not None:
+        if not args.concurrency:
+            arg_parser.error("--listing-concurrency requires --concurrency")
+        if args.listing_concurrency < 1:
+            arg_parser.error("--listing-concurrency must be at least 1")
+
+    cache = open_cache(args.cache_backend, ttls={} if args.ignore_ttl else CACHE_TTL)
+    listing_parser = LISTING_ENGINES[args.listing_engine]()
     detail_parser = DetailParser()
-
-    if args.output:
-        from pathlib import Path
-
-        writer = JsonWriter(Path(args.output))
+    journaled = args.journal or args.resume
+    # A resumed crawl reparses the pages its journal has as fetched; the
+    # memo, kept up by the journaled run, answers for them instead.
+    memo = None
+    if (args.use_cache or args.revalidate or journaled) and not args.no_parse_cache:
+        memo = ParseMemo(cache)
+
+    writer: JsonWriter | NdjsonWriter
+    if args.format == "ndjson":
+        writer = NdjsonWriter(
+            Path(args.output) if args.output else NDJSON_OUTPUT_FILE,
+            vocabularies=args.vocabularies,
+        )
     else:
-        writer = JsonWriter()
-
-    with RateLimitedClient(delay=args.delay) as client:
-        restaurants = fetch_listings(
-            client=client,
-            cache=cache,
-            parser=listing_parser,
-            use_cache=args.use_cache,
-            max_pages=args.pages,
-            verbose=args.verbose,
+        writer = JsonWriter(
+            Path(args.output) if args.output else OUTPUT_FILE,
+            indent=None if args.compact else 2,
+            vocabularies=args.vocabularies,
+        )
+    # NDJSON is written as each restaurant finishes, whichever crawler runs.
+    stream = isinstance(writer, NdjsonWriter)
+    previous = PreviousRun(writer.output_path) if args.incremental else None
+    reuse = previous.reuse if previous is not None else None
+    forget = previous.forget if previous is not None else None
+
+    rate = args.rate if args.rate is not None else (1 / args.delay if args.delay else None)
+    rate_limiter: RateLimiter | None = None
+    if args.adaptive:
+        rate_limiter = AdaptiveRateLimiter(
+            rate or args.max_rate,
+            max_rate=args.max_rate,
+            report=lambda message: log(message, args.verbose),
         )
+    elif args.concurrency:
+        rate_limiter = RateLimiter(rate)
 
-        if not args.listings_only:
-            restaurants = fetch_details(
-                client=client,
-                cache=cache,
-                parser=detail_parser,
-                restaurants=restaurants,
-                use_cache=args.use_cache,
-                verbose=args.verbose,
+    journal: CrawlJournal | None = None
+    if journaled:
+        try:
+            journal = CrawlJournal(
+                resume=args.resume,
+                options={
+                    "output": str(writer.output_path.resolve()),
+                    "format": args.format,
+                    "pages": args.pages,
+                    "listings_only": args.listings_only,
+                    "incremental": args.incremental,
+                },
             )
-
-    output_path = writer.write(restaurants)
-    log(f"Wrote {len(restaurants)} restaurants to {output_path}", args.verbose)
+        except ValueError as e:
+            arg_parser.error(f"cannot --resume: {e}")
+
+    with journal or nullcontext():
+        with cache:
+            if args.concurrency:
+                with RateLimitedClient(
+                    delay=args.delay,
+                    rate_limiter=rate_limiter,
+                    pool_size=args.concurrency,
+                ) as client:
+                    crawler_options = {
+                        "client": client,
+                        "cache": cache,
+                        "listing_parser": listing_parser,
+                        "detail_parser": detail_parser,
+                        "concurrency": args.concurrency,
+                        "listing_concurrency": args.listing_concurrency,
+                        "parse_workers": args.parse_workers,
+                        "use_cache": args.use_cache,
+                        "revalidate": args.revalidate,
+                        "parse_memo": memo,
+                        "journal": journal,
+                        "reuse": reuse,
+                        "on_error": forget,
+                        "verbose": args.verbose,
+                    }
+                    if stream:
+                        crawler_options["on_complete"] = writer.append
+                        crawler_options["keep_results"] = False
+                    if args.pipeline:
+                        crawler = PipelineCrawler(**crawler_options, queue_size=args.queue_size)
+                    else:
+                        crawler = AsyncCrawler(**crawler_options)
+                    restaurants = crawler.run(
+                        max_pages=args.pages, listings_only=args.listings_only
+                    )
+            else:
+                with RateLimitedClient(delay=args.delay, rate_limiter=rate_limiter) as client:
+                    listings = iter_listings(
+                        client=client,
+                        cache=cache,
+                        parser=listing_parser,
+                        use_cache=args.use_cache,
+                        max_pages=args.pages,
+                        verbose=args.verbose,
+                        revalidate=args.revalidate,
+                        memo=memo,
+                        journal=journal,
+                    )
+
+                    if args.listings_only:
+                        finished = listings
+                    else:
+                        finished = iter_details(
+                            client=client,
+                            cache=cache,
+                            parser=detail_parser,
+                            restaurants=listings,
+                            use_cache=args.use_cache,
+                            verbose=args.verbose,
+                            revalidate=args.revalidate,
+                            memo=memo,
+                            journal=journal,
+                            reuse=reuse,
+                            on_error=forget,
+                        )
+                    if stream:
+                        for restaurant in finished:
+                            writer.append(restaurant)
+                        restaurants = []
+                    else:
+                        restaurants = list(finished)
+
+        if memo is not None:
+            log(f"Parse cache: {memo.hits} hits, {memo.misses} misses", args.verbose)
+        if args.rule_stats:
+            for spec_name, spec in (("listing", LISTING_SPEC), ("detail", DETAIL_SPEC)):
+                for stats in spec.stats():
+                    log(
+                        f"{spec_name:<8} {stats.field:<13} {stats.hits:>6} hits "
+                        f"{stats.misses:>6} misses  {stats.rule}"
+                    )
+
+        if stream:
+            output_path = writer.close()
+            count = writer.count
+        else:
+            output_path = writer.write(restaurants)
+            count = len(restaurants)
+        log(f"Wrote {count} restaurants to {output_path}", args.verbose)
+        if args.columnar:
+            written = map(Restaurant.from_dict, read_output(output_path)) if stream else restaurants
+            columns_path = ColumnarWriter(columnar_path(output_path)).write(written)
+            log(f"Wrote columns to {columns_path}", args.verbose)
+        if previous is not None:
+            previous.save()
+            log(f"Reused {previous.reused} unchanged restaurants", args.verbose)
 
     print(output_path)
 
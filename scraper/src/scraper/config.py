@@ -11,17 +11,47 @@ DETAIL_URL_PATTERN = f"{BASE_URL}/restaurant/{{slug}}/"
 # Paths
 PROJECT_ROOT = Path(__file__).parent.parent.parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
-CACHE_DIR = DATA_DIR / "raw"
-LISTINGS_CACHE_DIR = CACHE_DIR / "listings"
-DETAILS_CACHE_DIR = CACHE_DIR / "details"
+CACHE_DIR = DATA_DIR / "raw"  # one subdirectory per cache namespace
+CACHE_PACK_FILE = CACHE_DIR / "cache.pack"  # used with --cache-backend pack
 OUTPUT_FILE = DATA_DIR / "restaurants.json"
+NDJSON_OUTPUT_FILE = DATA_DIR / "restaurants.ndjson"  # used with --format ndjson
+JOURNAL_FILE = DATA_DIR / "crawl-journal.jsonl"  # read back by --resume
+LOAD_MANIFEST_FILE = DATA_DIR / "load-manifest.json"  # hashes of rows last sent to Supabase
+
+# Cache policy
+CACHE_TTL: dict[str, float | None] = {  # seconds a cached page is trusted, per namespace
+    "listings": 6 * 60 * 60,
+    "details": 7 * 24 * 60 * 60,
+    "menus": 7 * 24 * 60 * 60,
+}
+CACHE_MAX_BYTES = 1024**3  # least recently used pages are evicted beyond this
+CACHE_COMPACT_DEAD_RATIO = 0.25  # a pack is rewritten once this share of it is dead records
+
+# Crawl journal
+JOURNAL_FLUSH_EVERY = 50  # records buffered before the journal is flushed
+JOURNAL_FLUSH_INTERVAL = 5.0  # seconds between journal flushes
 
 # HTTP settings
 DEFAULT_DELAY = 1.5  # seconds between requests
+DEFAULT_CONCURRENCY = 4  # in-flight requests for --pipeline without --concurrency
 REQUEST_TIMEOUT = 30  # seconds
 MAX_RETRIES = 3
 BACKOFF_FACTOR = 1.0  # exponential backoff multiplier
 
+# Supabase loader
+UPSERT_BATCH_BYTES = 256 * 1024  # serialized rows per upsert request
+UPSERT_WORKERS = 4  # upsert requests in flight
+UPSERT_RETRIES = 2  # retries of a batch failing for reasons other than its rows
+UPSERT_ROW_ERROR_STATUSES = (400, 409, 422)  # responses that blame the rows, so a batch is split
+
+# Adaptive (AIMD) rate limiting
+ADAPTIVE_MIN_RATE = 0.1  # requests per second
+ADAPTIVE_MAX_RATE = 10.0
+ADAPTIVE_INCREASE = 0.1  # requests per second added after each healthy response
+ADAPTIVE_DECREASE_FACTOR = 0.5  # rate multiplier on throttling, errors or slowdowns
+ADAPTIVE_LATENCY_FACTOR = 3.0  # latency above this multiple of the baseline is "slow"
+ADAPTIVE_BASELINE_WEIGHT = 0.05  # how quickly the latency baseline follows the recent average
+
 # User agent
 USER_AGENT = (
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
@@ -0,0 +1,6 @@
+"""Concurrent crawl engine."""
+
+from .engine import AsyncCrawler, listing_url
+from .pipeline import PipelineCrawler
+
+__all__ = ["AsyncCrawler", "PipelineCrawler", "listing_url"]
@@ -0,0 +1,392 @@
+"""Asyncio crawl engine that keeps many requests in flight."""
+
+import asyncio
+import itertools
+import multiprocessing
+from collections.abc import AsyncGenerator, Callable, Iterable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack, aclosing
+from typing import Any
+
+from scraper.config import BASE_URL, LISTING_PAGE_URL, LISTING_URL
+from scraper.fetcher import (
+    DETAILS,
+    LISTINGS,
+    MENUS,
+    Cache,
+    CachedFetcher,
+    CrawlJournal,
+    FetchResult,
+    RateLimitedClient,
+)
+from scraper.log import log
+from scraper.models import MealMenu, Menu, Restaurant
+from scraper.parser import DetailParser, ListingParser, ParseMemo
+
+
+def listing_url(page: int) -> str:
+    """Get the URL of a listing page."""
+    return LISTING_URL if page == 1 else LISTING_PAGE_URL.format(page=page)
+
+
+class AsyncCrawler:
+    """Crawl listing, detail and menu pages concurrently.
+
+    Blocking HTTP calls run on a thread pool with at most ``concurrency``
+    requests in flight. The client's shared rate limiter keeps the crawl
+    within its global requests-per-second budget.
+
+    With ``parse_workers`` set, parsing runs on a process pool instead of
+    the event loop thread. Parsers then work on pickled copies, so callers
+    always use the objects they return rather than relying on mutation.
+    With a ``parse_memo``, pages parsed by an earlier run are not parsed
+    again. With a ``journal``, each page's progress is recorded so a later
+    crawl can resume; see ``CrawlJournal``. ``reuse`` is offered each
+    restaurant from the listing before its detail page is fetched, and any
+    restaurant it returns is used as is. ``on_error`` is told about each
+    restaurant whose detail page or a menu could not be fetched.
+
+    Finished restaurants are passed to ``on_complete`` as soon as their
+    detail page and menus are done. With ``keep_results=False`` they are not
+    also collected for ``crawl`` to return, so a streaming ``on_complete``
+    keeps memory flat.
+    """
+
+    def __init__(
+        self,
+        client: RateLimitedClient,
+        cache: Cache,
+        listing_parser: ListingParser,
+        detail_parser: DetailParser,
+        concurrency: int,
+        listing_concurrency: int | None = None,
+        parse_workers: int | None = None,
+        use_cache: bool = False,
+        revalidate: bool = False,
+        parse_memo: ParseMemo | None = None,
+        journal: CrawlJournal | None = None,
+        reuse: Callable[[Restaurant], Restaurant | None] | None = None,
+        verbose: bool = False,
+        on_complete: Callable[[Restaurant], None] | None = None,
+        keep_results: bool = True,
+        on_error: Callable[[Restaurant], None] | None = None,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if listing_concurrency is not None and listing_concurrency < 1:
+            raise ValueError("listing_concurrency must be at least 1")
+        if parse_workers is not None and parse_workers < 1:
+            raise ValueError("parse_workers must be at least 1")
+        self.client = client
+        self.cache = cache
+        self.listing_parser = listing_parser
+        self.detail_parser = detail_parser
+        self.concurrency = concurrency
+        self.listing_concurrency = listing_concurrency or concurrency
+        self.parse_workers = parse_workers
+        self.fetcher = CachedFetcher(
+            client, cache, use_cache=use_cache, revalidate=revalidate, journal=journal
+        )
+        self.parse_memo = parse_memo
+        self.journal = journal
+        self.reuse = reuse
+        self.verbose = verbose
+        self.on_complete = on_complete
+        self.keep_results = keep_results
+        self.on_error = on_error
+        self._executor: ThreadPoolExecutor | None = None
+        self._parse_executor: Executor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+
+    def run(self, max_pages: int | None = None, listings_only: bool = False) -> list[Restaurant]:
+        """Run a full crawl and return the restaurants."""
+        return asyncio.run(self.crawl(max_pages=max_pages, listings_only=listings_only))
+
+    async def crawl(
+        self, max_pages: int | None = None, listings_only: bool = False
+    ) -> list[Restaurant]:
+        """Crawl listings and, unless ``listings_only``, details and menus."""
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        with ExitStack() as stack:
+            self._executor = stack.enter_context(
+                ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="crawler")
+            )
+            if self.parse_workers:
+                self._parse_executor = stack.enter_context(self._create_parse_pool())
+            try:
+                if listings_only:
+                    restaurants = []
+                    async with aclosing(self.iter_listings(max_pages)) as listings:
+                        async for restaurant in listings:
+                            self._deliver(restaurants, restaurant)
+                else:
+                    restaurants = await self.fetch_details(self.iter_listings(max_pages))
+            finally:
+                self._executor = None
+                self._parse_executor = None
+        return restaurants
+
+    def _create_parse_pool(self) -> ProcessPoolExecutor:
+        """Create the process pool used for parsing."""
+        # Spawned workers avoid forking a process that already runs threads.
+        return ProcessPoolExecutor(
+            max_workers=self.parse_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    async def _parse(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a parser call on the parse executor, or inline without one."""
+        memo = self.parse_memo
+        if memo is not None:
+            key = memo.key(func, *args)
+            memoized = memo.get(key)
+            if memoized is not None:
+                return memoized
+        if self._parse_executor is None:
+            result = func(*args)
+        else:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._parse_executor, func, *args)
+        if memo is not None:
+            memo.put(key, result)
+        return result
+
+    async def _load(self, namespace: str, key: str, url: str) -> FetchResult:
+        """Load a page through the cache on the thread pool.
+
+        Every load takes a concurrency slot, bounding in-flight requests.
+        Pages stay bytes; parsers decode them with the declared charset.
+        """
+        assert self._semaphore is not None
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self._executor, self.fetcher.load, namespace, key, url
+            )
+        log(f"  Loaded {namespace}/{key} ({result.source})", self.verbose)
+        return result
+
+    async def _get_listing(self, page: int) -> FetchResult:
+        """Load a listing page."""
+        return await self._load(LISTINGS, Cache.listing_key(page), listing_url(page))
+
+    async def _get_detail(self, restaurant: Restaurant) -> FetchResult:
+        """Load a restaurant's detail page."""
+        assert restaurant.detail_url is not None
+        return await self._load(DETAILS, Cache.detail_key(restaurant.slug), restaurant.detail_url)
+
+    async def _get_menu(self, url: str) -> FetchResult:
+        """Load a menu fragment."""
+        return await self._load(MENUS, url, url)
+
+    async def fetch_listings(self, max_pages: int | None = None) -> list[Restaurant]:
+        """Fetch and parse all listing pages."""
+        async with aclosing(self.iter_listings(max_pages)) as restaurants:
+            return [restaurant async for restaurant in restaurants]
+
+    async def iter_listings(self, max_pages: int | None = None) -> AsyncGenerator[Restaurant, None]:
+        """Yield each new restaurant as soon as its listing page is parsed."""
+        seen_slugs: set[str] = set()
+
+        log("Fetching first listing page...", self.verbose)
+        page = await self._get_listing(1)
+        if not page.content:
+            return
+
+        first_page = await self._parse(self.listing_parser.parse_page, page.content, page.encoding)
+
+        total_pages = first_page.total_pages
+        log(f"Found {total_pages} total pages", self.verbose)
+
+        if max_pages:
+            total_pages = min(total_pages, max_pages)
+            log(f"Limiting to {total_pages} pages", self.verbose)
+
+        # Every remaining page URL is known now, so request them all at once.
+        # Pages are released in page order, which keeps the dedupe (and so
+        # which duplicate wins) identical to a serial walk.
+        semaphore = asyncio.Semaphore(self.listing_concurrency)
+        pages = [
+            asyncio.create_task(self._fetch_listing_page(page, total_pages, semaphore))
+            for page in range(2, total_pages + 1)
+        ]
+        try:
+            new: list[Restaurant] = []
+            self._merge(new, seen_slugs, first_page.restaurants)
+            for restaurant in new:
+                yield restaurant
+            for task in pages:
+                new = []
+                self._merge(new, seen_slugs, await task)
+                for restaurant in new:
+                    yield restaurant
+        finally:
+            for task in pages:
+                task.cancel()
+            await asyncio.gather(*pages, return_exceptions=True)
+
+        log(f"Found {len(seen_slugs)} unique restaurants", self.verbose)
+
+    async def _fetch_listing_page(
+        self, page: int, total_pages: int, semaphore: asyncio.Semaphore
+    ) -> list[Restaurant]:
+        """Fetch and parse one listing page, bounded by the listing cap."""
+        async with semaphore:
+            log(f"Fetching page {page}/{total_pages}...", self.verbose)
+            result = await self._get_listing(page)
+        if not result.content:
+            return []
+        restaurants = await self._parse(self.listing_parser.parse, result.content, result.encoding)
+        return restaurants
+
+    @staticmethod
+    def _merge(
+        restaurants: list[Restaurant], seen_slugs: set[str], page_restaurants: list[Restaurant]
+    ) -> None:
+        """Append restaurants whose slugs have not been seen yet."""
+        for r in page_restaurants:
+            if r.slug not in seen_slugs:
+                restaurants.append(r)
+                seen_slugs.add(r.slug)
+
+    async def fetch_details(
+        self, restaurants: list[Restaurant] | AsyncGenerator[Restaurant, None]
+    ) -> list[Restaurant]:
+        """Fetch detail pages and menus for all restaurants concurrently.
+
+        Given ``iter_listings``, each restaurant's detail page is requested as
+        soon as its listing page is parsed, while later pages still load.
+        """
+        total = len(restaurants) if isinstance(restaurants, list) else None
+        results: list[Restaurant] = []
+        running: dict[asyncio.Task[Restaurant], int] = {}
+        finished: list[asyncio.Task[Restaurant]] = []
+        started = itertools.count()
+
+        def start(restaurant: Restaurant) -> None:
+            index = next(started)
+            if self.keep_results:
+                results.append(restaurant)
+            task = asyncio.create_task(self._fetch_detail(index + 1, total, restaurant))
+            running[task] = index
+            task.add_done_callback(finished.append)
+
+        def collect(tasks: Iterable[asyncio.Task[Restaurant]]) -> None:
+            """Pass on restaurants from finished tasks, raising any failure."""
+            for task in tasks:
+                index = running.pop(task, None)
+                if index is None:
+                    continue
+                restaurant = task.result()
+                if self.keep_results:
+                    results[index] = restaurant
+                if self.on_complete is not None:
+                    self.on_complete(restaurant)
+
+        try:
+            if isinstance(restaurants, list):
+                for restaurant in restaurants:
+                    start(restaurant)
+            else:
+                async with aclosing(restaurants):
+                    async for restaurant in restaurants:
+                        start(restaurant)
+                        collect(finished)
+                        finished.clear()
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                collect(done)
+                finished.clear()
+            return results
+        except BaseException:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            raise
+
+    def _deliver(self, results: list[Restaurant], restaurant: Restaurant) -> None:
+        """Collect a finished restaurant and pass it to ``on_complete``."""
+        if self.keep_results:
+            results.append(restaurant)
+        if self.on_complete is not None:
+            self.on_complete(restaurant)
+
+    def _failed(self, restaurant: Restaurant) -> None:
+        """Report a restaurant whose detail page or a menu could not be fetched."""
+        if self.on_error is not None:
+            self.on_error(restaurant)
+
+    async def _fetch_detail(
+        self, index: int, total: int | None, restaurant: Restaurant
+    ) -> Restaurant:
+        """Fetch and parse one detail page, then its menus."""
+        if self.reuse is not None:
+            previous = self.reuse(restaurant)
+            if previous is not None:
+                return previous
+        if not restaurant.detail_url:
+            return restaurant
+
+        try:
+            page = await self._get_detail(restaurant)
+        except Exception as e:
+            log(f"  Error fetching {restaurant.slug}: {e}", self.verbose)
+            self._failed(restaurant)
+            return restaurant
+        progress = f"{index}/{total}" if total is not None else str(index)
+        log(f"Loaded details {progress}: {restaurant.name}", self.verbose)
+
+        if page.content:
+            restaurant = await self._parse(
+                self.detail_parser.parse, page.content, restaurant, page.encoding
+            )
+
+            menu_urls = restaurant.menu_urls
+            if menu_urls:
+                await self.fetch_menus(restaurant, menu_urls)
+
+        return restaurant
+
+    async def fetch_menus(self, restaurant: Restaurant, menu_urls: dict[str, str]) -> None:
+        """Fetch all menu fragments for a restaurant concurrently."""
+        results = await asyncio.gather(
+            *(
+                self._fetch_menu(restaurant, meal_type, url_path)
+                for meal_type, url_path in menu_urls.items()
+                if url_path
+            )
+        )
+        menus = [meal_menu for meal_menu in results if meal_menu is not None]
+
+        if menus:
+            restaurant.menu = Menu(menus=menus)
+
+        restaurant.menu_urls = {}
+
+    async def _fetch_menu(
+        self, restaurant: Restaurant, meal_type: str, url_path: str
+    ) -> MealMenu | None:
+        """Fetch and parse a single menu fragment."""
+        url = f"{BASE_URL}{url_path}"
+        try:
+            menu = await self._get_menu(url)
+        except Exception as e:
+            log(f"    Error fetching {meal_type} menu: {e}", self.verbose)
+            self._failed(restaurant)
+            return None
+
+        if not menu.content:
+            return None
+
+        price = restaurant.pricing.for_meal(meal_type)
+        meal_menu = await self._parse(
+            self.detail_parser.parse_menu_html, menu.content, meal_type, price, menu.encoding
+        )
+        if not meal_menu.courses:
+            return None
+
+        log(
+            f"    Fetched {meal_type} menu for {restaurant.slug} "
+            f"({len(meal_menu.courses)} courses)",
+            self.verbose,
+        )
+        return meal_menu
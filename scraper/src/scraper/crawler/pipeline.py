@@ -0,0 +1,302 @@
+"""Staged fetch -> parse -> write crawl pipeline."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass
+
+from scraper.config import BASE_URL
+from scraper.crawler.engine import AsyncCrawler
+from scraper.fetcher import FetchResult
+from scraper.log import log
+from scraper.models import MealMenu, Menu, Restaurant
+
+
+@dataclass
+class _Job:
+    """A unit of work flowing through the pipeline."""
+
+    kind: str  # "listing", "detail" or "menu"
+    page: int = 0
+    restaurant: Restaurant | None = None
+    meal_type: str = ""
+    url: str = ""
+
+
+class PipelineCrawler(AsyncCrawler):
+    """Crawl with fetcher, parser and writer stages connected by queues.
+
+    Fetcher tasks push raw HTML onto a bounded queue that parser tasks drain
+    on a parser thread (or on the process pool when ``parse_workers`` is
+    set), so BeautifulSoup work overlaps with network waits.
+    When parsers fall behind, the full HTML queue blocks the fetchers, which
+    keeps memory flat. Finished restaurants go through a bounded write queue
+    to ``on_complete``.
+
+    Jobs discovered by parsers go onto an unbounded queue of small job
+    records; only the HTML and write queues are bounded, so the stages can
+    never wait on each other in a cycle.
+    """
+
+    def __init__(self, *args, queue_size: int | None = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.queue_size = queue_size or self.concurrency * 2
+
+    async def crawl(
+        self, max_pages: int | None = None, listings_only: bool = False
+    ) -> list[Restaurant]:
+        """Run the pipeline and return restaurants in listing order."""
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._listing_semaphore = asyncio.Semaphore(self.listing_concurrency)
+        self._fetch_queue: asyncio.Queue[_Job] = asyncio.Queue()
+        self._html_queue: asyncio.Queue[tuple[_Job, FetchResult | None]] = asyncio.Queue(
+            maxsize=self.queue_size
+        )
+        self._write_queue: asyncio.Queue[Restaurant] = asyncio.Queue(maxsize=self.queue_size)
+        self._listings_only = listings_only
+        self._pending = 0
+        self._idle = asyncio.Event()
+        self._error: BaseException | None = None
+        self._seen_slugs: set[str] = set()
+        self._order: dict[str, int] = {}
+        self._parsed_pages: dict[int, list[Restaurant]] = {}
+        self._next_page = 1
+        self._menu_jobs: dict[str, list[str]] = {}
+        self._menu_results: dict[str, dict[str, MealMenu | None]] = {}
+        self._results: list[Restaurant] = []
+        self._completed = 0
+
+        with ExitStack() as stack:
+            self._executor = stack.enter_context(
+                ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="crawler")
+            )
+            if self.parse_workers:
+                self._parse_executor = stack.enter_context(self._create_parse_pool())
+            else:
+                self._parse_executor = stack.enter_context(
+                    ThreadPoolExecutor(max_workers=1, thread_name_prefix="parser")
+                )
+            try:
+                await self._run(max_pages)
+            finally:
+                self._executor = None
+                self._parse_executor = None
+
+        return sorted(self._results, key=lambda r: self._order[r.slug])
+
+    async def _run(self, max_pages: int | None) -> None:
+        """Seed the pipeline from page 1 and wait for every stage to drain."""
+        log("Fetching first listing page...", self.verbose)
+        page = await self._get_listing(1)
+        if not page.content:
+            return
+
+        first_page = await self._parse(self.listing_parser.parse_page, page.content, page.encoding)
+        total_pages = first_page.total_pages
+        log(f"Found {total_pages} total pages", self.verbose)
+
+        if max_pages:
+            total_pages = min(total_pages, max_pages)
+            log(f"Limiting to {total_pages} pages", self.verbose)
+
+        for page in range(2, total_pages + 1):
+            self._enqueue(_Job(kind="listing", page=page))
+
+        tasks = [
+            *(self._guard(self._fetch_worker) for _ in range(self.concurrency)),
+            *(self._guard(self._parse_worker) for _ in range(self.parse_workers or 1)),
+            self._guard(self._write_worker),
+        ]
+        try:
+            await self._release_listing_page(1, first_page.restaurants)
+            if self._pending == 0:
+                self._idle.set()
+            await self._idle.wait()
+            if self._error is None:
+                await self._write_queue.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self._error is not None:
+            raise self._error
+
+        log(f"Completed {self._completed} restaurants", self.verbose)
+
+    def _guard(self, worker: Callable[[], Awaitable[None]]) -> asyncio.Task[None]:
+        """Start a worker task whose failure stops the whole pipeline."""
+
+        async def run() -> None:
+            try:
+                await worker()
+            except asyncio.CancelledError:
+                raise
+            except BaseException as e:
+                self._error = e
+                self._idle.set()
+
+        return asyncio.create_task(run())
+
+    def _enqueue(self, job: _Job) -> None:
+        """Queue a fetch job and count it as outstanding work."""
+        self._pending += 1
+        self._fetch_queue.put_nowait(job)
+
+    def _job_done(self) -> None:
+        """Mark one job as fully processed."""
+        self._pending -= 1
+        if self._pending == 0:
+            self._idle.set()
+
+    async def _fetch_worker(self) -> None:
+        """Fetcher stage: turn jobs into raw HTML."""
+        while True:
+            job = await self._fetch_queue.get()
+            try:
+                page = await self._fetch_job(job)
+            except Exception as e:
+                if job.kind == "listing":
+                    raise
+                assert job.restaurant is not None
+                label = job.restaurant.slug if job.kind == "detail" else f"{job.meal_type} menu"
+                log(f"  Error fetching {label}: {e}", self.verbose)
+                self._failed(job.restaurant)
+                page = None
+            await self._html_queue.put((job, page))
+
+    async def _fetch_job(self, job: _Job) -> FetchResult:
+        """Fetch the HTML for a single job."""
+        if job.kind == "listing":
+            async with self._listing_semaphore:
+                return await self._get_listing(job.page)
+        if job.kind == "detail":
+            assert job.restaurant is not None
+            return await self._get_detail(job.restaurant)
+        return await self._get_menu(job.url)
+
+    async def _parse_worker(self) -> None:
+        """Parser stage: turn raw HTML into restaurants and follow-up jobs."""
+        while True:
+            job, page = await self._html_queue.get()
+            try:
+                if job.kind == "listing":
+                    assert page is not None
+                    page_restaurants = await self._parse(
+                        self.listing_parser.parse, page.content, page.encoding
+                    )
+                    await self._release_listing_page(job.page, page_restaurants)
+                elif job.kind == "detail":
+                    await self._handle_detail(job, page)
+                else:
+                    await self._handle_menu(job, page)
+            finally:
+                self._html_queue.task_done()
+            self._job_done()
+
+    async def _release_listing_page(self, page: int, restaurants: list[Restaurant]) -> None:
+        """Dedupe listing pages strictly in page order and dispatch new slugs."""
+        self._parsed_pages[page] = restaurants
+        while self._next_page in self._parsed_pages:
+            page_restaurants = self._parsed_pages.pop(self._next_page)
+            self._next_page += 1
+            new: list[Restaurant] = []
+            self._merge(new, self._seen_slugs, page_restaurants)
+            for restaurant in new:
+                self._order[restaurant.slug] = len(self._order)
+                previous = None
+                if self.reuse is not None and not self._listings_only:
+                    previous = self.reuse(restaurant)
+                if previous is not None:
+                    await self._complete(previous)
+                elif self._listings_only or not restaurant.detail_url:
+                    await self._complete(restaurant)
+                else:
+                    self._enqueue(_Job(kind="detail", restaurant=restaurant))
+
+    async def _handle_detail(self, job: _Job, page: FetchResult | None) -> None:
+        """Parse a detail page and queue its menu fragments."""
+        restaurant = job.restaurant
+        assert restaurant is not None
+        if page is None or not page.content:
+            await self._complete(restaurant)
+            return
+
+        restaurant = await self._parse(
+            self.detail_parser.parse, page.content, restaurant, page.encoding
+        )
+        log(f"Parsed details for {restaurant.slug}", self.verbose)
+
+        menu_urls = restaurant.menu_urls
+        restaurant.menu_urls = {}
+
+        meal_types = [meal_type for meal_type, url_path in menu_urls.items() if url_path]
+        if not meal_types:
+            await self._complete(restaurant)
+            return
+
+        self._menu_jobs[restaurant.slug] = meal_types
+        self._menu_results[restaurant.slug] = {}
+        for meal_type in meal_types:
+            self._enqueue(
+                _Job(
+                    kind="menu",
+                    restaurant=restaurant,
+                    meal_type=meal_type,
+                    url=f"{BASE_URL}{menu_urls[meal_type]}",
+                )
+            )
+
+    async def _handle_menu(self, job: _Job, page: FetchResult | None) -> None:
+        """Parse a menu fragment and complete the restaurant after its last menu."""
+        restaurant = job.restaurant
+        assert restaurant is not None
+        meal_menu = None
+        if page is not None and page.content:
+            price = restaurant.pricing.for_meal(job.meal_type)
+            meal_menu = await self._parse(
+                self.detail_parser.parse_menu_html,
+                page.content,
+                job.meal_type,
+                price,
+                page.encoding,
+            )
+            if meal_menu.courses:
+                log(
+                    f"    Fetched {job.meal_type} menu for {restaurant.slug} "
+                    f"({len(meal_menu.courses)} courses)",
+                    self.verbose,
+                )
+            else:
+                meal_menu = None
+
+        results = self._menu_results[restaurant.slug]
+        results[job.meal_type] = meal_menu
+        meal_types = self._menu_jobs[restaurant.slug]
+        if len(results) < len(meal_types):
+            return
+
+        del self._menu_jobs[restaurant.slug]
+        del self._menu_results[restaurant.slug]
+        menus = [results[m] for m in meal_types if results[m] is not None]
+        if menus:
+            restaurant.menu = Menu(menus=menus)
+        await self._complete(restaurant)
+
+    async def _complete(self, restaurant: Restaurant) -> None:
+        """Hand a finished restaurant to the writer stage."""
+        await self._write_queue.put(restaurant)
+
+    async def _write_worker(self) -> None:
+        """Writer stage: collect finished restaurants and pass them on."""
+        while True:
+            restaurant = await self._write_queue.get()
+            try:
+                self._completed += 1
+                if self.keep_results:
+                    self._results.append(restaurant)
+                if self.on_complete is not None:
+                    self.on_complete(restaurant)
+            finally:
+                self._write_queue.task_done()
@@ -1,6 +1,42 @@
 """HTTP fetching and caching utilities."""
 
-from .cache import Cache
-from .http_client import RateLimitedClient
+from .backends import CacheBackend, CacheItem, FileBackend, PackBackend
+from .cache import (
+    BACKENDS,
+    DETAILS,
+    LISTINGS,
+    MENUS,
+    PARSED,
+    Cache,
+    CacheEntry,
+    NamespaceStats,
+    PruneResult,
+    open_cache,
+)
+from .cached_fetcher import CachedFetcher
+from .http_client import FetchResult, RateLimitedClient
+from .journal import CrawlJournal
+from .rate_limiter import AdaptiveRateLimiter, RateLimiter
 
-__all__ = ["Cache", "RateLimitedClient"]
+__all__ = [
+    "BACKENDS",
+    "DETAILS",
+    "LISTINGS",
+    "MENUS",
+    "PARSED",
+    "AdaptiveRateLimiter",
+    "Cache",
+    "CacheBackend",
+    "CacheEntry",
+    "CacheItem",
+    "CachedFetcher",
+    "CrawlJournal",
+    "FetchResult",
+    "FileBackend",
+    "NamespaceStats",
+    "PackBackend",
+    "PruneResult",
+    "RateLimitedClient",
+    "RateLimiter",
+    "open_cache",
+]
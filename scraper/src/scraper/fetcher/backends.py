@@ -0,0 +1,453 @@
+"""Storage backends for the response cache."""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Protocol
+
+_SAFE_KEY = re.compile(r"[A-Za-z0-9._-]+")
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def decode(body: bytes, encoding: str | None) -> str:
+    """Decode a response body with its declared charset, or as UTF-8."""
+    try:
+        return body.decode(encoding or "utf-8", errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+@dataclass
+class CacheEntry:
+    """A cached response body with the validators needed to revalidate it.
+
+    The body is kept as the bytes the server sent, along with the charset
+    its Content-Type declared, if any.
+    """
+
+    body: bytes
+    etag: str | None = None
+    last_modified: str | None = None
+    fetched_at: float | None = None
+    stored_at: float | None = None
+    encoding: str | None = None
+
+    @property
+    def text(self) -> str:
+        """Get the body decoded."""
+        return decode(self.body, self.encoding)
+
+    def meta(self) -> dict[str, Any]:
+        """Get the entry's validator and charset metadata."""
+        return {
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "fetched_at": self.fetched_at,
+            "encoding": self.encoding,
+        }
+
+    @classmethod
+    def from_meta(cls, body: bytes, meta: dict[str, Any]) -> "CacheEntry":
+        """Build an entry from a body and its stored metadata."""
+        return cls(
+            body=body,
+            etag=meta.get("etag"),
+            last_modified=meta.get("last_modified"),
+            fetched_at=meta.get("fetched_at"),
+            stored_at=meta.get("stored_at"),
+            # Entries stored before charsets were recorded are UTF-8 text.
+            encoding=meta.get("encoding", "utf-8"),
+        )
+
+
+@dataclass
+class CacheItem:
+    """Bookkeeping for one stored entry, used for stats and eviction."""
+
+    namespace: str
+    key: str
+    size: int
+    stored_at: float | None
+    accessed_at: float
+
+
+class CacheBackend(Protocol):
+    """Where cache entries are stored."""
+
+    def get(self, namespace: str, key: str) -> CacheEntry | None: ...
+
+    def put(self, namespace: str, key: str, entry: CacheEntry) -> None: ...
+
+    def touch(
+        self, namespace: str, key: str, etag: str | None, last_modified: str | None
+    ) -> None: ...
+
+    def contains(self, namespace: str, key: str) -> bool: ...
+
+    def delete(self, namespace: str, key: str) -> None: ...
+
+    def items(self) -> list[CacheItem]: ...
+
+    def disk_usage(self) -> int: ...
+
+    def compact(self) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class FileBackend:
+    """One loose ``.html`` file per entry, with a ``.meta.json`` sidecar.
+
+    Bodies are written exactly as the server sent them; the sidecar holds
+    the validators and the declared charset. UTF-8 bodies without
+    validators, like every entry from before charsets were recorded, have
+    no sidecar.
+
+    Keys that are already safe file names (listing pages, slugs) are stored
+    as-is; anything else is stored under a readable prefix plus a hash of
+    the full key. A file's mtime is when it was stored and its atime, set
+    explicitly on every hit, is when it was last used.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def _path(self, namespace: str, key: str) -> Path:
+        """Get the cache file path for a key."""
+        if _SAFE_KEY.fullmatch(key):
+            name = key
+        else:
+            readable = _UNSAFE_CHARS.sub("_", key.split("://", 1)[-1]).strip("_")[:80]
+            digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+            name = f"{readable}-{digest}"
+        return self.root / namespace / f"{name}.html"
+
+    @staticmethod
+    def _meta_path(path: Path) -> Path:
+        """Get the validator sidecar path for a cached page."""
+        return path.with_suffix(".meta.json")
+
+    def get(self, namespace: str, key: str) -> CacheEntry | None:
+        path = self._path(namespace, key)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        meta_path = self._meta_path(path)
+        meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
+        entry = CacheEntry.from_meta(path.read_bytes(), meta)
+        entry.stored_at = stat.st_mtime
+        os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+        return entry
+
+    def put(self, namespace: str, key: str, entry: CacheEntry) -> None:
+        path = self._path(namespace, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(entry.body)
+        meta_path = self._meta_path(path)
+        if entry.etag or entry.last_modified or entry.encoding != "utf-8":
+            meta_path.write_text(json.dumps(entry.meta()), encoding="utf-8")
+        elif meta_path.exists():
+            meta_path.unlink()
+
+    def touch(self, namespace: str, key: str, etag: str | None, last_modified: str | None) -> None:
+        """Mark an entry as stored now with new validators, leaving its body alone."""
+        path = self._path(namespace, key)
+        if not path.exists():
+            return
+        meta_path = self._meta_path(path)
+        meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
+        meta.update(etag=etag, last_modified=last_modified, fetched_at=time.time())
+        meta.setdefault("encoding", "utf-8")
+        meta_path.write_text(json.dumps(meta), encoding="utf-8")
+        os.utime(path)
+
+    def contains(self, namespace: str, key: str) -> bool:
+        return self._path(namespace, key).exists()
+
+    def delete(self, namespace: str, key: str) -> None:
+        path = self._path(namespace, key)
+        path.unlink(missing_ok=True)
+        self._meta_path(path).unlink(missing_ok=True)
+
+    def items(self) -> list[CacheItem]:
+        # Stored names are safe keys, so they map back to the same paths.
+        items = []
+        for path in self.root.glob("*/*.html"):
+            stat = path.stat()
+            meta_path = self._meta_path(path)
+            size = stat.st_size + (meta_path.stat().st_size if meta_path.exists() else 0)
+            items.append(
+                CacheItem(
+                    namespace=path.parent.name,
+                    key=path.stem,
+                    size=size,
+                    stored_at=stat.st_mtime,
+                    accessed_at=max(stat.st_atime, stat.st_mtime),
+                )
+            )
+        return items
+
+    def disk_usage(self) -> int:
+        return sum(item.size for item in self.items())
+
+    def compact(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+# Pack file layout: a file header, then records of
+#   record header | namespace | key | meta JSON | zlib-compressed body
+_PACK_MAGIC = b"RWBPACK1"
+_RECORD = struct.Struct("<4sHHII")
+_RECORD_MAGIC = b"REC1"
+_INDEX_VERSION = 2
+
+
+@dataclass
+class _Record:
+    """Where a packed entry lives, plus its metadata."""
+
+    offset: int  # of the compressed body
+    length: int  # of the compressed body
+    size: int  # of the whole record
+    meta: dict[str, Any]
+    accessed_at: float
+
+
+class PackBackend:
+    """Compressed records appended to a single pack file.
+
+    An index of (namespace, key) -> record location is loaded once when the
+    backend opens, from the ``.idx`` file written on close. If the pack has
+    grown since the index was written (for example after a crash), only the
+    new tail is scanned. Bodies are read through ``mmap`` and decompressed
+    on demand. Rewriting or deleting a key leaves a dead record behind
+    until ``compact`` rewrites the pack.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.index_path = path.with_name(path.name + ".idx")
+        self._lock = threading.Lock()
+        self._index: dict[tuple[str, str], _Record] = {}
+        self._map: mmap.mmap | None = None
+        self._dirty = False
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not path.exists() or path.stat().st_size == 0:
+            path.write_bytes(_PACK_MAGIC)
+        self._file = open(path, "r+b")
+        if self._file.read(len(_PACK_MAGIC)) != _PACK_MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is not a cache pack file")
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """Load the saved index and scan any records appended after it."""
+        size = os.fstat(self._file.fileno()).st_size
+        scan_from = len(_PACK_MAGIC)
+        if self.index_path.exists():
+            saved = json.loads(self.index_path.read_text(encoding="utf-8"))
+            if saved.get("version") == _INDEX_VERSION and saved["pack_size"] <= size:
+                for namespace, key, *fields in saved["entries"]:
+                    self._index[(namespace, key)] = _Record(*fields)
+                scan_from = saved["pack_size"]
+        if scan_from < size:
+            self._scan(scan_from, size)
+
+    def _scan(self, offset: int, size: int) -> None:
+        """Index records between ``offset`` and ``size``, dropping a torn tail."""
+        self._file.seek(offset)
+        while offset < size:
+            header = self._file.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                break
+            magic, ns_len, key_len, meta_len, data_len = _RECORD.unpack(header)
+            end = offset + _RECORD.size + ns_len + key_len + meta_len + data_len
+            if magic != _RECORD_MAGIC or end > size:
+                break
+            namespace = self._file.read(ns_len).decode("utf-8")
+            key = self._file.read(key_len).decode("utf-8")
+            meta = json.loads(self._file.read(meta_len))
+            self._index[(namespace, key)] = _Record(
+                offset=end - data_len,
+                length=data_len,
+                size=end - offset,
+                meta=meta,
+                accessed_at=meta.get("stored_at") or 0.0,
+            )
+            self._file.seek(end)
+            offset = end
+        if offset < size:
+            self._file.truncate(offset)
+        self._dirty = True
+
+    def _read(self, offset: int, length: int) -> bytes:
+        """Read raw record bytes through the memory map."""
+        with self._lock:
+            if self._map is None or offset + length > len(self._map):
+                if self._map is not None:
+                    self._map.close()
+                self._file.flush()
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._map[offset : offset + length]
+
+    @staticmethod
+    def _encode(namespace: str, key: str, meta: dict[str, Any], data: bytes) -> tuple[bytes, int]:
+        """Encode a record, returning it and the offset of its body within it."""
+        ns_bytes = namespace.encode("utf-8")
+        key_bytes = key.encode("utf-8")
+        meta_bytes = json.dumps(meta).encode("utf-8")
+        head = (
+            _RECORD.pack(_RECORD_MAGIC, len(ns_bytes), len(key_bytes), len(meta_bytes), len(data))
+            + ns_bytes
+            + key_bytes
+            + meta_bytes
+        )
+        return head + data, len(head)
+
+    def get(self, namespace: str, key: str) -> CacheEntry | None:
+        record = self._index.get((namespace, key))
+        if record is None:
+            return None
+        body = zlib.decompress(self._read(record.offset, record.length))
+        record.accessed_at = time.time()
+        self._dirty = True
+        return CacheEntry.from_meta(body, record.meta)
+
+    def put(self, namespace: str, key: str, entry: CacheEntry) -> None:
+        now = time.time()
+        meta = {**entry.meta(), "stored_at": now}
+        data = zlib.compress(entry.body)
+        encoded, body_offset = self._encode(namespace, key, meta, data)
+        with self._lock:
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell()
+            self._file.write(encoded)
+            self._index[(namespace, key)] = _Record(
+                offset=offset + body_offset,
+                length=len(data),
+                size=len(encoded),
+                meta=meta,
+                accessed_at=now,
+            )
+            self._dirty = True
+
+    def touch(self, namespace: str, key: str, etag: str | None, last_modified: str | None) -> None:
+        """Mark an entry as stored now with new validators, leaving its body alone.
+
+        Only the index records the change, so if the index is lost the entry
+        goes back to its old validators and is revalidated again.
+        """
+        now = time.time()
+        with self._lock:
+            record = self._index.get((namespace, key))
+            if record is None:
+                return
+            record.meta = {
+                **record.meta,
+                "etag": etag,
+                "last_modified": last_modified,
+                "fetched_at": now,
+                "stored_at": now,
+            }
+            record.accessed_at = now
+            self._dirty = True
+
+    def contains(self, namespace: str, key: str) -> bool:
+        return (namespace, key) in self._index
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            if self._index.pop((namespace, key), None) is not None:
+                self._dirty = True
+
+    def items(self) -> list[CacheItem]:
+        return [
+            CacheItem(
+                namespace=namespace,
+                key=key,
+                size=record.size,
+                stored_at=record.meta.get("stored_at"),
+                accessed_at=record.accessed_at,
+            )
+            for (namespace, key), record in list(self._index.items())
+        ]
+
+    def disk_usage(self) -> int:
+        with self._lock:
+            self._file.flush()
+            return os.fstat(self._file.fileno()).st_size
+
+    def compact(self) -> None:
+        """Rewrite the pack with only live records, reclaiming dead space."""
+        live = len(_PACK_MAGIC) + sum(record.size for record in self._index.values())
+        if self.disk_usage() <= live:
+            return
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        index: dict[tuple[str, str], _Record] = {}
+        with open(tmp_path, "wb") as out:
+            out.write(_PACK_MAGIC)
+            for (namespace, key), record in sorted(
+                self._index.items(), key=lambda item: item[1].offset
+            ):
+                data = self._read(record.offset, record.length)
+                encoded, body_offset = self._encode(namespace, key, record.meta, data)
+                index[(namespace, key)] = _Record(
+                    offset=out.tell() + body_offset,
+                    length=record.length,
+                    size=len(encoded),
+                    meta=record.meta,
+                    accessed_at=record.accessed_at,
+                )
+                out.write(encoded)
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.close()
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, "r+b")
+            self._index = index
+            self._dirty = True
+        self.flush()
+
+    def flush(self) -> None:
+        """Flush appended records and write the index."""
+        with self._lock:
+            self._file.flush()
+            if not self._dirty:
+                return
+            size = os.fstat(self._file.fileno()).st_size
+            entries = [
+                [namespace, key, r.offset, r.length, r.size, r.meta, r.accessed_at]
+                for (namespace, key), r in self._index.items()
+            ]
+            tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+            tmp_path.write_text(
+                json.dumps({"version": _INDEX_VERSION, "pack_size": size, "entries": entries}),
+                encoding="utf-8",
+            )
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.flush()
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.close()
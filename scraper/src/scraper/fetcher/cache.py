@@ -1,63 +1,259 @@
 """HTML caching for debugging and development."""
 
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
 from pathlib import Path
+from types import TracebackType
 
-from scraper.config import DETAILS_CACHE_DIR, LISTINGS_CACHE_DIR
+from scraper.config import (
+    CACHE_COMPACT_DEAD_RATIO,
+    CACHE_DIR,
+    CACHE_MAX_BYTES,
+    CACHE_PACK_FILE,
+    CACHE_TTL,
+)
+from scraper.fetcher.backends import (
+    CacheBackend,
+    CacheEntry,
+    CacheItem,
+    FileBackend,
+    PackBackend,
+)
+
+# Namespaces, one per resource type
+LISTINGS = "listings"
+DETAILS = "details"
+MENUS = "menus"
+PARSED = "parsed"  # memoized parser output, see scraper.parser.memo
+
+BACKENDS = ("files", "pack")
+
+
+@dataclass
+class NamespaceStats:
+    """Entry counts and sizes for one cache namespace."""
+
+    entries: int = 0
+    size: int = 0
+    expired: int = 0
+
+
+@dataclass
+class PruneResult:
+    """What a prune removed."""
+
+    expired: int = 0
+    evicted: int = 0
+    freed: int = 0
 
 
 class Cache:
-    """Cache raw HTML responses to disk."""
+    """Cache raw response bytes, keyed by namespace and key.
+
+    Keys are arbitrary strings, typically a URL. Storage is delegated to a
+    backend: loose files under ``root`` by default, or a ``PackBackend``.
+
+    Entries older than their namespace's TTL are stale: callers refetch
+    them, still using their validators. When the cache grows beyond
+    ``max_bytes``, closing it evicts the least recently used entries.
+    Closing also reclaims the space of overwritten entries once they make
+    up ``compact_ratio`` of the backend's disk usage.
+    """
 
     def __init__(
         self,
-        listings_dir: Path = LISTINGS_CACHE_DIR,
-        details_dir: Path = DETAILS_CACHE_DIR,
+        root: Path = CACHE_DIR,
+        backend: CacheBackend | None = None,
+        ttls: Mapping[str, float | None] = CACHE_TTL,
+        max_bytes: int | None = CACHE_MAX_BYTES,
+        compact_ratio: float = CACHE_COMPACT_DEAD_RATIO,
     ) -> None:
-        self.listings_dir = listings_dir
-        self.details_dir = details_dir
+        self.root = root
+        self.backend = backend if backend is not None else FileBackend(root)
+        self.ttls = ttls
+        self.max_bytes = max_bytes
+        self.compact_ratio = compact_ratio
+
+    def __enter__(self) -> "Cache":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Enforce the size cap, then flush and release the backend."""
+        self.prune(max_bytes=self.max_bytes)
+        self.backend.close()
+
+    def _is_expired(self, namespace: str, stored_at: float | None, now: float) -> bool:
+        """Check whether something stored at ``stored_at`` has outlived its TTL."""
+        ttl = self.ttls.get(namespace)
+        return ttl is not None and stored_at is not None and now - stored_at >= ttl
+
+    def is_fresh(self, namespace: str, entry: CacheEntry) -> bool:
+        """Check whether an entry is still within its namespace's TTL."""
+        return not self._is_expired(namespace, entry.stored_at, time.time())
+
+    def stats(self) -> dict[str, NamespaceStats]:
+        """Count entries, bytes and expired entries per namespace."""
+        now = time.time()
+        stats: dict[str, NamespaceStats] = {}
+        for item in self.backend.items():
+            ns_stats = stats.setdefault(item.namespace, NamespaceStats())
+            ns_stats.entries += 1
+            ns_stats.size += item.size
+            if self._is_expired(item.namespace, item.stored_at, now):
+                ns_stats.expired += 1
+        return stats
+
+    def disk_usage(self) -> int:
+        """Get the bytes the cache occupies on disk."""
+        return self.backend.disk_usage()
+
+    def prune(self, max_bytes: int | None = None, expired: bool = False) -> PruneResult:
+        """Drop expired entries if asked, then evict LRU entries beyond ``max_bytes``.
 
-    def _ensure_dirs(self) -> None:
-        """Create cache directories if they don't exist."""
-        self.listings_dir.mkdir(parents=True, exist_ok=True)
-        self.details_dir.mkdir(parents=True, exist_ok=True)
+        The backend is compacted after anything is removed, or when records
+        left dead by overwrites pass ``compact_ratio`` of its disk usage.
+        """
+        result = PruneResult()
+        items = self.backend.items()
+        if expired:
+            now = time.time()
+            kept: list[CacheItem] = []
+            for item in items:
+                if self._is_expired(item.namespace, item.stored_at, now):
+                    self.backend.delete(item.namespace, item.key)
+                    result.expired += 1
+                    result.freed += item.size
+                else:
+                    kept.append(item)
+            items = kept
+        total = sum(item.size for item in items)
+        if max_bytes is not None:
+            for item in sorted(items, key=lambda item: item.accessed_at):
+                if total <= max_bytes:
+                    break
+                self.backend.delete(item.namespace, item.key)
+                total -= item.size
+                result.evicted += 1
+                result.freed += item.size
+        usage = self.backend.disk_usage()
+        if result.expired or result.evicted or usage - total > usage * self.compact_ratio:
+            self.backend.compact()
+        return result
 
-    def _listing_path(self, page: int) -> Path:
-        """Get the cache file path for a listing page."""
-        return self.listings_dir / f"page_{page}.html"
+    def has(self, namespace: str, key: str) -> bool:
+        """Check if a key is cached."""
+        return self.backend.contains(namespace, key)
 
-    def _detail_path(self, slug: str) -> Path:
-        """Get the cache file path for a detail page."""
-        safe_slug = slug.replace("/", "_")
-        return self.details_dir / f"{safe_slug}.html"
+    def get(self, namespace: str, key: str) -> str | None:
+        """Get a cached body as text, or None if not cached."""
+        entry = self.get_entry(namespace, key)
+        return entry.text if entry else None
+
+    def get_entry(self, namespace: str, key: str) -> CacheEntry | None:
+        """Get a cached body with its validators, or None if not cached."""
+        return self.backend.get(namespace, key)
+
+    def save(
+        self,
+        namespace: str,
+        key: str,
+        body: str | bytes,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        encoding: str | None = None,
+    ) -> None:
+        """Save a body with any validators and charset the server sent.
+
+        Text bodies are stored as UTF-8, and recorded as such so a page's own
+        ``<meta>`` charset doesn't override it.
+        """
+        if isinstance(body, str):
+            body, encoding = body.encode("utf-8"), "utf-8"
+        entry = CacheEntry(body=body, etag=etag, last_modified=last_modified, encoding=encoding)
+        if etag or last_modified:
+            entry.fetched_at = time.time()
+        self.backend.put(namespace, key, entry)
+
+    def refresh(
+        self, namespace: str, key: str, etag: str | None = None, last_modified: str | None = None
+    ) -> None:
+        """Restart a revalidated entry's TTL and update its validators, keeping its body."""
+        self.backend.touch(namespace, key, etag, last_modified)
+
+    @staticmethod
+    def listing_key(page: int) -> str:
+        """Get the key for a listing page."""
+        return f"page_{page}"
+
+    @staticmethod
+    def detail_key(slug: str) -> str:
+        """Get the key for a detail page."""
+        return slug.replace("/", "_")
 
     def has_listing(self, page: int) -> bool:
         """Check if a listing page is cached."""
-        return self._listing_path(page).exists()
+        return self.has(LISTINGS, self.listing_key(page))
 
     def has_detail(self, slug: str) -> bool:
         """Check if a detail page is cached."""
-        return self._detail_path(slug).exists()
+        return self.has(DETAILS, self.detail_key(slug))
 
     def get_listing(self, page: int) -> str | None:
         """Get a cached listing page, or None if not cached."""
-        path = self._listing_path(page)
-        if path.exists():
-            return path.read_text(encoding="utf-8")
-        return None
+        return self.get(LISTINGS, self.listing_key(page))
 
     def get_detail(self, slug: str) -> str | None:
         """Get a cached detail page, or None if not cached."""
-        path = self._detail_path(slug)
-        if path.exists():
-            return path.read_text(encoding="utf-8")
-        return None
-
-    def save_listing(self, page: int, html: str) -> None:
-        """Save a listing page to the cache."""
-        self._ensure_dirs()
-        self._listing_path(page).write_text(html, encoding="utf-8")
-
-    def save_detail(self, slug: str, html: str) -> None:
-        """Save a detail page to the cache."""
-        self._ensure_dirs()
-        self._detail_path(slug).write_text(html, encoding="utf-8")
+        return self.get(DETAILS, self.detail_key(slug))
+
+    def get_listing_entry(self, page: int) -> CacheEntry | None:
+        """Get a cached listing page with its validators, or None if not cached."""
+        return self.get_entry(LISTINGS, self.listing_key(page))
+
+    def get_detail_entry(self, slug: str) -> CacheEntry | None:
+        """Get a cached detail page with its validators, or None if not cached."""
+        return self.get_entry(DETAILS, self.detail_key(slug))
+
+    def save_listing(
+        self,
+        page: int,
+        html: str | bytes,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        encoding: str | None = None,
+    ) -> None:
+        """Save a listing page (and any response validators and charset) to the cache."""
+        self.save(LISTINGS, self.listing_key(page), html, etag, last_modified, encoding)
+
+    def save_detail(
+        self,
+        slug: str,
+        html: str | bytes,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        encoding: str | None = None,
+    ) -> None:
+        """Save a detail page (and any response validators and charset) to the cache."""
+        self.save(DETAILS, self.detail_key(slug), html, etag, last_modified, encoding)
+
+
+def open_cache(
+    backend: str = "files",
+    ttls: Mapping[str, float | None] = CACHE_TTL,
+    max_bytes: int | None = CACHE_MAX_BYTES,
+) -> Cache:
+    """Open the default cache location with the named backend."""
+    if backend == "pack":
+        return Cache(backend=PackBackend(CACHE_PACK_FILE), ttls=ttls, max_bytes=max_bytes)
+    if backend == "files":
+        return Cache(ttls=ttls, max_bytes=max_bytes)
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -0,0 +1,70 @@
+"""Fetching pages through the cache."""
+
+from scraper.fetcher.cache import Cache, CacheEntry
+from scraper.fetcher.http_client import FetchResult, RateLimitedClient
+from scraper.fetcher.journal import CrawlJournal
+
+
+class CachedFetcher:
+    """Load pages from the cache or the network according to the cache policy.
+
+    With ``use_cache``, cached pages are trusted until their namespace's TTL
+    runs out; stale pages are refetched with a conditional request. With
+    ``revalidate``, every cached page is confirmed that way first. Pages fetched from
+    the network are written back to the cache in both modes; a page the
+    server reports unchanged only has its TTL and validators refreshed.
+
+    With a ``journal``, every fetched page is cached and journaled, and pages
+    the journal already has as fetched come from the cache whatever its TTL,
+    so a resumed crawl does not fetch them again.
+    """
+
+    def __init__(
+        self,
+        client: RateLimitedClient,
+        cache: Cache,
+        use_cache: bool = False,
+        revalidate: bool = False,
+        journal: CrawlJournal | None = None,
+    ) -> None:
+        self.client = client
+        self.cache = cache
+        self.use_cache = use_cache or revalidate
+        self.revalidate = revalidate
+        self.journal = journal
+
+    def load(self, namespace: str, key: str, url: str) -> FetchResult:
+        """Load a page, consulting the cache if enabled."""
+        journal = self.journal
+        if journal is not None and journal.reached(url, journal.FETCHED):
+            entry = self.cache.get_entry(namespace, key)
+            if entry is not None:
+                return self._cached(entry)
+
+        entry = self.cache.get_entry(namespace, key) if self.use_cache else None
+        if entry is not None and not self.revalidate and self.cache.is_fresh(namespace, entry):
+            return self._cached(entry)
+
+        if journal is not None:
+            journal.mark(url, journal.PENDING)
+        result = self.client.fetch(url, entry)
+        if result.not_modified:
+            self.cache.refresh(namespace, key, result.etag, result.last_modified)
+        elif self.use_cache or journal is not None:
+            self.cache.save(
+                namespace, key, result.content, result.etag, result.last_modified, result.encoding
+            )
+        if journal is not None:
+            journal.mark(url, journal.FETCHED)
+        return result
+
+    @staticmethod
+    def _cached(entry: CacheEntry) -> FetchResult:
+        """Serve a page from the cache."""
+        return FetchResult(
+            content=entry.body,
+            etag=entry.etag,
+            last_modified=entry.last_modified,
+            from_cache=True,
+            encoding=entry.encoding,
+        )
@@ -0,0 +1,78 @@
+"""CLI entry point for inspecting and pruning the HTML cache."""
+
+import argparse
+import re
+import sys
+
+from scraper.config import CACHE_MAX_BYTES
+from scraper.fetcher.cache import BACKENDS, open_cache
+
+_SIZE = re.compile(r"(\d+(?:\.\d+)?)\s*([KMG]?)B?", re.IGNORECASE)
+_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def parse_size(value: str) -> int:
+    """Parse a size such as ``500M`` or ``2G`` into bytes."""
+    match = _SIZE.fullmatch(value.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid size: {value!r}")
+    number, unit = match.groups()
+    return int(float(number) * _UNITS[unit.upper()])
+
+
+def format_size(size: float) -> str:
+    """Format a byte count for humans."""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect and prune the HTML cache")
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="files",
+        help="Cache storage to operate on (default: files)",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Show entries, sizes and expired entries per namespace")
+    prune = commands.add_parser("prune", help="Drop expired entries and enforce the size cap")
+    prune.add_argument(
+        "--max-size",
+        type=parse_size,
+        default=CACHE_MAX_BYTES,
+        help=f"Evict least recently used entries beyond this size, e.g. 500M "
+        f"(default: {format_size(CACHE_MAX_BYTES)})",
+    )
+    prune.add_argument(
+        "--keep-expired",
+        action="store_true",
+        help="Only enforce the size cap; keep expired entries for revalidation",
+    )
+    args = parser.parse_args()
+
+    with open_cache(args.backend, max_bytes=None) as cache:
+        if args.command == "stats":
+            stats = cache.stats()
+            for namespace, ns_stats in sorted(stats.items()):
+                print(
+                    f"{namespace:<12} {ns_stats.entries:>7} entries "
+                    f"{format_size(ns_stats.size):>10}  {ns_stats.expired} expired"
+                )
+            entries = sum(ns_stats.entries for ns_stats in stats.values())
+            print(
+                f"{'total':<12} {entries:>7} entries {format_size(cache.disk_usage()):>10} on disk"
+            )
+        else:
+            result = cache.prune(max_bytes=args.max_size, expired=not args.keep_expired)
+            print(
+                f"Removed {result.expired} expired and {result.evicted} least recently used "
+                f"entries, freed {format_size(result.freed)}"
+            )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
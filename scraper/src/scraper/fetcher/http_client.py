@@ -1,6 +1,10 @@
 """Rate-limited HTTP client with retry logic."""
 
+import re
+import threading
 import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
 from types import TracebackType
 
 import requests
@@ -14,16 +18,85 @@ from scraper.config import (
     REQUEST_TIMEOUT,
     USER_AGENT,
 )
+from scraper.fetcher.backends import decode
+from scraper.fetcher.cache import CacheEntry
+from scraper.fetcher.rate_limiter import RETRY_STATUSES, RateLimiter
+
+_CHARSET = re.compile(r"""charset\s*=\s*["']?([^"';\s]+)""", re.IGNORECASE)
+
+
+def declared_charset(content_type: str | None) -> str | None:
+    """Get the charset a Content-Type header declares, if any."""
+    match = _CHARSET.search(content_type) if content_type else None
+    return match.group(1) if match else None
+
+
+@dataclass
+class FetchResult:
+    """Raw response body, its declared charset and the validators for conditional requests.
+
+    The body stays bytes so that it can be cached and parsed without being
+    decoded; ``text`` decodes it for callers that want a string.
+    """
+
+    content: bytes
+    etag: str | None = None
+    last_modified: str | None = None
+    not_modified: bool = False
+    from_cache: bool = False
+    encoding: str | None = None
+
+    @property
+    def text(self) -> str:
+        """Get the body decoded."""
+        return decode(self.content, self.encoding)
+
+    @property
+    def source(self) -> str:
+        """Describe where the body came from, for progress logs."""
+        if self.from_cache:
+            return "cached"
+        if self.not_modified:
+            return "revalidated"
+        return "fetched"
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
 
 
 class RateLimitedClient:
-    """HTTP client with rate limiting and automatic retries."""
+    """HTTP client with rate limiting and automatic retries.
+
+    With an adaptive rate limiter, retries on 429/5xx move out of urllib3
+    and into the client so that every response, including Retry-After,
+    feeds the limiter.
+    """
 
-    def __init__(self, delay: float = DEFAULT_DELAY, timeout: float = REQUEST_TIMEOUT) -> None:
+    def __init__(
+        self,
+        delay: float = DEFAULT_DELAY,
+        timeout: float = REQUEST_TIMEOUT,
+        rate_limiter: RateLimiter | None = None,
+        pool_size: int | None = None,
+    ) -> None:
         self.delay = delay
         self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.pool_size = pool_size
         self._last_request_time: float | None = None
         self._session: requests.Session | None = None
+        self._session_lock = threading.Lock()
 
     def _create_session(self) -> requests.Session:
         """Create a session with retry configuration."""
@@ -32,11 +105,19 @@ class RateLimitedClient:
         retry_strategy = Retry(
             total=MAX_RETRIES,
             backoff_factor=BACKOFF_FACTOR,
-            status_forcelist=[429, 500, 502, 503, 504],
+            status_forcelist=[] if self._limiter_handles_retries else sorted(RETRY_STATUSES),
             allowed_methods=["GET"],
+            respect_retry_after_header=not self._limiter_handles_retries,
         )
 
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        if self.pool_size:
+            adapter = HTTPAdapter(
+                max_retries=retry_strategy,
+                pool_connections=self.pool_size,
+                pool_maxsize=self.pool_size,
+            )
+        else:
+            adapter = HTTPAdapter(max_retries=retry_strategy)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
 
@@ -50,31 +131,98 @@ class RateLimitedClient:
 
         return session
 
+    @property
+    def _limiter_handles_retries(self) -> bool:
+        """Whether status-code retries are left to the rate limiter."""
+        return self.rate_limiter is not None and self.rate_limiter.handles_retries
+
     @property
     def session(self) -> requests.Session:
         """Get or create the session."""
-        if self._session is None:
-            self._session = self._create_session()
-        return self._session
+        with self._session_lock:
+            if self._session is None:
+                self._session = self._create_session()
+            return self._session
 
     def _wait_for_rate_limit(self) -> None:
         """Wait if necessary to respect rate limiting."""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+            return
+
         if self._last_request_time is not None:
             elapsed = time.time() - self._last_request_time
             if elapsed < self.delay:
                 time.sleep(self.delay - elapsed)
 
-    def get(self, url: str) -> str:
+    def get(self, url: str, cached: CacheEntry | None = None) -> str:
         """Fetch a URL and return the response text."""
+        return self.fetch(url, cached).text
+
+    def fetch(self, url: str, cached: CacheEntry | None = None) -> FetchResult:
+        """Fetch a URL, revalidating against ``cached`` when it has validators.
+
+        A 304 Not Modified response is answered with the cached body; with
+        nothing cached, it raises ``requests.HTTPError`` rather than
+        passing off its empty body as the page.
+        """
+        headers: dict[str, str] = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        attempts = MAX_RETRIES + 1 if self._limiter_handles_retries else 1
+        for attempt in range(attempts):
+            response = self._send(url, headers)
+            if response.status_code not in RETRY_STATUSES or attempt == attempts - 1:
+                break
+
+        if response.status_code == 304:
+            if cached is None:
+                raise requests.HTTPError(
+                    f"304 Not Modified for {url} with no cached copy", response=response
+                )
+            return FetchResult(
+                content=cached.body,
+                etag=response.headers.get("ETag", cached.etag),
+                last_modified=response.headers.get("Last-Modified", cached.last_modified),
+                not_modified=True,
+                encoding=cached.encoding,
+            )
+        response.raise_for_status()
+        # response.content skips requests' decoding, and its charset
+        # detection when the server declares none.
+        return FetchResult(
+            content=response.content,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            encoding=declared_charset(response.headers.get("Content-Type")),
+        )
+
+    def _send(self, url: str, headers: dict[str, str]) -> requests.Response:
+        """Send one rate-limited GET and report its outcome to the limiter."""
         self._wait_for_rate_limit()
 
+        start = time.monotonic()
         try:
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
-            return response.text
+            response = self.session.get(url, timeout=self.timeout, headers=headers or None)
+        except requests.RequestException:
+            if self.rate_limiter is not None:
+                self.rate_limiter.record(None, time.monotonic() - start)
+            raise
         finally:
             self._last_request_time = time.time()
 
+        if self.rate_limiter is not None:
+            self.rate_limiter.record(
+                response.status_code,
+                time.monotonic() - start,
+                parse_retry_after(response.headers.get("Retry-After")),
+            )
+        return response
+
     def __enter__(self) -> "RateLimitedClient":
         return self
 
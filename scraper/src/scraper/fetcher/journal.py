@@ -0,0 +1,135 @@
+"""Append-only record of how far a crawl got with each URL."""
+
+import json
+import threading
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Any
+
+from scraper.config import JOURNAL_FILE, JOURNAL_FLUSH_EVERY, JOURNAL_FLUSH_INTERVAL
+
+
+class CrawlJournal:
+    """Record each URL's state as JSON lines, so a stopped crawl can resume.
+
+    Records are buffered and flushed every ``flush_every`` records or
+    ``flush_interval`` seconds, whichever comes first, and when the journal
+    is closed; used as a context manager, that includes the crawl being
+    interrupted with Ctrl-C. A URL only ever moves forward, so marking it
+    with a state it has already passed writes nothing.
+
+    The first line records the crawl's ``options`` (output path and the
+    like). With ``resume``, the existing journal is replayed and extended,
+    unless it was written for different options, which raises
+    ``ValueError``; otherwise it is started afresh.
+
+    Parsing is not journaled: a resumed crawl reparses fetched pages, and
+    its parse memo answers for those an earlier run already parsed.
+    """
+
+    # URL states, in the order a crawl moves through them.
+    PENDING = "pending"  # requested, not yet fetched
+    FETCHED = "fetched"  # body stored in the cache
+    STATES = (PENDING, FETCHED)
+
+    def __init__(
+        self,
+        path: Path = JOURNAL_FILE,
+        resume: bool = False,
+        options: dict[str, Any] | None = None,
+        flush_every: int = JOURNAL_FLUSH_EVERY,
+        flush_interval: float = JOURNAL_FLUSH_INTERVAL,
+    ) -> None:
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        # Compare options as they read back from JSON, e.g. tuples as lists.
+        self.options: dict[str, Any] = json.loads(json.dumps(options or {}))
+        self.states: dict[str, str] = {}
+        if resume and path.exists() and path.stat().st_size:
+            saved, self.states = self._replay(path)
+            if saved != self.options:
+                raise ValueError(
+                    f"{path} is from a crawl with different options ({saved}), not {self.options}"
+                )
+        self._buffer: list[str] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file: IO[str] | None = open(path, "a" if resume else "w", encoding="utf-8")
+        if not self._file.tell():
+            self._file.write(json.dumps({"options": self.options}) + "\n")
+            self._file.flush()
+        elif not path.read_bytes().endswith(b"\n"):
+            self._file.write("\n")  # don't append to a line cut short
+
+    def __enter__(self) -> "CrawlJournal":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    @classmethod
+    def _replay(cls, path: Path) -> tuple[dict[str, Any] | None, dict[str, str]]:
+        """Read a journal file's options and each URL's furthest state."""
+        options: dict[str, Any] | None = None
+        states: dict[str, str] = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short when the last run died
+                if "options" in record:
+                    options = record["options"]
+                    continue
+                url, state = record.get("url"), record.get("state")
+                if state in cls.STATES and (
+                    url not in states or cls.STATES.index(state) > cls.STATES.index(states[url])
+                ):
+                    states[url] = state
+        return options, states
+
+    def reached(self, url: str, state: str) -> bool:
+        """Whether ``url`` has got as far as ``state``."""
+        current = self.states.get(url)
+        return current is not None and self.STATES.index(current) >= self.STATES.index(state)
+
+    def mark(self, url: str, state: str) -> None:
+        """Record that ``url`` has reached ``state``."""
+        with self._lock:
+            if self.reached(url, state):
+                return
+            self.states[url] = state
+            self._buffer.append(json.dumps({"url": url, "state": state}) + "\n")
+            if (
+                len(self._buffer) >= self.flush_every
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            ):
+                self._flush()
+
+    def flush(self) -> None:
+        """Write buffered records to disk."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._file is not None and self._buffer:
+            self._file.write("".join(self._buffer))
+            self._file.flush()
+        self._buffer.clear()
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        """Flush and close the journal file."""
+        with self._lock:
+            self._flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,149 @@
+"""Thread-safe request rate limiting."""
+
+import threading
+import time
+from collections.abc import Callable
+
+from scraper.config import (
+    ADAPTIVE_BASELINE_WEIGHT,
+    ADAPTIVE_DECREASE_FACTOR,
+    ADAPTIVE_INCREASE,
+    ADAPTIVE_LATENCY_FACTOR,
+    ADAPTIVE_MAX_RATE,
+    ADAPTIVE_MIN_RATE,
+)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class RateLimiter:
+    """Space requests so that at most ``rate`` of them start per second.
+
+    The limiter hands out start slots under a lock, so it can be shared by
+    any number of threads to enforce one global budget.
+    """
+
+    # Whether the client should leave status-code retries to this limiter.
+    handles_retries = False
+
+    def __init__(
+        self,
+        rate: float | None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next_slot: float | None = None
+
+    @property
+    def interval(self) -> float:
+        """Seconds between consecutive request starts."""
+        if not self.rate or self.rate <= 0:
+            return 0.0
+        return 1.0 / self.rate
+
+    def acquire(self) -> None:
+        """Block until the caller may start its request."""
+        with self._lock:
+            now = self._clock()
+            slot = now if self._next_slot is None else max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+
+        wait = slot - now
+        if wait > 0:
+            self._sleep(wait)
+
+    def record(self, status: int | None, latency: float, retry_after: float | None = None) -> None:
+        """Observe the outcome of a request. The fixed-rate limiter ignores it."""
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """Rate limiter that tunes itself with AIMD feedback.
+
+    Healthy responses raise the rate by ``increase`` requests per second.
+    Throttling (429), server errors (5xx), connection failures and latency
+    well above the baseline cut it by ``decrease_factor``, at most once per
+    cooldown so a burst of failures counts once. The baseline is a slow
+    average of latency, so a sustained shift (say from cheap 304s to full
+    detail pages) becomes the new normal after a few responses instead of
+    holding the rate down for good. A ``Retry-After`` header holds back
+    every request until it has passed.
+    """
+
+    handles_retries = True
+
+    def __init__(
+        self,
+        rate: float,
+        min_rate: float = ADAPTIVE_MIN_RATE,
+        max_rate: float = ADAPTIVE_MAX_RATE,
+        increase: float = ADAPTIVE_INCREASE,
+        decrease_factor: float = ADAPTIVE_DECREASE_FACTOR,
+        latency_factor: float = ADAPTIVE_LATENCY_FACTOR,
+        baseline_weight: float = ADAPTIVE_BASELINE_WEIGHT,
+        report: Callable[[str], None] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        super().__init__(min(max(rate, min_rate), max_rate), clock=clock, sleep=sleep)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.baseline_weight = baseline_weight
+        self._report = report
+        self._reported_rate = self.rate
+        self._latency: float | None = None
+        self._baseline_latency: float | None = None
+        self._last_decrease: float | None = None
+
+    def record(self, status: int | None, latency: float, retry_after: float | None = None) -> None:
+        """Adjust the rate from the outcome of a request."""
+        with self._lock:
+            now = self._clock()
+            self._latency = (
+                latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+            )
+            self._baseline_latency = (
+                latency
+                if self._baseline_latency is None
+                else (1 - self.baseline_weight) * self._baseline_latency
+                + self.baseline_weight * latency
+            )
+
+            if retry_after:
+                resume = now + retry_after
+                if self._next_slot is None or self._next_slot < resume:
+                    self._next_slot = resume
+
+            failed = status is None or status in RETRY_STATUSES
+            slow = self._latency > self.latency_factor * self._baseline_latency
+            if failed or slow:
+                self._decrease(now)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+            self._maybe_report(status, retry_after)
+
+    def _decrease(self, now: float) -> None:
+        """Cut the rate, once per cooldown period."""
+        cooldown = max(self.interval, self._latency or 0.0)
+        if self._last_decrease is not None and now - self._last_decrease < cooldown:
+            return
+        self._last_decrease = now
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+
+    def _maybe_report(self, status: int | None, retry_after: float | None) -> None:
+        """Report the rate when it has moved noticeably since the last report."""
+        if self._report is None:
+            return
+        if retry_after:
+            self._report(f"  Server asked to retry after {retry_after:.1f}s (status {status})")
+        change = abs(self.rate - self._reported_rate)
+        if change >= 0.1 * self._reported_rate:
+            self._reported_rate = self.rate
+            self._report(f"  Request rate now {self.rate:.2f}/s")
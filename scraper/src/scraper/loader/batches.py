@@ -0,0 +1,179 @@
+"""Byte-budgeted batch upserts, sent concurrently with per-batch retries."""
+
+import json
+import random
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from scraper.config import (
+    BACKOFF_FACTOR,
+    UPSERT_BATCH_BYTES,
+    UPSERT_RETRIES,
+    UPSERT_ROW_ERROR_STATUSES,
+    UPSERT_WORKERS,
+)
+
+Row = dict[str, Any]
+
+# SQLSTATE classes that blame the data sent: data exceptions and integrity
+# constraint violations.
+_ROW_ERROR_CLASSES = ("22", "23")
+
+
+def is_row_error(error: Exception) -> bool:
+    """Whether an upsert error blames the rows sent rather than the service.
+
+    HTTP errors carry a ``response`` with a status; PostgREST errors carry
+    the database's SQLSTATE as ``code``, or the HTTP status when the error
+    body was not JSON.
+    """
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    code = getattr(error, "code", None)
+    if status is None and isinstance(code, str) and len(code) == 3 and code.isdigit():
+        status = int(code)
+    if status is not None:
+        return status in UPSERT_ROW_ERROR_STATUSES
+    return isinstance(code, str) and code[:2] in _ROW_ERROR_CLASSES
+
+
+def byte_batches(rows: list[Row], max_bytes: int = UPSERT_BATCH_BYTES) -> Iterator[list[Row]]:
+    """Group rows into batches whose JSON array stays within ``max_bytes``.
+
+    A row bigger than the budget on its own gets a batch to itself.
+    """
+    batch: list[Row] = []
+    size = 2  # the brackets
+    for row in rows:
+        row_size = len(json.dumps(row, ensure_ascii=False, separators=(",", ":")).encode()) + 1
+        if batch and size + row_size > max_bytes:
+            yield batch
+            batch, size = [], 2
+        batch.append(row)
+        size += row_size
+    if batch:
+        yield batch
+
+
+@dataclass
+class FailedRow:
+    """A row that still failed once isolated in a batch of its own."""
+
+    row: Row
+    error: Exception
+
+
+@dataclass
+class UpsertReport:
+    """What a batched upsert sent."""
+
+    upserted: list[Row] = field(default_factory=list)
+    failed: list[FailedRow] = field(default_factory=list)
+
+
+class UpsertAborted(Exception):
+    """A batch failed for a reason other than its rows, so the upsert stopped.
+
+    ``report`` holds the rows sent before it stopped.
+    """
+
+    def __init__(self, error: Exception, report: UpsertReport) -> None:
+        super().__init__(f"Upsert aborted: {error}")
+        self.error = error
+        self.report = report
+
+
+class BatchUpserter:
+    """Send rows in byte-budgeted batches from a pool of workers.
+
+    ``send`` upserts one batch and raises on failure. When ``row_error``
+    says the rows are to blame, the batch is split in half and each half
+    tried the same way, so one bad row ends up alone in
+    ``UpsertReport.failed`` while every other row is upserted. Any other
+    failure (connection errors, 5xx, 401/403) is retried with jittered
+    exponential backoff; when retries run out, no more batches are sent and
+    ``upsert`` raises ``UpsertAborted``.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[list[Row]], Any],
+        *,
+        max_bytes: int = UPSERT_BATCH_BYTES,
+        workers: int = UPSERT_WORKERS,
+        retries: int = UPSERT_RETRIES,
+        backoff: float = BACKOFF_FACTOR,
+        sleep: Callable[[float], None] = time.sleep,
+        on_batch: Callable[[list[Row]], None] | None = None,
+        row_error: Callable[[Exception], bool] = is_row_error,
+    ) -> None:
+        self.send = send
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self._sleep = sleep
+        self.on_batch = on_batch
+        self.row_error = row_error
+        self._lock = threading.Lock()
+        self._aborted = threading.Event()
+
+    def upsert(self, rows: list[Row]) -> UpsertReport:
+        """Upsert every row, returning which were sent and which failed."""
+        report = UpsertReport()
+        self._aborted.clear()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [
+                pool.submit(self._upsert_batch, batch, report)
+                for batch in byte_batches(rows, self.max_bytes)
+            ]
+            errors = [future.exception() for future in futures]
+        for error in errors:
+            if isinstance(error, UpsertAborted):
+                raise UpsertAborted(error.error, report) from error.error
+            if error is not None:
+                raise error
+        return report
+
+    def _upsert_batch(self, batch: list[Row], report: UpsertReport) -> None:
+        """Send a batch, bisecting it on row errors and aborting on any other."""
+        if self._aborted.is_set():
+            return
+        error = self._send_with_retries(batch)
+        if error is not None and not self.row_error(error):
+            self._aborted.set()
+            raise UpsertAborted(error, report)
+        if error is None:
+            with self._lock:
+                report.upserted.extend(batch)
+                if self.on_batch is not None:
+                    self.on_batch(batch)
+        elif len(batch) == 1:
+            with self._lock:
+                report.failed.append(FailedRow(batch[0], error))
+        else:
+            middle = len(batch) // 2
+            self._upsert_batch(batch[:middle], report)
+            self._upsert_batch(batch[middle:], report)
+
+    def _send_with_retries(self, batch: list[Row]) -> Exception | None:
+        """Send a batch, returning the error if it failed.
+
+        Row errors are returned at once, since sending the same rows again
+        fails the same way; other errors are retried first.
+        """
+        error: Exception | None = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+            try:
+                self.send(batch)
+                return None
+            except Exception as e:
+                error = e
+                if self.row_error(e):
+                    break
+        return error
@@ -2,9 +2,15 @@
 
 import argparse
 import json
+import os
 import sys
 from pathlib import Path
 
+from dotenv import load_dotenv
+
+from scraper.config import PROJECT_ROOT
+from scraper.loader.batches import UpsertAborted
+from scraper.loader.manifest import LoadManifest
 from scraper.loader.transform import load_restaurants, transform_all
 
 
@@ -16,14 +22,19 @@ def main() -> None:
     parser.add_argument(
         "--dry-run",
         action="store_true",
-        help="Transform and print sample rows without writing to DB",
+        help="Print which rows are new or changed since the last load, without writing to DB",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Upsert every row, not just those changed since the last load",
     )
     parser.add_argument(
         "-i",
         "--input",
         type=Path,
         default=None,
-        help="Input JSON file (default: data/restaurants.json)",
+        help="Input JSON or NDJSON file (default: data/restaurants.json)",
     )
     args = parser.parse_args()
 
@@ -36,20 +47,58 @@ def main() -> None:
     if args.verbose:
         print(f"Transformed {len(rows)} restaurants")
 
+    # The manifest is per Supabase project, so dry runs need the target too.
+    load_dotenv(PROJECT_ROOT / ".env.local")
+    manifest = LoadManifest(os.environ.get("NEXT_PUBLIC_SUPABASE_URL", ""))
+    diff = manifest.diff(rows)
+    pending = rows if args.full else diff.rows
+
     if args.dry_run:
-        print(f"\n--- Dry run: showing first 3 of {len(rows)} rows ---\n")
-        for row in rows[:3]:
-            print(json.dumps(row, indent=2))
-        print(f"\n--- {len(rows)} total rows would be upserted ---")
+        print(
+            f"\n--- Dry run: {len(diff.inserted)} new, {len(diff.changed)} changed, "
+            f"{diff.unchanged} unchanged ---\n"
+        )
+        for row in diff.inserted:
+            print(f"+ {row['slug']}")
+        for row in diff.changed:
+            print(f"~ {row['slug']}")
+        for slug in diff.removed:
+            print(f"- {slug} (not in input; left in the table)")
+        if args.verbose:
+            for row in pending[:3]:
+                print(json.dumps(row, indent=2))
+        print(f"\n--- {len(pending)} total rows would be upserted ---")
         sys.exit(0)
 
+    if args.verbose:
+        print(f"{len(diff.inserted)} new, {len(diff.changed)} changed, {diff.unchanged} unchanged")
+    if not pending:
+        if args.verbose:
+            print("Nothing to upsert.")
+        return
+
     from scraper.loader.supabase_loader import get_supabase_client, upsert_restaurants
 
     if args.verbose:
         print("Connecting to Supabase...")
 
     client = get_supabase_client()
-    count = upsert_restaurants(client, rows, verbose=args.verbose)
+    try:
+        report = upsert_restaurants(client, pending, verbose=args.verbose)
+    except UpsertAborted as e:
+        manifest.record(e.report.upserted)
+        manifest.save()
+        print(
+            f"{e} ({len(e.report.upserted)} of {len(pending)} rows were upserted first)",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    manifest.record(report.upserted)
+    manifest.save()
 
     if args.verbose:
-        print(f"Done! Upserted {count} restaurants.")
+        print(f"Done! Upserted {len(report.upserted)} restaurants.")
+    if report.failed:
+        for failed in report.failed:
+            print(f"Failed to upsert {failed.row['slug']}: {failed.error}", file=sys.stderr)
+        sys.exit(1)
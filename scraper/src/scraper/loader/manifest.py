@@ -0,0 +1,87 @@
+"""Content hashes of loaded rows, so unchanged rows are not sent again."""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from scraper.config import LOAD_MANIFEST_FILE
+
+
+def row_hash(row: dict[str, Any]) -> str:
+    """Hash a database row's content, independent of key order."""
+    data = json.dumps(row, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class RowDiff:
+    """How a set of rows differs from the last load."""
+
+    inserted: list[dict[str, Any]] = field(default_factory=list)
+    changed: list[dict[str, Any]] = field(default_factory=list)
+    unchanged: int = 0
+    removed: list[str] = field(default_factory=list)  # slugs loaded before, not in the input
+
+    @property
+    def rows(self) -> list[dict[str, Any]]:
+        """The rows that need upserting."""
+        return self.inserted + self.changed
+
+
+class LoadManifest:
+    """The content hash of every row last upserted to a target, by slug.
+
+    ``diff`` compares transformed rows against it; ``record`` and ``save``
+    update it once rows are upserted. The manifest only knows what this
+    machine loaded, so ``--full`` resends everything when the table may
+    have changed some other way.
+
+    One file holds a manifest per ``target`` (the Supabase project URL), so
+    loading into one project never hides rows from another. A manifest
+    written before targets were recorded is ignored, and its rows are sent
+    again.
+    """
+
+    def __init__(self, target: str, path: Path = LOAD_MANIFEST_FILE) -> None:
+        self.target = target.rstrip("/")
+        self.path = path
+        self.targets: dict[str, dict[str, str]] = {}
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.targets = {
+                name: hashes for name, hashes in data.items() if isinstance(hashes, dict)
+            }
+        self.hashes = self.targets.setdefault(self.target, {})
+
+    def diff(self, rows: list[dict[str, Any]]) -> RowDiff:
+        """Sort rows into inserted, changed and unchanged."""
+        diff = RowDiff()
+        for row in rows:
+            previous = self.hashes.get(row["slug"])
+            if previous is None:
+                diff.inserted.append(row)
+            elif previous != row_hash(row):
+                diff.changed.append(row)
+            else:
+                diff.unchanged += 1
+        slugs = {row["slug"] for row in rows}
+        diff.removed = sorted(slug for slug in self.hashes if slug not in slugs)
+        return diff
+
+    def record(self, rows: list[dict[str, Any]]) -> None:
+        """Note rows as upserted."""
+        for row in rows:
+            self.hashes[row["slug"]] = row_hash(row)
+
+    def save(self) -> Path:
+        """Write the manifest."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        partial_path = self.path.with_name(self.path.name + ".partial")
+        with open(partial_path, "w", encoding="utf-8") as f:
+            json.dump(self.targets, f, sort_keys=True, indent=0)
+        os.replace(partial_path, self.path)
+        return self.path
@@ -1,18 +1,22 @@
 """Supabase client and batched upsert logic."""
 
 import os
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from dotenv import load_dotenv
-from supabase import Client, create_client
 
 from scraper.config import PROJECT_ROOT
+from scraper.loader.batches import BatchUpserter, UpsertReport
 
-BATCH_SIZE = 50
+if TYPE_CHECKING:
+    from supabase import Client
 
 
-def get_supabase_client() -> Client:
+def get_supabase_client() -> "Client":
     """Create a Supabase client using service role key from .env.local."""
+    # Imported here so upserts can be driven by any client with the same API.
+    from supabase import create_client
+
     load_dotenv(PROJECT_ROOT / ".env.local")
 
     required_vars = ["NEXT_PUBLIC_SUPABASE_URL", "SUPABASE_SERVICE_ROLE_KEY"]
@@ -30,17 +34,25 @@ def get_supabase_client() -> Client:
 
 
 def upsert_restaurants(
-    client: Client,
+    client: "Client",
     rows: list[dict[str, Any]],
     *,
     verbose: bool = False,
-) -> int:
-    """Upsert restaurant rows in batches. Returns total upserted count."""
+) -> UpsertReport:
+    """Upsert restaurant rows in concurrent, byte-budgeted batches.
+
+    Raises ``UpsertAborted`` when Supabase fails for reasons other than the
+    rows sent.
+    """
     total = 0
-    for i in range(0, len(rows), BATCH_SIZE):
-        batch = rows[i : i + BATCH_SIZE]
-        client.table("restaurants").upsert(batch, on_conflict="slug").execute()
+
+    def progress(batch: list[dict[str, Any]]) -> None:
+        nonlocal total
         total += len(batch)
         if verbose:
             print(f"  Upserted {total}/{len(rows)} restaurants...")
-    return total
+
+    def send(batch: list[dict[str, Any]]) -> None:
+        client.table("restaurants").upsert(batch, on_conflict="slug").execute()
+
+    return BatchUpserter(send, on_batch=progress).upsert(rows)
@@ -1,23 +1,23 @@
 """Pure data transformation from scraped JSON to database rows."""
 
-import json
 from pathlib import Path
 from typing import Any
 
 from scraper.config import OUTPUT_FILE
+from scraper.storage import read_output
 
 
 def load_restaurants(input_file: Path | None = None) -> list[dict[str, Any]]:
-    """Load restaurant JSON from disk."""
-    path = input_file or OUTPUT_FILE
-    with open(path, encoding="utf-8") as f:
-        return json.load(f)
+    """Load restaurant JSON from disk, as a JSON array or NDJSON (one per line)."""
+    return read_output(input_file or OUTPUT_FILE)
 
 
 def transform_restaurant(raw: dict[str, Any]) -> dict[str, Any]:
     """Transform a single restaurant dict into a database row."""
-    cuisine_str = raw.get("cuisine")
-    cuisine = [c.strip() for c in cuisine_str.split(",")] if cuisine_str else None
+    cuisine = raw.get("cuisine")
+    if isinstance(cuisine, str):  # written before cuisines were a list
+        cuisine = [c.strip() for c in cuisine.split(",")] if cuisine else None
+    cuisine = cuisine or None
 
     pricing = raw.get("pricing") or {}
     lunch_price = pricing.get("lunch")
@@ -0,0 +1,9 @@
+"""Progress logging shared by the command-line tools."""
+
+import sys
+
+
+def log(message: str, verbose: bool = True) -> None:
+    """Print a log message if verbose is enabled."""
+    if verbose:
+        print(message, file=sys.stderr)
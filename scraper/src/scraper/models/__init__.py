@@ -9,8 +9,12 @@ from .restaurant import (
     Pricing,
     Restaurant,
 )
+from .vocabulary import CUISINES, FEATURES, NEIGHBORHOODS, Vocabulary
 
 __all__ = [
+    "CUISINES",
+    "FEATURES",
+    "NEIGHBORHOODS",
     "Availability",
     "Coordinates",
     "Course",
@@ -18,4 +22,5 @@ __all__ = [
     "Menu",
     "Pricing",
     "Restaurant",
+    "Vocabulary",
 ]
@@ -1,10 +1,16 @@
-"""Restaurant data models."""
+"""Restaurant data models.
+
+The models are slotted: a crawl holds every restaurant in memory until it is
+written, and slots keep each object small and attribute access fast.
+"""
 
 from dataclasses import dataclass, field
 from typing import Any
 
+from scraper.models.vocabulary import CUISINES, FEATURES, NEIGHBORHOODS
+
 
-@dataclass
+@dataclass(slots=True)
 class Coordinates:
     """Geographic coordinates."""
 
@@ -14,8 +20,12 @@ class Coordinates:
     def to_dict(self) -> dict[str, float]:
         return {"latitude": self.latitude, "longitude": self.longitude}
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Coordinates":
+        return cls(latitude=data["latitude"], longitude=data["longitude"])
+
 
-@dataclass
+@dataclass(slots=True)
 class Availability:
     """Meal availability flags."""
 
@@ -26,8 +36,12 @@ class Availability:
     def to_dict(self) -> dict[str, bool]:
         return {"lunch": self.lunch, "dinner": self.dinner, "brunch": self.brunch}
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Availability":
+        return cls(**data)
 
-@dataclass
+
+@dataclass(slots=True)
 class Pricing:
     """Price tier information."""
 
@@ -35,11 +49,25 @@ class Pricing:
     dinner: int | None = None
     brunch: int | None = None
 
+    def for_meal(self, meal_type: str) -> int | None:
+        """Return the price for a meal type, or None if unknown."""
+        if meal_type == "lunch":
+            return self.lunch
+        if meal_type == "dinner":
+            return self.dinner
+        if meal_type == "brunch":
+            return self.brunch
+        return None
+
     def to_dict(self) -> dict[str, int | None]:
         return {"lunch": self.lunch, "dinner": self.dinner, "brunch": self.brunch}
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Pricing":
+        return cls(**data)
 
-@dataclass
+
+@dataclass(slots=True)
 class Course:
     """A single course in a menu."""
 
@@ -49,8 +77,12 @@ class Course:
     def to_dict(self) -> dict[str, Any]:
         return {"name": self.name, "options": self.options}
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Course":
+        return cls(name=data["name"], options=list(data["options"]))
+
 
-@dataclass
+@dataclass(slots=True)
 class MealMenu:
     """Menu for a specific meal (lunch, dinner, brunch)."""
 
@@ -65,8 +97,16 @@ class MealMenu:
             "courses": [c.to_dict() for c in self.courses],
         }
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "MealMenu":
+        return cls(
+            meal_type=data["meal_type"],
+            price=data["price"],
+            courses=[Course.from_dict(c) for c in data["courses"]],
+        )
+
 
-@dataclass
+@dataclass(slots=True)
 class Menu:
     """Complete menu with all meal types."""
 
@@ -75,14 +115,18 @@ class Menu:
     def to_dict(self) -> dict[str, Any]:
         return {"menus": [m.to_dict() for m in self.menus]}
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Menu":
+        return cls(menus=[MealMenu.from_dict(m) for m in data["menus"]])
 
-@dataclass
+
+@dataclass(slots=True)
 class Restaurant:
     """Restaurant data model."""
 
     slug: str
     name: str
-    cuisine: str | None = None
+    cuisine: list[str] = field(default_factory=list)
     neighborhood: str | None = None
     address: str | None = None
     phone: str | None = None
@@ -94,6 +138,9 @@ class Restaurant:
     menu: Menu | None = None
     coordinates: Coordinates | None = None
     features: list[str] = field(default_factory=list)
+    # Menu fragments found on the detail page and not fetched yet, by meal type.
+    # Crawl state rather than restaurant data, so not serialized or compared.
+    menu_urls: dict[str, str] = field(default_factory=dict, repr=False, compare=False)
 
     def to_dict(self) -> dict[str, Any]:
         result: dict[str, Any] = {
@@ -115,3 +162,29 @@ class Restaurant:
         if self.coordinates:
             result["coordinates"] = self.coordinates.to_dict()
         return result
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Restaurant":
+        """Rebuild a restaurant from ``to_dict`` output."""
+        cuisine = data.get("cuisine") or []
+        if isinstance(cuisine, str):  # written before cuisines were a list
+            cuisine = [c.strip() for c in cuisine.split(",")]
+        neighborhood = data.get("neighborhood")
+        return cls(
+            slug=data["slug"],
+            name=data["name"],
+            cuisine=[CUISINES.intern(c) for c in cuisine],
+            neighborhood=NEIGHBORHOODS.intern(neighborhood) if neighborhood else neighborhood,
+            address=data.get("address"),
+            phone=data.get("phone"),
+            website=data.get("website"),
+            image_url=data.get("image_url"),
+            detail_url=data.get("detail_url"),
+            availability=Availability.from_dict(data.get("availability") or {}),
+            pricing=Pricing.from_dict(data.get("pricing") or {}),
+            menu=Menu.from_dict(data["menu"]) if data.get("menu") else None,
+            coordinates=(
+                Coordinates.from_dict(data["coordinates"]) if data.get("coordinates") else None
+            ),
+            features=[FEATURES.intern(f) for f in data.get("features") or []],
+        )
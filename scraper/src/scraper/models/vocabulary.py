@@ -0,0 +1,51 @@
+"""Interned category terms (cuisines, neighborhoods, features)."""
+
+import threading
+from collections.abc import Iterable
+
+
+class Vocabulary:
+    """The distinct terms of one category, each stored once and numbered.
+
+    ``intern`` returns the vocabulary's own copy of a term, so every record
+    with that term shares one string. ``id`` numbers terms in the order they
+    are first seen. Adding terms is locked, so crawler threads can share a
+    vocabulary.
+    """
+
+    __slots__ = ("terms", "_ids", "_lock")
+
+    def __init__(self, terms: Iterable[str] = ()) -> None:
+        self.terms: list[str] = []
+        self._ids: dict[str, int] = {}
+        self._lock = threading.Lock()
+        for term in terms:
+            self.id(term)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def id(self, term: str) -> int:
+        """Get a term's number, adding it if it is new."""
+        found = self._ids.get(term)
+        if found is None:
+            with self._lock:
+                found = self._ids.get(term)
+                if found is None:
+                    found = self._ids[term] = len(self.terms)
+                    self.terms.append(term)
+        return found
+
+    def find(self, term: str) -> int | None:
+        """Get a term's number, or None if it is not in the vocabulary."""
+        return self._ids.get(term)
+
+    def intern(self, term: str) -> str:
+        """Get the shared copy of a term."""
+        return self.terms[self.id(term)]
+
+
+# Shared by the parsers, so repeated terms cost one string per process.
+CUISINES = Vocabulary()
+NEIGHBORHOODS = Vocabulary()
+FEATURES = Vocabulary()
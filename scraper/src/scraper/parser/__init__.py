@@ -1,6 +1,23 @@
 """HTML parsing utilities."""
 
-from .detail import DetailParser
-from .listing import ListingParser
+from .detail import DETAIL_SPEC, DetailParser
+from .listing import LISTING_SPEC, ListingPage, ListingParser
+from .listing_lxml import LxmlListingParser
+from .memo import ParseMemo, parser_version
+from .spec import Field, RuleStats, Search, Select, Spec
 
-__all__ = ["DetailParser", "ListingParser"]
+__all__ = [
+    "DETAIL_SPEC",
+    "LISTING_SPEC",
+    "DetailParser",
+    "Field",
+    "ListingPage",
+    "ListingParser",
+    "LxmlListingParser",
+    "ParseMemo",
+    "RuleStats",
+    "Search",
+    "Select",
+    "Spec",
+    "parser_version",
+]
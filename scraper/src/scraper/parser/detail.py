@@ -4,22 +4,145 @@ import re
 
 from bs4 import BeautifulSoup, NavigableString, Tag
 
-from scraper.config import BASE_URL
 from scraper.models import Coordinates, Course, MealMenu, Restaurant
+from scraper.parser.scope import Attrs, Html, Regions, classes, parse_regions, parse_soup
+from scraper.parser.spec import Field, Search, Select, Spec, absolute_url, attr
+
+_MEAL_TYPES = ("lunch", "dinner", "brunch")
+
+# Everything read from inline scripts, matched in a single pass.
+_SCRIPT_PATTERN = re.compile(
+    r'var\s+(?P<meal>lunch|dinner|brunch)MenuURL\s*=\s*"(?P<url>[^"]+)"'
+    r"|lat(?:itude)?[\"']?\s*[:=]\s*(?P<lat>[+-]?\d+\.?\d*)"
+    r"|(?:lng|lon(?:gitude)?)[\"']?\s*[:=]\s*(?P<lng>[+-]?\d+\.?\d*)"
+)
+
+_DETAIL_TAGS = {"a", "address", "img", "script"}
+_DETAIL_CLASSES = {"restAddress", "restaurant-image", "hero-image"}
+_DETAIL_ITEMPROPS = {"address", "telephone"}
+_MAP_ATTRS = ("data-lat", "data-lng", "data-latitude", "data-longitude")
+
+
+def _detail_region(name: str, attrs: Attrs) -> bool:
+    """Keep every element one of the detail extractors can match."""
+    if name in _DETAIL_TAGS or attrs.get("id") == "restaurantDetailsCol":
+        return True
+    if attrs.get("itemprop") in _DETAIL_ITEMPROPS:
+        return True
+    if any(key in attrs for key in _MAP_ATTRS):
+        return True
+    class_value = attrs.get("class", "")
+    return (
+        "address" in class_value
+        or "phone" in class_value
+        or not _DETAIL_CLASSES.isdisjoint(classes(attrs))
+    )
+
+
+_DETAIL_REGIONS = Regions(_detail_region)
+
+
+def _collapse_whitespace(text: str) -> str:
+    """Collapse runs of whitespace to single spaces."""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _phone(elem: Tag) -> str:
+    """Read a phone number from a ``tel:`` link, or from an element's text."""
+    href = elem.get("href", "")
+    if isinstance(href, str) and href.startswith("tel:"):
+        return href.replace("tel:", "").strip()
+    return elem.get_text(strip=True)
+
+
+def _is_official_link(link: Tag) -> bool:
+    """Whether an external link looks like the restaurant's own website."""
+    href = link.get("href", "")
+    if not isinstance(href, str) or "restaurantweek" in href.lower():
+        return False
+    if "bostonchefs.com" in href.lower():
+        return False
+    text = link.get_text(strip=True).lower()
+    return "visit" in text or "website" in text or "official" in text
+
+
+def _image_src(img: Tag) -> str | None:
+    """Read an image's source, or its lazy-loading source."""
+    src = img.get("src") or img.get("data-src")
+    return src if isinstance(src, str) else None
+
+
+def _map_coordinates(elem: Tag) -> Coordinates | None:
+    """Read coordinates from a map element's data attributes."""
+    lat = elem.get("data-lat") or elem.get("data-latitude")
+    lng = elem.get("data-lng") or elem.get("data-longitude")
+    if not (isinstance(lat, str) and isinstance(lng, str) and lat and lng):
+        return None
+    try:
+        return Coordinates(float(lat), float(lng))
+    except ValueError:
+        return None
+
+
+DETAIL_SPEC = Spec(
+    address=Field(
+        Select(
+            "p.restAddress", accept=lambda text: "MA" in text, clean=_collapse_whitespace, each=True
+        ),
+        Select("address"),
+        Select(".address"),
+        Select("[class*='address']"),
+        Select("[itemprop='address']"),
+    ),
+    phone=Field(
+        Select("a[href^='tel:']", read=_phone),
+        Select(".phone", read=_phone),
+        Select("[class*='phone']", read=_phone),
+        Select("[itemprop='telephone']", read=_phone),
+    ),
+    phone_text=Field(Search(r"\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}", group=0)),
+    website=Field(
+        Select(
+            'a.restaurantWebsiteLink, a[class*="website"]',
+            read=attr("href"),
+            accept=lambda href: href.startswith("http"),
+            each=True,
+        ),
+        Select("a[href^='http']", read=attr("href"), where=_is_official_link, each=True),
+    ),
+    image=Field(
+        *(
+            Select(selector, read=_image_src, clean=absolute_url)
+            for selector in [
+                ".restaurant-image img",
+                ".hero-image img",
+                "img.restaurant-photo",
+                "#restaurantDetailsCol img",
+            ]
+        )
+    ),
+    coordinates=Field(
+        Select(
+            "[data-lat][data-lng], [data-latitude][data-longitude]",
+            read=_map_coordinates,
+            each=True,
+        )
+    ),
+)
 
 
 class DetailParser:
     """Parse restaurant detail pages."""
 
-    def parse(self, html: str, restaurant: Restaurant) -> Restaurant:
+    def parse(self, html: Html, restaurant: Restaurant, encoding: str | None = None) -> Restaurant:
         """Parse a detail page and enrich the Restaurant object."""
-        soup = BeautifulSoup(html, "lxml")
+        soup = parse_regions(html, _DETAIL_REGIONS, encoding)
 
         if not restaurant.address:
             restaurant.address = self._extract_address(soup)
 
         if not restaurant.phone:
-            restaurant.phone = self._extract_phone(soup)
+            restaurant.phone = self._extract_phone(soup, html, encoding)
 
         if not restaurant.website:
             restaurant.website = self._extract_website(soup)
@@ -28,41 +151,64 @@ class DetailParser:
             restaurant.image_url = self._extract_image(soup)
 
         coordinates = self._extract_coordinates(soup)
+        menu_urls, script_coordinates = self._scan_scripts(soup, coordinates is None)
+        coordinates = coordinates or script_coordinates
         if coordinates:
             restaurant.coordinates = coordinates
 
-        menu_urls = self._extract_menu_urls(soup, restaurant.slug)
         if menu_urls:
-            restaurant._menu_urls = menu_urls
+            restaurant.menu_urls = menu_urls
 
         return restaurant
 
-    def parse_menu_html(self, html: str, meal_type: str, price: int | None = None) -> MealMenu:
+    def parse_menu_html(
+        self, html: Html, meal_type: str, price: int | None = None, encoding: str | None = None
+    ) -> MealMenu:
         """Parse a menu HTML fragment and return a MealMenu object."""
-        soup = BeautifulSoup(html, "lxml")
+        soup = parse_soup(html, encoding)
         courses = self._extract_courses_from_menu(soup)
         return MealMenu(meal_type=meal_type, price=price, courses=courses)
 
-    def _extract_menu_urls(self, soup: BeautifulSoup, slug: str) -> dict[str, str]:
-        """Extract menu AJAX URLs from the page."""
-        menu_urls: dict[str, str] = {}
-
-        scripts = soup.find_all("script")
-        for script in scripts:
-            if script.string:
-                lunch_match = re.search(r'var\s+lunchMenuURL\s*=\s*"([^"]+)"', script.string)
-                if lunch_match and lunch_match.group(1):
-                    menu_urls["lunch"] = lunch_match.group(1)
+    def _scan_scripts(
+        self, soup: BeautifulSoup, need_coordinates: bool
+    ) -> tuple[dict[str, str], Coordinates | None]:
+        """Extract menu AJAX URLs and coordinates from inline scripts in one pass.
 
-                dinner_match = re.search(r'var\s+dinnerMenuURL\s*=\s*"([^"]+)"', script.string)
-                if dinner_match and dinner_match.group(1):
-                    menu_urls["dinner"] = dinner_match.group(1)
-
-                brunch_match = re.search(r'var\s+brunchMenuURL\s*=\s*"([^"]+)"', script.string)
-                if brunch_match and brunch_match.group(1):
-                    menu_urls["brunch"] = brunch_match.group(1)
+        The first non-empty declaration of each menu URL wins (empty
+        placeholders are skipped), as does the first lat/lng pair found
+        within a single script. Scanning stops as soon as every menu URL is
+        known and coordinates are known (or not needed).
+        """
+        menu_urls: dict[str, str] = {}
+        coordinates: Coordinates | None = None
 
-        return menu_urls
+        for script in soup.find_all("script"):
+            if not script.string:
+                continue
+            lat = lng = None
+            for match in _SCRIPT_PATTERN.finditer(script.string):
+                meal = match.group("meal")
+                if meal:
+                    menu_urls.setdefault(meal, match.group("url"))
+                elif need_coordinates and coordinates is None:
+                    if lat is None and match.group("lat"):
+                        lat = float(match.group("lat"))
+                    elif lng is None and match.group("lng"):
+                        lng = float(match.group("lng"))
+                    if lat is not None and lng is not None:
+                        coordinates = Coordinates(lat, lng)
+
+                if len(menu_urls) == len(_MEAL_TYPES) and (
+                    coordinates is not None or not need_coordinates
+                ):
+                    return self._in_meal_order(menu_urls), coordinates
+
+        return self._in_meal_order(menu_urls), coordinates
+
+    @staticmethod
+    def _in_meal_order(menu_urls: dict[str, str]) -> dict[str, str]:
+        """Order menu URLs lunch, dinner, brunch."""
+        return {meal: menu_urls[meal] for meal in _MEAL_TYPES if meal in menu_urls}
 
     def _extract_courses_from_menu(self, soup: BeautifulSoup) -> list[Course]:
         """Extract courses from a menu HTML fragment."""
@@ -124,107 +270,27 @@ class DetailParser:
 
     def _extract_address(self, soup: BeautifulSoup) -> str | None:
         """Extract restaurant address."""
-        for elem in soup.select("p.restAddress"):
-            text = elem.get_text(strip=True)
-            if text and "MA" in text:
-                clean = re.sub(r"\s+", " ", text).strip()
-                return clean
-
-        for selector in [
-            "address",
-            ".address",
-            "[class*='address']",
-            "[itemprop='address']",
-        ]:
-            elem = soup.select_one(selector)
-            if elem:
-                text = elem.get_text(strip=True)
-                if text:
-                    return text
+        return DETAIL_SPEC["address"].first(soup)
 
-        return None
+    def _extract_phone(self, soup: BeautifulSoup, html: Html, encoding: str | None) -> str | None:
+        """Extract phone number.
 
-    def _extract_phone(self, soup: BeautifulSoup) -> str | None:
-        """Extract phone number."""
-        for selector in [
-            "a[href^='tel:']",
-            ".phone",
-            "[class*='phone']",
-            "[itemprop='telephone']",
-        ]:
-            elem = soup.select_one(selector)
-            if elem:
-                href = elem.get("href", "")
-                if isinstance(href, str) and href.startswith("tel:"):
-                    return href.replace("tel:", "").strip()
-                text = elem.get_text(strip=True)
-                if text:
-                    return text
-
-        text = soup.get_text()
-        match = re.search(r"\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}", text)
-        if match:
-            return match.group(0)
-
-        return None
+        Falls back to searching the whole page's text, which means parsing
+        all of it, only when no phone element is found.
+        """
+        phone = DETAIL_SPEC["phone"].first(soup)
+        if phone is None:
+            phone = DETAIL_SPEC["phone_text"].first(parse_soup(html, encoding).get_text())
+        return phone
 
     def _extract_website(self, soup: BeautifulSoup) -> str | None:
         """Extract restaurant website URL."""
-        for link in soup.select('a.restaurantWebsiteLink, a[class*="website"]'):
-            href = link.get("href")
-            if isinstance(href, str) and href.startswith("http"):
-                return href
-
-        for link in soup.select("a[href^='http']"):
-            href = link.get("href", "")
-            if isinstance(href, str) and "restaurantweek" not in href.lower():
-                if "bostonchefs.com" not in href.lower():
-                    text = link.get_text(strip=True).lower()
-                    if "visit" in text or "website" in text or "official" in text:
-                        return href
-
-        return None
+        return DETAIL_SPEC["website"].first(soup)
 
     def _extract_image(self, soup: BeautifulSoup) -> str | None:
         """Extract main restaurant image."""
-        for selector in [
-            ".restaurant-image img",
-            ".hero-image img",
-            "img.restaurant-photo",
-            "#restaurantDetailsCol img",
-        ]:
-            img = soup.select_one(selector)
-            if img:
-                src = img.get("src") or img.get("data-src")
-                if isinstance(src, str) and src:
-                    return src if src.startswith("http") else f"{BASE_URL}{src}"
-
-        return None
+        return DETAIL_SPEC["image"].first(soup)
 
     def _extract_coordinates(self, soup: BeautifulSoup) -> Coordinates | None:
-        """Extract geographic coordinates if available."""
-        for elem in soup.select("[data-lat][data-lng], [data-latitude][data-longitude]"):
-            lat = elem.get("data-lat") or elem.get("data-latitude")
-            lng = elem.get("data-lng") or elem.get("data-longitude")
-            if lat and lng:
-                try:
-                    return Coordinates(float(lat), float(lng))
-                except ValueError:
-                    pass
-
-        scripts = soup.find_all("script")
-        for script in scripts:
-            if script.string:
-                lat_match = re.search(
-                    r"lat(?:itude)?[\"']?\s*[:=]\s*([+-]?\d+\.?\d*)", script.string
-                )
-                lng_match = re.search(
-                    r"(?:lng|lon(?:gitude)?)[\"']?\s*[:=]\s*([+-]?\d+\.?\d*)", script.string
-                )
-                if lat_match and lng_match:
-                    try:
-                        return Coordinates(float(lat_match.group(1)), float(lng_match.group(1)))
-                    except ValueError:
-                        pass
-
-        return None
+        """Extract geographic coordinates from map element data attributes."""
+        return DETAIL_SPEC["coordinates"].first(soup)
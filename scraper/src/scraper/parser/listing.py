@@ -1,19 +1,138 @@
 """Parser for restaurant listing pages."""
 
 import re
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from urllib.parse import urljoin
 
 from bs4 import BeautifulSoup, Tag
 
 from scraper.config import BASE_URL
-from scraper.models import Availability, Pricing, Restaurant
+from scraper.models import CUISINES, FEATURES, NEIGHBORHOODS, Availability, Pricing, Restaurant
+from scraper.parser.scope import Attrs, Html, Regions, classes, parse_regions
+from scraper.parser.spec import Field, Node, Search, Select, Spec, absolute_url, attr, inside
+
+_TOTAL_PAGES = re.compile(r"page\s+\d+\s+of\s+(\d+)", re.IGNORECASE)
+_PAGE_PARAM = re.compile(r"page=(\d+)")
+
+
+def _listing_region(name: str, attrs: Attrs) -> bool:
+    """Keep restaurant entries and pagination controls."""
+    return not {"restaurantEntry", "paginationControls"}.isdisjoint(classes(attrs))
+
+
+def _pagination_region(name: str, attrs: Attrs) -> bool:
+    """Keep pagination controls."""
+    return "paginationControls" in classes(attrs)
+
+
+_LISTING_REGIONS = Regions(_listing_region)
+_PAGINATION_REGIONS = Regions(_pagination_region)
+
+
+def _is_own_link(link: Node, slug: str) -> bool:
+    """Whether a link points at the entry's own detail page."""
+    return link.get("href") == f"/restaurant/{slug}"
+
+
+def _is_label(text: str) -> bool:
+    """Whether a ``span.restClass`` holds a label rather than a separator."""
+    return bool(text) and text not in [",", "|"]
+
+
+def _icon_label(icon: Node) -> str:
+    """Read a feature icon's alt text, or its title."""
+    label = icon.get("alt") or icon.get("title") or ""
+    return label.lower() if isinstance(label, str) else ""
+
+
+LISTING_SPEC = Spec(
+    name=Field(
+        Select("a[href]", where=_is_own_link),
+        Select("h4", read=inside("a")),
+    ),
+    cuisine=Field(Select('a[href*="/?cuisine="]', read=inside("span.restClass"), accept=_is_label)),
+    neighborhood=Field(
+        Select(
+            'a[href*="/?neighborhood="]', read=inside("span.restClass"), accept=_is_label, each=True
+        )
+    ),
+    address=Field(Select('a[href*="/map/"]', accept=lambda text: "MA" in text, each=True)),
+    image=Field(Select("div.restaurantLogo", read=inside("img", attr("src")), clean=absolute_url)),
+    features=Field(Select("div.restaurantFeatureIcons img", read=_icon_label)),
+    lunch_price=Field(Search(r"Lunch[:\s]*\$(\d+)", convert=int)),
+    dinner_price=Field(Search(r"Dinner[:\s]*\$(\d+)", convert=int)),
+    brunch_price=Field(Search(r"Brunch[:\s]*\$(\d+)", convert=int)),
+)
+FEATURE_KEYWORDS = ["outdoor", "patio", "delivery", "takeout", "to-go"]
+
+
+def read_pricing(text: str) -> Pricing:
+    """Get an entry's prices from its text."""
+    return Pricing(
+        lunch=LISTING_SPEC["lunch_price"].first(text),
+        dinner=LISTING_SPEC["dinner_price"].first(text),
+        brunch=LISTING_SPEC["brunch_price"].first(text),
+    )
+
+
+def add_feature_keywords(features: list[str], lowered: str) -> list[str]:
+    """Add the feature keywords mentioned in an entry's lowercased text."""
+    for keyword in FEATURE_KEYWORDS:
+        if keyword in lowered and keyword not in features:
+            features.append(keyword)
+    return [FEATURES.intern(feature) for feature in features]
+
+
+@dataclass
+class ListingPage:
+    """Everything parsed from one listing page."""
+
+    restaurants: list[Restaurant] = field(default_factory=list)
+    total_pages: int = 1
+    page_urls: list[str] = field(default_factory=list)  # pagination links, absolute
+
+
+def read_pagination(control_texts: Iterable[str], hrefs: Iterable[str]) -> tuple[int, list[str]]:
+    """Get the page count and page links from the pagination controls.
+
+    The "page N of M" text wins; otherwise the highest ``page=`` link does.
+    """
+    total_pages = None
+    for text in control_texts:
+        match = _TOTAL_PAGES.search(text)
+        if match:
+            total_pages = int(match.group(1))
+            break
+
+    max_page = 1
+    page_urls: list[str] = []
+    for href in hrefs:
+        page_match = _PAGE_PARAM.search(href)
+        if not page_match:
+            continue
+        max_page = max(max_page, int(page_match.group(1)))
+        url = urljoin(f"{BASE_URL}/", href)
+        if url not in page_urls:
+            page_urls.append(url)
+
+    return total_pages or max_page, page_urls
 
 
 class ListingParser:
-    """Parse restaurant listing pages."""
+    """Parse restaurant listing pages.
 
-    def parse(self, html: str) -> list[Restaurant]:
+    Entries are read with ``LISTING_SPEC``, so editing its rules changes
+    what both this parser and ``LxmlListingParser`` extract.
+    """
+
+    def parse(self, html: Html, encoding: str | None = None) -> list[Restaurant]:
         """Parse a listing page and return a list of partial Restaurant objects."""
-        soup = BeautifulSoup(html, "lxml")
+        return self.parse_page(html, encoding).restaurants
+
+    def parse_page(self, html: Html, encoding: str | None = None) -> ListingPage:
+        """Parse a listing page's restaurants and pagination in one pass."""
+        soup = parse_regions(html, _LISTING_REGIONS, encoding)
         restaurants: list[Restaurant] = []
 
         entries = soup.select("div.restaurantEntry")
@@ -23,9 +142,10 @@ class ListingParser:
             if restaurant:
                 restaurants.append(restaurant)
 
-        return restaurants
+        total_pages, page_urls = self._extract_pagination(soup)
+        return ListingPage(restaurants=restaurants, total_pages=total_pages, page_urls=page_urls)
 
-    def _parse_entry(self, entry: Tag) -> Restaurant | None:
+    def _parse_entry(self, entry: Node) -> Restaurant | None:
         """Parse a single restaurant entry."""
         entry_id = entry.get("id", "")
         if not isinstance(entry_id, str) or not entry_id.startswith("restaurantID-"):
@@ -37,6 +157,8 @@ class ListingParser:
 
         name = self._extract_name(entry, slug)
         detail_url = f"{BASE_URL}/restaurant/{slug}/"
+        text = self._entry_text(entry)
+        lowered = text.lower()
 
         return Restaurant(
             slug=slug,
@@ -44,137 +166,64 @@ class ListingParser:
             cuisine=self._extract_cuisine(entry),
             neighborhood=self._extract_neighborhood(entry),
             detail_url=detail_url,
-            availability=self._extract_availability(entry),
-            pricing=self._extract_pricing(entry),
+            availability=self._extract_availability(lowered),
+            pricing=read_pricing(text),
             image_url=self._extract_image(entry),
             address=self._extract_address(entry),
-            features=self._extract_features(entry),
+            features=self._extract_features(entry, lowered),
         )
 
-    def _extract_name(self, entry: Tag, slug: str) -> str:
-        """Extract restaurant name from entry."""
-        link = entry.select_one(f'a[href="/restaurant/{slug}"]')
-        if link:
-            text = link.get_text(strip=True)
-            if text:
-                return text
-
-        h4 = entry.select_one("h4")
-        if h4:
-            link = h4.find("a")
-            if link:
-                text = link.get_text(strip=True)
-                if text:
-                    return text
-
-        return slug.replace("-", " ").title()
-
-    def _extract_cuisine(self, entry: Tag) -> str | None:
-        """Extract cuisine type."""
-        cuisines: list[str] = []
-
-        for link in entry.select('a[href*="/?cuisine="]'):
-            cuisine_span = link.select_one("span.restClass")
-            if cuisine_span:
-                text = cuisine_span.get_text(strip=True)
-                if text and text not in [",", "|"]:
-                    cuisines.append(text)
-
-        return ", ".join(cuisines) if cuisines else None
-
-    def _extract_neighborhood(self, entry: Tag) -> str | None:
-        """Extract neighborhood."""
-        for link in entry.select('a[href*="/?neighborhood="]'):
-            span = link.select_one("span.restClass")
-            if span:
-                text = span.get_text(strip=True)
-                if text and text not in [",", "|"]:
-                    return text
-        return None
-
-    def _extract_address(self, entry: Tag) -> str | None:
-        """Extract address from entry."""
-        for link in entry.select('a[href*="/map/"]'):
-            text = link.get_text(strip=True)
-            if text and "MA" in text:
-                return text
-        return None
-
-    def _extract_availability(self, entry: Tag) -> Availability:
-        """Extract meal availability flags."""
-        text = entry.get_text().lower()
-        return Availability(
-            lunch="lunch" in text,
-            dinner="dinner" in text,
-            brunch="brunch" in text,
-        )
+    @staticmethod
+    def _entry_text(entry: Node) -> str:
+        """Get an entry's text, which prices and availability are read from."""
+        assert isinstance(entry, Tag)
+        return entry.get_text()
 
-    def _extract_pricing(self, entry: Tag) -> Pricing:
-        """Extract pricing information."""
-        pricing = Pricing()
-        text = entry.get_text()
+    def _extract_name(self, entry: Node, slug: str) -> str:
+        """Extract restaurant name from entry."""
+        return LISTING_SPEC["name"].first(entry, slug=slug) or slug.replace("-", " ").title()
 
-        lunch_match = re.search(r"Lunch[:\s]*\$(\d+)", text, re.IGNORECASE)
-        if lunch_match:
-            pricing.lunch = int(lunch_match.group(1))
+    def _extract_cuisine(self, entry: Node) -> list[str]:
+        """Extract cuisine types."""
+        return [CUISINES.intern(cuisine) for cuisine in LISTING_SPEC["cuisine"].all(entry)]
 
-        dinner_match = re.search(r"Dinner[:\s]*\$(\d+)", text, re.IGNORECASE)
-        if dinner_match:
-            pricing.dinner = int(dinner_match.group(1))
+    def _extract_neighborhood(self, entry: Node) -> str | None:
+        """Extract neighborhood."""
+        neighborhood = LISTING_SPEC["neighborhood"].first(entry)
+        return NEIGHBORHOODS.intern(neighborhood) if neighborhood else None
 
-        brunch_match = re.search(r"Brunch[:\s]*\$(\d+)", text, re.IGNORECASE)
-        if brunch_match:
-            pricing.brunch = int(brunch_match.group(1))
+    def _extract_address(self, entry: Node) -> str | None:
+        """Extract address from entry."""
+        return LISTING_SPEC["address"].first(entry)
 
-        return pricing
+    def _extract_availability(self, lowered: str) -> Availability:
+        """Extract meal availability flags from an entry's lowercased text."""
+        return Availability(
+            lunch="lunch" in lowered,
+            dinner="dinner" in lowered,
+            brunch="brunch" in lowered,
+        )
 
-    def _extract_image(self, entry: Tag) -> str | None:
+    def _extract_image(self, entry: Node) -> str | None:
         """Extract restaurant image URL."""
-        logo_div = entry.select_one("div.restaurantLogo")
-        if logo_div:
-            img = logo_div.find("img")
-            if img:
-                src = img.get("src")
-                if isinstance(src, str) and src:
-                    return src if src.startswith("http") else f"{BASE_URL}{src}"
-        return None
-
-    def _extract_features(self, entry: Tag) -> list[str]:
-        """Extract feature flags (outdoor seating, etc.)."""
-        features: list[str] = []
-
-        for icon in entry.select("div.restaurantFeatureIcons img"):
-            alt = icon.get("alt", "")
-            title = icon.get("title", "")
-            text = (alt or title).lower() if (alt or title) else ""
-            if text:
-                features.append(text)
+        return LISTING_SPEC["image"].first(entry)
 
-        text = entry.get_text().lower()
-        feature_keywords = ["outdoor", "patio", "delivery", "takeout", "to-go"]
-        for keyword in feature_keywords:
-            if keyword in text and keyword not in features:
-                features.append(keyword)
-
-        return features
+    def _extract_features(self, entry: Node, lowered: str) -> list[str]:
+        """Extract feature flags (outdoor seating, etc.)."""
+        return add_feature_keywords(LISTING_SPEC["features"].all(entry), lowered)
 
-    def get_total_pages(self, html: str) -> int:
+    def get_total_pages(self, html: Html, encoding: str | None = None) -> int:
         """Extract the total number of pages from a listing page."""
-        soup = BeautifulSoup(html, "lxml")
-
-        page_text = soup.get_text()
-        match = re.search(r"page\s+\d+\s+of\s+(\d+)", page_text, re.IGNORECASE)
-        if match:
-            return int(match.group(1))
-
-        pagination = soup.select("a[href*='page='], .paginationControls a")
-        max_page = 1
-        for link in pagination:
-            href = link.get("href", "")
-            if isinstance(href, str):
-                page_match = re.search(r"page=(\d+)", href)
-                if page_match:
-                    page_num = int(page_match.group(1))
-                    max_page = max(max_page, page_num)
-
-        return max_page
+        soup = parse_regions(html, _PAGINATION_REGIONS, encoding)
+        return self._extract_pagination(soup)[0]
+
+    def _extract_pagination(self, soup: BeautifulSoup) -> tuple[int, list[str]]:
+        """Read the page count and page links from ``.paginationControls``."""
+        controls = soup.select(".paginationControls")
+        hrefs = [
+            link["href"]
+            for control in controls
+            for link in control.select("a[href]")
+            if isinstance(link["href"], str)
+        ]
+        return read_pagination((control.get_text() for control in controls), hrefs)
@@ -0,0 +1,96 @@
+"""lxml-native listing parser with precompiled XPath."""
+
+from functools import cache
+
+from lxml import etree
+
+from scraper.models import Restaurant
+from scraper.parser.listing import ListingPage, ListingParser, read_pagination
+from scraper.parser.scope import Html, document_encoding
+from scraper.parser.spec import Node
+
+
+def _has_class(name: str) -> str:
+    """XPath predicate matching a class token, like CSS ``.name``."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Comments, processing instructions, scripts and styles never contribute to
+# BeautifulSoup's get_text(), so they are dropped up front and itertext()
+# then yields exactly the strings get_text() would.
+_HTML_PARSER = etree.HTMLParser(remove_comments=True, remove_pis=True)
+
+
+@cache
+def _bytes_parser(encoding: str) -> etree.HTMLParser:
+    """Get a parser that decodes page bytes with a fixed charset."""
+    return etree.HTMLParser(remove_comments=True, remove_pis=True, encoding=encoding)
+
+
+_ENTRIES = etree.XPath(f"//div[{_has_class('restaurantEntry')}]")
+_PAGINATION = etree.XPath(f"//*[{_has_class('paginationControls')}]")
+_LINK_HREFS = etree.XPath(".//a/@href", smart_strings=False)
+
+
+def _text(element: etree._Element) -> str:
+    """Get an element's text, like ``Tag.get_text()``."""
+    return "".join(element.itertext())
+
+
+class LxmlListingParser(ListingParser):
+    """Parse listing pages on lxml's own tree.
+
+    Produces the same restaurants as ``ListingParser``, but skips building a
+    BeautifulSoup tree: entries and pagination are found with precompiled
+    XPath, and ``LISTING_SPEC``'s rules run against lxml's elements through
+    the XPath their selectors compile to.
+    """
+
+    @staticmethod
+    def _tree(html: Html, encoding: str | None = None) -> etree._Element | None:
+        """Parse a page, or return None for an empty document.
+
+        Bytes go to lxml as they are, decoded by libxml2 itself.
+        """
+        if not html.strip():
+            return None
+        if isinstance(html, bytes):
+            root = etree.fromstring(html, _bytes_parser(document_encoding(html, encoding)))
+        else:
+            root = etree.fromstring(html, _HTML_PARSER)
+        if root is not None:
+            etree.strip_elements(root, "script", "style", with_tail=False)
+        return root
+
+    def parse_page(self, html: Html, encoding: str | None = None) -> ListingPage:
+        """Parse a listing page's restaurants and pagination in one pass."""
+        root = self._tree(html, encoding)
+        if root is None:
+            return ListingPage()
+
+        restaurants: list[Restaurant] = []
+        for entry in _ENTRIES(root):
+            restaurant = self._parse_entry(entry)
+            if restaurant:
+                restaurants.append(restaurant)
+
+        total_pages, page_urls = self._lxml_pagination(root)
+        return ListingPage(restaurants=restaurants, total_pages=total_pages, page_urls=page_urls)
+
+    @staticmethod
+    def _entry_text(entry: Node) -> str:
+        """Get an entry's text, like ``Tag.get_text()``."""
+        assert isinstance(entry, etree._Element)
+        return _text(entry)
+
+    def get_total_pages(self, html: Html, encoding: str | None = None) -> int:
+        """Extract the total number of pages from a listing page."""
+        root = self._tree(html, encoding)
+        return self._lxml_pagination(root)[0] if root is not None else 1
+
+    @staticmethod
+    def _lxml_pagination(root: etree._Element) -> tuple[int, list[str]]:
+        """Read the page count and page links from ``.paginationControls``."""
+        controls = _PAGINATION(root)
+        hrefs = [href for control in controls for href in _LINK_HREFS(control)]
+        return read_pagination((_text(control) for control in controls), hrefs)
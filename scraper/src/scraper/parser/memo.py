@@ -0,0 +1,118 @@
+"""Memoized parser output, keyed by input HTML and parser version."""
+
+import hashlib
+import json
+from collections.abc import Callable
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+from scraper.fetcher.cache import PARSED, Cache
+from scraper.models import MealMenu, Restaurant
+from scraper.parser.listing import ListingPage
+
+
+@cache
+def parser_version() -> str:
+    """Hash the parser and model sources, so editing either invalidates memos."""
+    package = Path(__file__).parent
+    digest = hashlib.sha256()
+    for path in sorted([*package.glob("*.py"), *(package.parent / "models").glob("*.py")]):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _dump(value: Any) -> Any:
+    """Convert parser inputs and outputs to tagged JSON values."""
+    if isinstance(value, Restaurant):
+        data = value.to_dict()
+        if value.menu_urls:
+            data["menu_urls"] = value.menu_urls
+        return {"restaurant": data}
+    if isinstance(value, MealMenu):
+        return {"meal_menu": value.to_dict()}
+    if isinstance(value, ListingPage):
+        return {
+            "listing_page": {
+                "restaurants": _dump(value.restaurants),
+                "total_pages": value.total_pages,
+                "page_urls": value.page_urls,
+            }
+        }
+    if isinstance(value, list):
+        return [_dump(item) for item in value]
+    return value
+
+
+def _load(data: Any) -> Any:
+    """Rebuild parser output from ``_dump``."""
+    if isinstance(data, list):
+        return [_load(item) for item in data]
+    if isinstance(data, dict) and "restaurant" in data:
+        fields = data["restaurant"]
+        restaurant = Restaurant.from_dict(fields)
+        restaurant.menu_urls = fields.get("menu_urls", {})
+        return restaurant
+    if isinstance(data, dict) and "meal_menu" in data:
+        return MealMenu.from_dict(data["meal_menu"])
+    if isinstance(data, dict) and "listing_page" in data:
+        page = data["listing_page"]
+        return ListingPage(
+            restaurants=_load(page["restaurants"]),
+            total_pages=page["total_pages"],
+            page_urls=page["page_urls"],
+        )
+    return data
+
+
+class ParseMemo:
+    """Store parser results in the cache so unchanged pages skip parsing.
+
+    The key covers the parser method, its arguments (the HTML and, for
+    detail pages, the listing data being enriched) and ``parser_version``.
+    Results come back as new objects, so callers use the returned value
+    rather than relying on the parser mutating its arguments.
+    """
+
+    def __init__(self, cache: Cache, version: str | None = None) -> None:
+        self.cache = cache
+        self.version = version or parser_version()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, func: Callable[..., Any], *args: Any) -> str:
+        """Get the memo key for calling ``func`` with ``args``."""
+        digest = hashlib.sha256()
+        digest.update(f"{self.version}:{func.__qualname__}".encode())
+        for arg in args:
+            digest.update(b"\0")
+            if isinstance(arg, bytes):
+                digest.update(arg)
+            elif isinstance(arg, str):
+                digest.update(arg.encode("utf-8"))
+            else:
+                digest.update(json.dumps(_dump(arg), sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Any | None:
+        """Get a memoized result, or None if there is none."""
+        entry = self.cache.get_entry(PARSED, key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _load(json.loads(entry.body))
+
+    def put(self, key: str, result: Any) -> None:
+        """Memoize a parser result."""
+        self.cache.save(PARSED, key, json.dumps(_dump(result)))
+
+    def call(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Call a parser method, or return its memoized result."""
+        key = self.key(func, *args)
+        result = self.get(key)
+        if result is None:
+            result = func(*args)
+            self.put(key, result)
+        return result
@@ -0,0 +1,68 @@
+"""Build parse trees from page bytes, keeping only the regions a parser reads."""
+
+import codecs
+from collections.abc import Callable, Mapping
+
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.dammit import EncodingDetector
+
+Attrs = Mapping[str, str]
+Html = str | bytes
+
+
+class Regions(SoupStrainer):
+    """A strainer that keeps whole subtrees whose root tag passes ``keep``.
+
+    ``keep`` sees each tag's name and raw attributes while the document is
+    being parsed. A kept tag brings all of its descendants along; anything
+    outside a kept subtree, including loose text, never becomes a tree node.
+    Unlike ``SoupStrainer(class_=...)``, this can match one class token of a
+    multi-class attribute and combine rules on different attributes.
+    """
+
+    def __init__(self, keep: Callable[[str, Attrs], bool]) -> None:
+        super().__init__()
+        self.keep = keep
+
+    def allow_tag_creation(self, nsprefix: str | None, name: str, attrs: Attrs | None) -> bool:
+        return self.keep(name, attrs or {})
+
+    def allow_string_creation(self, string: str) -> bool:
+        return False
+
+
+def classes(attrs: Attrs) -> list[str]:
+    """Get the class tokens from raw tag attributes."""
+    return attrs.get("class", "").split()
+
+
+def document_encoding(html: bytes, declared: str | None = None) -> str:
+    """Pick the charset for page bytes.
+
+    The charset the server declared wins, then a ``<meta>`` charset near the
+    top of the page, then UTF-8. Choosing up front keeps BeautifulSoup from
+    running its (slow) statistical detection.
+    """
+    for candidate in (declared, EncodingDetector.find_declared_encoding(html, is_html=True)):
+        if candidate:
+            try:
+                return codecs.lookup(candidate).name
+            except LookupError:
+                continue
+    return "utf-8"
+
+
+def parse_soup(
+    html: Html, encoding: str | None = None, regions: Regions | None = None
+) -> BeautifulSoup:
+    """Parse a page, handing bytes straight to lxml with their charset."""
+    if isinstance(html, bytes):
+        return BeautifulSoup(
+            html, "lxml", parse_only=regions, from_encoding=document_encoding(html, encoding)
+        )
+    return BeautifulSoup(html, "lxml", parse_only=regions)
+
+
+def parse_regions(html: Html, regions: Regions, encoding: str | None = None) -> BeautifulSoup:
+    """Parse just the regions of ``html`` that ``regions`` keeps."""
+    return parse_soup(html, encoding, regions)
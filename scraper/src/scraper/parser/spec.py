@@ -0,0 +1,300 @@
+"""Declarative extraction rules, compiled once when a parser module loads.
+
+A ``Spec`` names the fields a parser extracts. Each ``Field`` lists the ways
+of finding its value in the order they are tried: ``Select`` rules run a CSS
+selector over a tree, ``Search`` rules run a regex over text. Selectors and
+patterns are compiled when the rule is built, and every rule counts how often
+it produced a value (hits) and how often it was tried without one (misses).
+Counts are per process, so work done in a parse worker pool is not included.
+
+Trees are BeautifulSoup's, or lxml's own: selectors are also compiled to
+XPath, so the same rules drive ``ListingParser`` and ``LxmlListingParser``.
+The XPath translation covers the selectors specs use: tags, ``#id``,
+``.class`` and attribute tests, joined by descendant combinators and commas.
+"""
+
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+import soupsieve
+from bs4 import Tag
+from lxml import etree
+
+from scraper.config import BASE_URL
+
+Node = Tag | etree._Element
+Reader = Callable[[Node], Any]
+
+_CSS_TOKEN = re.compile(
+    r"(?P<tag>\*|[a-zA-Z][\w-]*)"
+    r"|#(?P<id>[\w-]+)"
+    r"|\.(?P<cls>[\w-]+)"
+    r"|\[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[*^$~]?=)\s*"
+    r"(?:\"(?P<dq>[^\"]*)\"|'(?P<sq>[^']*)'|(?P<bare>[\w-]+))\s*)?\]"
+    r"|(?P<comma>\s*,\s*)"
+    r"|(?P<descendant>\s+)"
+)
+
+
+def _literal(value: str) -> str:
+    """Quote a string for XPath."""
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    raise ValueError(f"Cannot quote {value!r} in XPath")
+
+
+def _attr_test(name: str, op: str | None, value: str) -> str:
+    """Translate one CSS attribute selector to an XPath predicate."""
+    if op is None:
+        return f"@{name}"
+    if op == "=":
+        return f"@{name}={_literal(value)}"
+    if op == "*=":
+        return f"contains(@{name}, {_literal(value)})"
+    if op == "^=":
+        return f"starts-with(@{name}, {_literal(value)})"
+    if op == "$=":
+        return f"substring(@{name}, string-length(@{name}) - {len(value) - 1})={_literal(value)}"
+    return f"contains(concat(' ', normalize-space(@{name}), ' '), {_literal(f' {value} ')})"
+
+
+def css_to_xpath(selector: str) -> str:
+    """Translate a CSS selector to an XPath matching the same descendants."""
+    paths: list[str] = []
+    steps: list[str] = []
+    tag, tests = "*", []
+
+    def end_step() -> None:
+        nonlocal tag, tests
+        steps.append(tag + "".join(f"[{test}]" for test in tests))
+        tag, tests = "*", []
+
+    selector = selector.strip()
+    pos = 0
+    while pos < len(selector):
+        match = _CSS_TOKEN.match(selector, pos)
+        if match is None:
+            raise ValueError(f"Unsupported selector: {selector!r}")
+        pos = match.end()
+        if match["tag"]:
+            tag = match["tag"]
+        elif match["id"]:
+            tests.append(f"@id={_literal(match['id'])}")
+        elif match["cls"]:
+            tests.append(_attr_test("class", "~=", match["cls"]))
+        elif match["attr"]:
+            value = match["dq"] if match["dq"] is not None else match["sq"] or match["bare"] or ""
+            tests.append(_attr_test(match["attr"], match["op"], value))
+        else:
+            end_step()
+            if match["comma"]:
+                paths.append(".//" + "//".join(steps))
+                steps = []
+    end_step()
+    paths.append(".//" + "//".join(steps))
+    return " | ".join(paths)
+
+
+def text(tag: Node) -> str:
+    """Read a tag's stripped text."""
+    if isinstance(tag, etree._Element):
+        return "".join(string.strip() for string in tag.itertext())
+    return tag.get_text(strip=True)
+
+
+def attr(name: str) -> Reader:
+    """Read one attribute of a tag."""
+
+    def read(tag: Tag) -> str | None:
+        value = tag.get(name)
+        return value if isinstance(value, str) else None
+
+    return read
+
+
+def inside(selector: str, read: Reader = text) -> Reader:
+    """Read the first element matching ``selector`` within a tag."""
+    compiled = soupsieve.compile(selector)
+    xpath = etree.XPath(css_to_xpath(selector))
+
+    def read_inside(tag: Node) -> Any:
+        if isinstance(tag, etree._Element):
+            found = next(iter(xpath(tag)), None)
+        else:
+            found = compiled.select_one(tag)
+        return read(found) if found is not None else None
+
+    return read_inside
+
+
+def absolute_url(url: str) -> str:
+    """Make a site-relative URL absolute."""
+    return url if url.startswith("http") else f"{BASE_URL}{url}"
+
+
+class Rule(ABC):
+    """One way of finding a field's value.
+
+    Parse threads share rules, so the counts are updated under a lock.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def values(self, source: Any, context: dict[str, Any], every: bool) -> Iterator[Any]:
+        """Yield the values this rule finds in ``source``."""
+
+    def count(self, found: bool) -> None:
+        """Count one try of this rule."""
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset(self) -> None:
+        """Zero the counts."""
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+class Select(Rule):
+    """Read values from the elements matching a CSS selector.
+
+    Only the first match is read (like ``select_one``) unless ``each`` is
+    set, in which case matches are read in document order until one is
+    accepted. ``where`` filters matches before that, and is called with the
+    element and the extraction context.
+    """
+
+    def __init__(
+        self,
+        selector: str,
+        read: Reader = text,
+        *,
+        accept: Callable[[Any], bool] = bool,
+        clean: Callable[[Any], Any] | None = None,
+        where: Callable[..., bool] | None = None,
+        each: bool = False,
+    ) -> None:
+        super().__init__()
+        self.selector = selector
+        self.compiled = soupsieve.compile(selector)
+        self.xpath = etree.XPath(css_to_xpath(selector))
+        self.read = read
+        self.accept = accept
+        self.clean = clean
+        self.where = where
+        self.each = each
+
+    def __repr__(self) -> str:
+        return f"Select({self.selector!r})"
+
+    def values(self, source: Node, context: dict[str, Any], every: bool) -> Iterator[Any]:
+        if isinstance(source, etree._Element):
+            elements = iter(self.xpath(source))
+        else:
+            elements = self.compiled.iselect(source)
+        for element in elements:
+            if self.where is not None and not self.where(element, **context):
+                continue
+            value = self.read(element)
+            if value is not None and self.accept(value):
+                yield self.clean(value) if self.clean else value
+            if not (every or self.each):
+                return
+
+
+class Search(Rule):
+    """Read a regex group from text."""
+
+    def __init__(
+        self,
+        pattern: str,
+        flags: int = re.IGNORECASE,
+        *,
+        group: int = 1,
+        convert: Callable[[str], Any] | None = None,
+    ) -> None:
+        super().__init__()
+        self.pattern = re.compile(pattern, flags)
+        self.group = group
+        self.convert = convert
+
+    def __repr__(self) -> str:
+        return f"Search({self.pattern.pattern!r})"
+
+    def values(self, source: str, context: dict[str, Any], every: bool) -> Iterator[Any]:
+        matches = self.pattern.finditer(source) if every else [self.pattern.search(source)]
+        for match in matches:
+            if match:
+                value = match.group(self.group)
+                yield self.convert(value) if self.convert else value
+
+
+class Field:
+    """A value and the rules for finding it, tried in order."""
+
+    def __init__(self, *rules: Rule) -> None:
+        self.rules = rules
+
+    def first(self, source: Any, **context: Any) -> Any:
+        """Get the value from the first rule that finds one, or None."""
+        for rule in self.rules:
+            value = next(rule.values(source, context, every=False), None)
+            rule.count(value is not None)
+            if value is not None:
+                return value
+        return None
+
+    def all(self, source: Any, **context: Any) -> list[Any]:
+        """Get every value every rule finds."""
+        found: list[Any] = []
+        for rule in self.rules:
+            values = list(rule.values(source, context, every=True))
+            rule.count(bool(values))
+            found.extend(values)
+        return found
+
+
+@dataclass
+class RuleStats:
+    """How often one rule of a spec found its field."""
+
+    field: str
+    rule: str
+    hits: int
+    misses: int
+
+
+class Spec:
+    """The fields one parser extracts."""
+
+    def __init__(self, **fields: Field) -> None:
+        self.fields = fields
+
+    def __getitem__(self, name: str) -> Field:
+        return self.fields[name]
+
+    def stats(self) -> list[RuleStats]:
+        """Get the hit and miss counts of every rule, in spec order."""
+        return [
+            RuleStats(name, repr(rule), rule.hits, rule.misses)
+            for name, field in self.fields.items()
+            for rule in field.rules
+        ]
+
+    def reset(self) -> None:
+        """Zero every rule's counts."""
+        for field in self.fields.values():
+            for rule in field.rules:
+                rule.reset()
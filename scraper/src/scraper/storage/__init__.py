@@ -1,5 +1,24 @@
 """Storage utilities."""
 
+from .columnar import ColumnarWriter, Columns, columnar_path, mask_of
+from .encode import encode_restaurant
+from .incremental import PreviousRun, listing_fingerprint
 from .json_writer import JsonWriter
+from .ndjson_writer import NdjsonWriter
+from .reader import read_output
+from .vocabularies import VOCABULARY_FIELDS, Vocabularies
 
-__all__ = ["JsonWriter"]
+__all__ = [
+    "VOCABULARY_FIELDS",
+    "ColumnarWriter",
+    "Columns",
+    "JsonWriter",
+    "NdjsonWriter",
+    "PreviousRun",
+    "Vocabularies",
+    "columnar_path",
+    "encode_restaurant",
+    "listing_fingerprint",
+    "mask_of",
+    "read_output",
+]
@@ -0,0 +1,335 @@
+"""Column-oriented export of the restaurant dataset, for filtering in bulk.
+
+``<output>.columns`` holds one typed ``array`` per field next to the JSON
+output. A JSON header line (slugs, vocabularies, column layout) is followed
+by the raw bytes of each array in order, so loading is a ``fromfile`` per
+column rather than a dict per restaurant.
+"""
+
+import json
+import math
+import os
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from itertools import compress, filterfalse, repeat
+from pathlib import Path
+from typing import Any
+
+from scraper.models import Restaurant
+from scraper.storage.vocabularies import Vocabularies
+
+MEALS = ("lunch", "dinner", "brunch")
+
+# Column name -> array typecode. Missing prices and coordinates are NaN, a
+# missing neighborhood is -1. Cuisines and features are vocabulary numbers,
+# the same count per row (the most any row has) padded with -1; with ``w``
+# per row, row i's are ``ids[i * w:(i + 1) * w]``.
+COLUMNS = {
+    "lunch_price": "d",
+    "dinner_price": "d",
+    "brunch_price": "d",
+    "lunch": "b",
+    "dinner": "b",
+    "brunch": "b",
+    "latitude": "d",
+    "longitude": "d",
+    "neighborhood": "i",
+    "cuisine": "i",
+    "features": "i",
+}
+
+# Columns whose values get a mask each: prices, the neighborhood number and
+# the cuisine and feature numbers.
+MASKED = ("lunch_price", "dinner_price", "brunch_price", "neighborhood", "cuisine", "features")
+
+_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+_FLAGS = bytes.maketrans(b"01", b"\x00\x01")
+_MISSING = 255  # code byte of a missing value; columns with more values use a row loop
+
+
+def columnar_path(output_path: Path) -> Path:
+    """Get where the columnar export of an output file goes, e.g. ``restaurants.json.columns``.
+
+    The full name is kept so JSON and NDJSON outputs side by side get separate exports.
+    """
+    return output_path.with_name(output_path.name + ".columns")
+
+
+def mask_of(flags: Iterable[bool]) -> int:
+    """Pack one truth value per row into a bitset, row 0 in the lowest bit."""
+    digits = bytes(flags)[::-1].translate(_DIGITS)
+    return int(digits, 2) if digits else 0
+
+
+def _code_mask(codes: bytes, code: int) -> int:
+    """Get the mask of the rows whose code byte is ``code``.
+
+    ``codes`` holds one byte per row. Translating it through a table that
+    maps ``code`` to ``"1"`` and every other byte to ``"0"`` gives one
+    binary digit per row; reversed so row 0 is the last digit, ``int(.., 2)``
+    reads those digits as the mask, with bit n set when row n holds
+    ``code``. Both steps run in C, so no Python code runs per row. It is
+    equivalent to ORing ``1 << row`` for each matching row.
+    """
+    table = bytearray(b"0" * 256)
+    table[code] = ord("1")
+    digits = codes.translate(table)[::-1]
+    return int(digits, 2) if digits else 0
+
+
+def _low_bytes(values: array) -> bytes:
+    """Get the low byte of each number in an integer array, so -1 becomes 255.
+
+    This turns vocabulary numbers into code bytes for ``_code_mask``: below
+    255 a number is its own low byte, and -1, with every bit set, becomes
+    ``_MISSING``. The array's memory is viewed as bytes and every
+    ``itemsize``-th byte is kept, starting from the low end of an item in
+    the machine's byte order.
+    """
+    view = memoryview(values).cast("B")
+    size = values.itemsize
+    return bytes(view[::size] if sys.byteorder == "little" else view[size - 1 :: size])
+
+
+def _price_masks(values: array) -> dict[float, int]:
+    """Get the mask of the rows holding each distinct price, skipping NaN."""
+    rows = values.tolist()
+    prices = set(filterfalse(math.isnan, rows))
+    if len(prices) >= _MISSING:
+        return _row_masks(values)
+    index = {price: code for code, price in enumerate(prices)}
+    codes = bytes(map(index.get, rows, repeat(_MISSING)))
+    return {price: _code_mask(codes, code) for price, code in index.items()}
+
+
+def _term_masks(ids: array, terms: int, width: int = 1) -> dict[int, int]:
+    """Get the mask of the rows holding each vocabulary number, skipping -1.
+
+    With ``width`` numbers per row, the nth numbers of every row are one
+    slice of the codes.
+    """
+    if terms >= _MISSING:
+        return _row_masks(ids, width)
+    codes = _low_bytes(ids)
+    masks = dict.fromkeys(range(terms), 0)
+    for position in range(width):
+        position_codes = codes[position::width]
+        for term in masks:
+            masks[term] |= _code_mask(position_codes, term)
+    return masks
+
+
+def _row_masks(values: array, width: int = 1) -> dict[Any, int]:
+    """Get value masks with a pass over the rows, for more values than a byte can code.
+
+    Each value collects one flag byte per row, which ``mask_of`` packs into
+    a mask the same way ``_code_mask`` does.
+    """
+    count = len(values) // width if width else 0
+    flags_of: dict[Any, bytearray] = {}
+    for row in range(count):
+        for value in values[row * width : (row + 1) * width]:
+            if value != value or value == -1:  # NaN or -1: missing
+                continue
+            flags = flags_of.get(value)
+            if flags is None:
+                flags = flags_of[value] = bytearray(count)
+            flags[row] = 1
+    return {value: mask_of(flags) for value, flags in flags_of.items()}
+
+
+def _sorted_rows(values: array) -> tuple[array, array]:
+    """Get the rows with a known value sorted by it, and those values in that order."""
+    rows = array(
+        "i",
+        sorted(compress(range(len(values)), map(math.isfinite, values)), key=values.__getitem__),
+    )
+    return rows, array(values.typecode, map(values.__getitem__, rows))
+
+
+class Columns:
+    """The restaurant dataset as one array per field.
+
+    Filters return masks: ints with one bit per row, combined with ``&`` and
+    ``|`` (negate with ``columns.all & ~mask``). A mask per distinct price
+    and category value is built up front, so filters only OR those together,
+    which Python does a machine word at a time. Coordinates are kept sorted,
+    so a bounding box is two binary searches per axis. ``select`` turns a
+    mask back into slugs, for example::
+
+        cheap = columns.price_at_most("dinner", 50)
+        nearby = columns.any_of("neighborhood", "Back Bay", "South End")
+        columns.select(cheap & nearby)
+    """
+
+    def __init__(
+        self, slugs: list[str], vocabularies: Vocabularies, arrays: dict[str, array]
+    ) -> None:
+        self.slugs = slugs
+        self.vocabularies = vocabularies
+        self.arrays = arrays
+        self._value_masks = {column: self._build_masks(column) for column in MASKED}
+        self._by_latitude = _sorted_rows(arrays["latitude"])
+        self._by_longitude = _sorted_rows(arrays["longitude"])
+
+    def __len__(self) -> int:
+        return len(self.slugs)
+
+    @classmethod
+    def from_restaurants(cls, restaurants: Iterable[Restaurant]) -> "Columns":
+        """Build the columns from restaurants."""
+        vocabularies = Vocabularies()
+        tables = vocabularies.tables
+        slugs: list[str] = []
+        arrays = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        terms: dict[str, list[list[int]]] = {"cuisine": [], "features": []}
+
+        for r in restaurants:
+            slugs.append(r.slug)
+            for meal in MEALS:
+                price = r.pricing.for_meal(meal)
+                arrays[f"{meal}_price"].append(math.nan if price is None else price)
+                arrays[meal].append(getattr(r.availability, meal))
+            arrays["latitude"].append(r.coordinates.latitude if r.coordinates else math.nan)
+            arrays["longitude"].append(r.coordinates.longitude if r.coordinates else math.nan)
+            arrays["neighborhood"].append(
+                -1 if r.neighborhood is None else tables["neighborhood"].id(r.neighborhood)
+            )
+            terms["cuisine"].append([tables["cuisine"].id(term) for term in r.cuisine])
+            terms["features"].append([tables["features"].id(term) for term in r.features])
+
+        for name, rows in terms.items():
+            width = max(map(len, rows), default=0)
+            for ids in rows:
+                arrays[name].extend(ids)
+                arrays[name].extend([-1] * (width - len(ids)))
+        return cls(slugs, vocabularies, arrays)
+
+    @classmethod
+    def read(cls, path: Path) -> "Columns":
+        """Load columns written by ``ColumnarWriter``."""
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            arrays = {}
+            for name, typecode, length in header["columns"]:
+                column = arrays[name] = array(typecode)
+                column.fromfile(f, length)
+                if header["byteorder"] != sys.byteorder:
+                    column.byteswap()
+        return cls(header["slugs"], Vocabularies(header["vocabularies"]), arrays)
+
+    def width(self, column: str) -> int:
+        """Get how many cuisine or feature numbers each row holds, padding included."""
+        return len(self.arrays[column]) // len(self.slugs) if self.slugs else 0
+
+    @property
+    def all(self) -> int:
+        """The mask of every row."""
+        return (1 << len(self.slugs)) - 1
+
+    def select(self, mask: int) -> list[str]:
+        """Get the slugs of the rows in a mask, in row order."""
+        digits = format(mask & self.all, f"0{len(self.slugs)}b")[::-1]
+        return list(compress(self.slugs, digits.encode("ascii").translate(_FLAGS)))
+
+    def offered(self, meal: str) -> int:
+        """Rows offering a meal."""
+        return mask_of(self.arrays[meal])
+
+    def price_at_most(self, meal: str, price: float) -> int:
+        """Rows whose price for a meal is known and at most ``price``."""
+        mask = 0
+        for value, rows in self._masks(f"{meal}_price").items():
+            if value <= price:
+                mask |= rows
+        return mask
+
+    def price_at_least(self, meal: str, price: float) -> int:
+        """Rows whose price for a meal is known and at least ``price``."""
+        mask = 0
+        for value, rows in self._masks(f"{meal}_price").items():
+            if value >= price:
+                mask |= rows
+        return mask
+
+    def within(self, south: float, west: float, north: float, east: float) -> int:
+        """Rows whose coordinates fall inside a bounding box."""
+        mask = self.all
+        for (rows, values), low, high in (
+            (self._by_latitude, south, north),
+            (self._by_longitude, west, east),
+        ):
+            flags = bytearray(len(self.slugs))
+            for row in rows[bisect_left(values, low) : bisect_right(values, high)]:
+                flags[row] = 1
+            mask &= mask_of(flags)
+        return mask
+
+    def any_of(self, field: str, *terms: str) -> int:
+        """Rows with at least one of ``terms`` in a cuisine, neighborhood or features field."""
+        masks = self._masks(field)
+        vocabulary = self.vocabularies.tables[field]
+        mask = 0
+        for term in terms:
+            mask |= masks.get(vocabulary.find(term), 0)
+        return mask
+
+    def all_of(self, field: str, *terms: str) -> int:
+        """Rows with every one of ``terms`` in a cuisine, neighborhood or features field."""
+        mask = self.all
+        for term in terms:
+            mask &= self.any_of(field, term)
+        return mask
+
+    def _masks(self, column: str) -> dict[Any, int]:
+        """Get the mask of every value of a column."""
+        return self._value_masks[column]
+
+    def _build_masks(self, column: str) -> dict[Any, int]:
+        """Build the mask of every value of a column.
+
+        Missing values (NaN prices, -1 neighborhoods) get no mask. Cuisines
+        and features are keyed by vocabulary number, each row counted under
+        every term it has.
+        """
+        values = self.arrays[column]
+        if column.endswith("_price"):
+            return _price_masks(values)
+        terms = len(self.vocabularies.tables[column])
+        if column == "neighborhood":
+            return _term_masks(values, terms)
+        return _term_masks(values, terms, self.width(column))
+
+
+class ColumnarWriter:
+    """Write the columnar export of restaurant data.
+
+    Like the other writers, the file is written next to the output and
+    renamed over it.
+    """
+
+    def __init__(self, output_path: Path) -> None:
+        self.output_path = output_path
+
+    def write(self, restaurants: Iterable[Restaurant]) -> Path:
+        """Write restaurants as columns."""
+        columns = Columns.from_restaurants(restaurants)
+        header = {
+            "byteorder": sys.byteorder,
+            "slugs": columns.slugs,
+            "vocabularies": columns.vocabularies.to_dict(),
+            "columns": [[name, a.typecode, len(a)] for name, a in columns.arrays.items()],
+        }
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        partial_path = self.output_path.with_name(self.output_path.name + ".partial")
+        with open(partial_path, "wb") as f:
+            f.write(json.dumps(header, ensure_ascii=False).encode("utf-8"))
+            f.write(b"\n")
+            for column in columns.arrays.values():
+                column.tofile(f)
+        os.replace(partial_path, self.output_path)
+
+        return self.output_path
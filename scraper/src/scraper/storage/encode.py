@@ -0,0 +1,81 @@
+"""Encode restaurants straight to JSON text.
+
+``encode_restaurant(r)`` gives the same text as
+``json.dumps(r.to_dict(), ensure_ascii=False, separators=(",", ":"))``, and
+``encode_restaurant(r, vocabularies)`` the same as it for
+``vocabularies.encode(r.to_dict())``, but fills templates from the slots
+directly instead of building a dict per object first; it is what the compact
+writers use.
+Checks are inlined because the function calls they would otherwise cost
+dominate.
+"""
+
+import json
+from json.encoder import encode_basestring as _str
+
+from scraper.models import MealMenu, Restaurant
+from scraper.storage.vocabularies import Vocabularies
+
+_RESTAURANT = (
+    '{"slug":%s,"name":%s,"cuisine":[%s],"neighborhood":%s,"address":%s,"phone":%s,'
+    '"website":%s,"image_url":%s,"detail_url":%s,'
+    '"availability":{"lunch":%s,"dinner":%s,"brunch":%s},'
+    '"pricing":{"lunch":%s,"dinner":%s,"brunch":%s},"features":[%s]'
+)
+_MEAL_MENU = '{"meal_type":%s,"price":%s,"courses":[%s]}'
+_COURSE = '{"name":%s,"options":[%s]}'
+_COORDINATES = ',"coordinates":{"latitude":%s,"longitude":%s}'
+
+
+def _meal_menu(meal_menu: MealMenu) -> str:
+    return _MEAL_MENU % (
+        _str(meal_menu.meal_type),
+        "null" if meal_menu.price is None else meal_menu.price,
+        ",".join(
+            [_COURSE % (_str(c.name), ",".join(map(_str, c.options))) for c in meal_menu.courses]
+        ),
+    )
+
+
+def encode_restaurant(restaurant: Restaurant, vocabularies: Vocabularies | None = None) -> str:
+    """Encode a restaurant as compact JSON, numbering its terms in ``vocabularies`` if given."""
+    r = restaurant
+    a = r.availability
+    p = r.pricing
+    if vocabularies is None:
+        cuisine = ",".join(map(_str, r.cuisine))
+        neighborhood = "null" if r.neighborhood is None else _str(r.neighborhood)
+        features = ",".join(map(_str, r.features))
+    else:
+        tables = vocabularies.tables
+        cuisine = ",".join([str(tables["cuisine"].id(c)) for c in r.cuisine])
+        neighborhood = (
+            "null" if r.neighborhood is None else tables["neighborhood"].id(r.neighborhood)
+        )
+        features = ",".join([str(tables["features"].id(f)) for f in r.features])
+    text = _RESTAURANT % (
+        _str(r.slug),
+        _str(r.name),
+        cuisine,
+        neighborhood,
+        "null" if r.address is None else _str(r.address),
+        "null" if r.phone is None else _str(r.phone),
+        "null" if r.website is None else _str(r.website),
+        "null" if r.image_url is None else _str(r.image_url),
+        "null" if r.detail_url is None else _str(r.detail_url),
+        "true" if a.lunch else "false",
+        "true" if a.dinner else "false",
+        "true" if a.brunch else "false",
+        "null" if p.lunch is None else p.lunch,
+        "null" if p.dinner is None else p.dinner,
+        "null" if p.brunch is None else p.brunch,
+        features,
+    )
+    if r.menu:
+        text += ',"menu":{"menus":[' + ",".join(map(_meal_menu, r.menu.menus)) + "]}"
+    if r.coordinates:
+        text += _COORDINATES % (
+            json.dumps(r.coordinates.latitude),
+            json.dumps(r.coordinates.longitude),
+        )
+    return text + "}"
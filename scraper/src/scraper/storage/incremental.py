@@ -0,0 +1,75 @@
+"""Reuse the previous run's records for restaurants whose listing is unchanged."""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+from scraper.models import Restaurant
+from scraper.storage.reader import read_output
+
+
+def listing_fingerprint(restaurant: Restaurant) -> str:
+    """Hash a restaurant as parsed from the listing, before detail pages."""
+    data = json.dumps(restaurant.to_dict(), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+def _file_hash(path: Path) -> str:
+    """Hash a file's contents."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+class PreviousRun:
+    """The last run's output, and the listing fingerprints it was built from.
+
+    Fingerprints live in a sidecar file next to the output, along with a
+    hash of the output they were saved with; if anything else has rewritten
+    the output since, such as a run without ``--incremental``, the sidecar
+    is ignored and every restaurant is fetched again. ``reuse`` is
+    given each restaurant fresh from the listing: when its fingerprint
+    matches the last run's, the last run's full record (details and menus
+    included) is returned instead of fetching the detail page again.
+    ``save`` records the fingerprints seen this run once the output is
+    written, except for restaurants passed to ``forget`` because their
+    detail page or a menu could not be fetched, so the next run tries them
+    again rather than reusing an incomplete record.
+    """
+
+    def __init__(self, output_path: Path) -> None:
+        self.output_path = output_path
+        self.fingerprints_path = output_path.with_name(output_path.name + ".fingerprints.json")
+        self.records: dict[str, dict[str, Any]] = {}
+        self.fingerprints: dict[str, str] = {}
+        if output_path.exists() and self.fingerprints_path.exists():
+            with open(self.fingerprints_path, encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("output") == _file_hash(output_path):
+                self.records = {r["slug"]: r for r in read_output(output_path)}
+                self.fingerprints = saved["fingerprints"]
+        self.current: dict[str, str] = {}
+        self.reused = 0
+
+    def reuse(self, restaurant: Restaurant) -> Restaurant | None:
+        """Get the last run's record for an unchanged listing entry, or None."""
+        fingerprint = self.current[restaurant.slug] = listing_fingerprint(restaurant)
+        record = self.records.get(restaurant.slug)
+        if record is None or self.fingerprints.get(restaurant.slug) != fingerprint:
+            return None
+        self.reused += 1
+        return Restaurant.from_dict(record)
+
+    def forget(self, restaurant: Restaurant) -> None:
+        """Leave a restaurant's fingerprint out of this run's, so it is refetched next time."""
+        self.current.pop(restaurant.slug, None)
+
+    def save(self) -> Path:
+        """Write this run's fingerprints, and the output's hash, next to the output."""
+        partial_path = self.fingerprints_path.with_name(self.fingerprints_path.name + ".partial")
+        saved = {"output": _file_hash(self.output_path), "fingerprints": self.current}
+        with open(partial_path, "w", encoding="utf-8") as f:
+            json.dump(saved, f, sort_keys=True)
+        os.replace(partial_path, self.fingerprints_path)
+        return self.fingerprints_path
@@ -1,25 +1,70 @@
 """JSON output writer."""
 
 import json
+import os
 from pathlib import Path
+from typing import IO
 
 from scraper.config import OUTPUT_FILE
 from scraper.models import Restaurant
+from scraper.storage.encode import encode_restaurant
+from scraper.storage.vocabularies import Vocabularies
 
 
 class JsonWriter:
-    """Write restaurant data to JSON file."""
+    """Write restaurant data to JSON file.
 
-    def __init__(self, output_path: Path = OUTPUT_FILE) -> None:
+    The file is written next to the output and renamed over it, so readers
+    never see a half-written file. ``indent=None`` writes compact JSON.
+
+    The file is an array of restaurants. With ``vocabularies``, it is instead
+    a document holding a ``restaurants`` array, whose cuisines, neighborhoods
+    and features are numbers into the ``vocabularies`` written after it.
+    """
+
+    def __init__(
+        self, output_path: Path = OUTPUT_FILE, indent: int | None = 2, vocabularies: bool = False
+    ) -> None:
         self.output_path = output_path
+        self.indent = indent
+        self.vocabularies = vocabularies
 
     def write(self, restaurants: list[Restaurant]) -> Path:
         """Write restaurants to JSON file."""
         self.output_path.parent.mkdir(parents=True, exist_ok=True)
 
-        data = [r.to_dict() for r in restaurants]
-
-        with open(self.output_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        partial_path = self.output_path.with_name(self.output_path.name + ".partial")
+        with open(partial_path, "w", encoding="utf-8") as f:
+            if not self.vocabularies:
+                self._write_array(f, restaurants)
+            elif self.indent is None:
+                vocabularies = Vocabularies()
+                f.write('{"restaurants":[')
+                for i, restaurant in enumerate(restaurants):
+                    f.write("," if i else "")
+                    f.write(encode_restaurant(restaurant, vocabularies))
+                f.write('],"vocabularies":')
+                json.dump(vocabularies.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+                f.write("}")
+            else:
+                vocabularies = Vocabularies()
+                data = {
+                    "restaurants": [vocabularies.encode(r.to_dict()) for r in restaurants],
+                    "vocabularies": vocabularies.to_dict(),
+                }
+                json.dump(data, f, indent=self.indent, ensure_ascii=False)
+        os.replace(partial_path, self.output_path)
 
         return self.output_path
+
+    def _write_array(self, f: IO[str], restaurants: list[Restaurant]) -> None:
+        """Write restaurants as an array with their terms inline."""
+        if self.indent is None:
+            f.write("[")
+            for i, restaurant in enumerate(restaurants):
+                f.write("," if i else "")
+                f.write(encode_restaurant(restaurant))
+            f.write("]")
+        else:
+            data = [r.to_dict() for r in restaurants]
+            json.dump(data, f, indent=self.indent, ensure_ascii=False)
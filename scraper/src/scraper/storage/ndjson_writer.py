@@ -0,0 +1,88 @@
+"""Streaming newline-delimited JSON output writer."""
+
+import json
+import os
+from collections.abc import Iterable
+from pathlib import Path
+from types import TracebackType
+from typing import IO
+
+from scraper.config import NDJSON_OUTPUT_FILE
+from scraper.models import Restaurant
+from scraper.storage.encode import encode_restaurant
+from scraper.storage.vocabularies import Vocabularies
+
+
+class NdjsonWriter:
+    """Append restaurants to an NDJSON file, one line each, as they finish.
+
+    Lines go to ``<output>.partial`` and are flushed as they are written, so
+    memory stays flat and a crash keeps every restaurant finished so far.
+    ``close`` renames the partial file over the output; used as a context
+    manager, the rename is skipped if the block raises.
+
+    With ``vocabularies``, cuisines, neighborhoods and features are written
+    as numbers. A ``{"vocabularies": ...}`` line ahead of the first
+    restaurant using a term appends it to the file's tables, so every prefix
+    of the file decodes.
+    """
+
+    def __init__(self, output_path: Path = NDJSON_OUTPUT_FILE, vocabularies: bool = False) -> None:
+        self.output_path = output_path
+        self.partial_path = output_path.with_name(output_path.name + ".partial")
+        self.count = 0
+        self.vocabularies = Vocabularies() if vocabularies else None
+        self._file: IO[str] | None = None
+
+    def __enter__(self) -> "NdjsonWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def append(self, restaurant: Restaurant) -> None:
+        """Write one restaurant and flush it to disk."""
+        f = self._file or self._open()
+        line = encode_restaurant(restaurant, self.vocabularies)
+        new_terms = self.vocabularies.new_terms() if self.vocabularies is not None else None
+        if new_terms:
+            f.write(json.dumps({"vocabularies": new_terms}, ensure_ascii=False))
+            f.write("\n")
+        f.write(line)
+        f.write("\n")
+        f.flush()
+        self.count += 1
+
+    def close(self) -> Path:
+        """Finish the file and move it into place."""
+        (self._file or self._open()).close()
+        self._file = None
+        os.replace(self.partial_path, self.output_path)
+        return self.output_path
+
+    def abort(self) -> None:
+        """Stop writing, leaving what was written in the partial file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def write(self, restaurants: Iterable[Restaurant]) -> Path:
+        """Write restaurants to NDJSON file."""
+        with self:
+            for restaurant in restaurants:
+                self.append(restaurant)
+        return self.output_path
+
+    def _open(self) -> IO[str]:
+        """Start the partial file."""
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.partial_path, "w", encoding="utf-8")
+        return self._file
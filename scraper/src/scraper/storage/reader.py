@@ -0,0 +1,50 @@
+"""Reading scraper output back."""
+
+import json
+from pathlib import Path
+from typing import Any
+
+from scraper.storage.vocabularies import Vocabularies
+
+
+def _first_line(line: str) -> Any:
+    """Parse the first line of a file, or None if it is not a JSON value."""
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        return None
+
+
+def read_output(path: Path) -> list[dict[str, Any]]:
+    """Read restaurant dicts from a JSON or NDJSON (one per line) output file.
+
+    Cuisines, neighborhoods and features come back as terms. Plain JSON
+    arrays and NDJSON without vocabulary lines, as written before
+    vocabularies, are read as they are.
+    """
+    with open(path, encoding="utf-8") as f:
+        line = f.readline()
+        while line and not line.strip():
+            line = f.readline()
+        if not line:
+            return []
+        if line.lstrip().startswith("["):
+            f.seek(0)
+            return json.load(f)
+
+        first = _first_line(line)
+        if first is None or "restaurants" in first:
+            if first is None:
+                f.seek(0)
+                first = json.load(f)
+            vocabularies = Vocabularies(first["vocabularies"])
+            return [vocabularies.decode(record) for record in first["restaurants"]]
+
+        vocabularies = Vocabularies()
+        records: list[dict[str, Any]] = []
+        for item in (first, *(json.loads(rest) for rest in f if rest.strip())):
+            if "vocabularies" in item:
+                vocabularies.add(item["vocabularies"])
+            else:
+                records.append(vocabularies.decode(item))
+        return records
@@ -0,0 +1,74 @@
+"""Per-file vocabularies for the categorical restaurant fields."""
+
+from collections.abc import Mapping
+from typing import Any
+
+from scraper.models import Vocabulary
+
+# Fields stored as vocabulary numbers: cuisine and features are lists of
+# terms, neighborhood a single term.
+VOCABULARY_FIELDS = ("cuisine", "neighborhood", "features")
+
+
+class Vocabularies:
+    """Number the cuisines, neighborhoods and features of one output file.
+
+    Writers store each term once, in a ``vocabularies`` table, and records
+    refer to terms by their position in it. Numbers are assigned per file in
+    first-seen order, so they stay stable while a file is being appended to.
+    """
+
+    def __init__(self, tables: Mapping[str, list[str]] | None = None) -> None:
+        self.tables = {name: Vocabulary() for name in VOCABULARY_FIELDS}
+        self._stored = dict.fromkeys(VOCABULARY_FIELDS, 0)
+        if tables:
+            self.add(tables)
+
+    def add(self, tables: Mapping[str, list[str]]) -> None:
+        """Append terms read from a file's vocabulary table."""
+        for name, terms in tables.items():
+            for term in terms:
+                self.tables[name].id(term)
+        self._stored = {name: len(table) for name, table in self.tables.items()}
+
+    def to_dict(self) -> dict[str, list[str]]:
+        """Get every table, for writing at the end of a file."""
+        self._stored = {name: len(table) for name, table in self.tables.items()}
+        return {name: list(table.terms) for name, table in self.tables.items()}
+
+    def new_terms(self) -> dict[str, list[str]]:
+        """Get the terms numbered since the last call, for appending to a file."""
+        new = {
+            name: table.terms[self._stored[name] :]
+            for name, table in self.tables.items()
+            if len(table) > self._stored[name]
+        }
+        self._stored = {name: len(table) for name, table in self.tables.items()}
+        return new
+
+    def encode(self, record: dict[str, Any]) -> dict[str, Any]:
+        """Replace a ``to_dict`` record's terms with their numbers, in place."""
+        cuisine, neighborhood, features = (self.tables[name] for name in VOCABULARY_FIELDS)
+        record["cuisine"] = [cuisine.id(term) for term in record["cuisine"]]
+        if record["neighborhood"] is not None:
+            record["neighborhood"] = neighborhood.id(record["neighborhood"])
+        record["features"] = [features.id(term) for term in record["features"]]
+        return record
+
+    def decode(self, record: dict[str, Any]) -> dict[str, Any]:
+        """Replace a stored record's term numbers with the terms, in place.
+
+        Values that are already terms, from files written before
+        vocabularies, are left alone.
+        """
+        cuisine, neighborhood, features = (self.tables[name].terms for name in VOCABULARY_FIELDS)
+        value = record.get("cuisine")
+        if isinstance(value, list):
+            record["cuisine"] = [cuisine[v] if isinstance(v, int) else v for v in value]
+        value = record.get("neighborhood")
+        if isinstance(value, int):
+            record["neighborhood"] = neighborhood[value]
+        value = record.get("features")
+        if isinstance(value, list):
+            record["features"] = [features[v] if isinstance(v, int) else v for v in value]
+        return record
@@ -132,7 +132,7 @@ def sample_restaurant():
     return Restaurant(
         slug="the-capital-grille",
         name="The Capital Grille",
-        cuisine="Steakhouse",
+        cuisine=["Steakhouse"],
         neighborhood="Back Bay",
         detail_url="https://www.restaurantweekboston.com/restaurant/the-capital-grille/",
         availability=Availability(lunch=True, dinner=True, brunch=False),
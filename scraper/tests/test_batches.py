@@ -0,0 +1,170 @@
+"""Tests for scraper.loader.batches."""
+
+import json
+import threading
+import time
+
+import pytest
+
+from scraper.loader.batches import BatchUpserter, UpsertAborted, byte_batches, is_row_error
+
+
+class PostgrestError(Exception):
+    """Shaped like postgrest's APIError, which carries the SQLSTATE as ``code``."""
+
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+
+class StubRestaurants:
+    """An in-memory stand-in for the PostgREST restaurants table.
+
+    Upserts are all-or-nothing per request, like PostgREST's: a row
+    without a name fails the whole batch, as the NOT NULL constraint would.
+    """
+
+    def __init__(self, delay=0.0, flaky=0, down_after=None):
+        self.rows = {}
+        self.requests = []
+        self.delay = delay
+        self.flaky = flaky
+        self.down_after = down_after
+        self.in_flight = self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def upsert(self, batch):
+        with self._lock:
+            self.requests.append([row["slug"] for row in batch])
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            with self._lock:
+                if self.flaky:
+                    self.flaky -= 1
+                    raise ConnectionError("connection reset")
+                if self.down_after is not None and len(self.requests) > self.down_after:
+                    raise ConnectionError("connection refused")
+            if any(row["name"] is None for row in batch):
+                raise PostgrestError(
+                    'null value in column "name" violates not-null constraint', "23502"
+                )
+            with self._lock:
+                self.rows.update((row["slug"], row) for row in batch)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _rows(count, menu_size=0):
+    return [{"slug": f"r{i}", "name": f"R{i}", "menu": "x" * menu_size} for i in range(count)]
+
+
+def _size(batch):
+    return len(json.dumps(batch, separators=(",", ":")).encode())
+
+
+class TestByteBatches:
+    def test_batches_stay_within_budget(self):
+        rows = _rows(10, menu_size=100) + _rows(1, menu_size=1000)
+        batches = list(byte_batches(rows, max_bytes=500))
+
+        assert [row for batch in batches for row in batch] == rows
+        assert all(_size(batch) <= 500 for batch in batches[:-1])
+        assert len(batches[0]) == 3
+        assert batches[-1] == rows[-1:]  # too big for the budget, so on its own
+
+    def test_empty(self):
+        assert list(byte_batches([])) == []
+
+
+class TestBatchUpserter:
+    def test_batches_are_sent_concurrently(self):
+        table = StubRestaurants(delay=0.02)
+        rows = _rows(40, menu_size=100)
+        report = BatchUpserter(table.upsert, max_bytes=600, workers=4).upsert(rows)
+
+        assert len(table.requests) == 10
+        assert 1 < table.max_in_flight <= 4
+        assert sorted(table.rows) == sorted(row["slug"] for row in rows)
+        assert len(report.upserted) == 40 and report.failed == []
+
+    def test_failing_batch_is_retried_with_jittered_backoff(self):
+        table = StubRestaurants(flaky=2)
+        sleeps = []
+        report = BatchUpserter(
+            table.upsert, workers=1, retries=2, backoff=1.0, sleep=sleeps.append
+        ).upsert(_rows(5))
+
+        assert len(report.upserted) == 5
+        assert len(table.requests) == 3
+        assert len(sleeps) == 2
+        assert 0 <= sleeps[0] <= 1.0 and 0 <= sleeps[1] <= 2.0
+
+    def test_bad_row_is_isolated_by_bisection(self):
+        table = StubRestaurants()
+        rows = _rows(8)
+        rows[5]["name"] = None
+        progress = []
+        report = BatchUpserter(
+            table.upsert, workers=2, retries=1, sleep=lambda seconds: None, on_batch=progress.append
+        ).upsert(rows)
+
+        assert [failed.row["slug"] for failed in report.failed] == ["r5"]
+        assert report.failed[0].error.code == "23502"
+        assert sorted(table.rows) == sorted(f"r{i}" for i in range(8) if i != 5)
+        assert sorted(row["slug"] for row in report.upserted) == sorted(table.rows)
+        assert sum(len(batch) for batch in progress) == 7
+
+    def test_row_errors_are_not_retried(self):
+        table = StubRestaurants()
+        rows = _rows(1)
+        rows[0]["name"] = None
+        report = BatchUpserter(table.upsert, retries=2, sleep=lambda seconds: None).upsert(rows)
+
+        assert len(table.requests) == 1
+        assert [failed.row["slug"] for failed in report.failed] == ["r0"]
+
+    def test_service_errors_abort_after_retries(self):
+        table = StubRestaurants(down_after=2)
+        rows = _rows(6, menu_size=100)
+        upserter = BatchUpserter(
+            table.upsert, max_bytes=300, workers=1, retries=2, sleep=lambda seconds: None
+        )
+
+        with pytest.raises(UpsertAborted) as aborted:
+            upserter.upsert(rows)
+
+        assert isinstance(aborted.value.error, ConnectionError)
+        assert [row["slug"] for row in aborted.value.report.upserted] == ["r0", "r1", "r2", "r3"]
+        assert aborted.value.report.failed == []
+        # The failing batch was retried whole, never split, and no later batch was sent.
+        assert table.requests == [["r0", "r1"], ["r2", "r3"]] + [["r4", "r5"]] * 3
+
+
+class TestIsRowError:
+    class _HttpError(Exception):
+        def __init__(self, status_code):
+            super().__init__(f"HTTP {status_code}")
+            self.response = type("Response", (), {"status_code": status_code})()
+
+    @pytest.mark.parametrize("status", [400, 409, 422])
+    def test_row_level_statuses(self, status):
+        assert is_row_error(self._HttpError(status))
+
+    @pytest.mark.parametrize("status", [401, 403, 404, 500, 502, 503])
+    def test_service_statuses(self, status):
+        assert not is_row_error(self._HttpError(status))
+
+    def test_postgrest_codes(self):
+        assert is_row_error(PostgrestError("duplicate key", "23505"))
+        assert is_row_error(PostgrestError("invalid input syntax", "22P02"))
+        assert is_row_error(PostgrestError("Bad Request", "400"))
+        assert not is_row_error(PostgrestError("permission denied", "42501"))
+        assert not is_row_error(PostgrestError("JWT expired", "PGRST301"))
+        assert not is_row_error(PostgrestError("Service Unavailable", "503"))
+
+    def test_other_errors(self):
+        assert not is_row_error(ConnectionError("connection reset"))
+        assert not is_row_error(TimeoutError())
@@ -0,0 +1,396 @@
+"""Tests for the HTML cache."""
+
+import os
+
+import pytest
+import responses
+
+from scraper.fetcher import MENUS, Cache, CachedFetcher, PackBackend, RateLimitedClient
+from scraper.parser.scope import parse_soup
+
+
+def _cache(tmp_path) -> Cache:
+    return Cache(tmp_path)
+
+
+class TestCache:
+    def test_roundtrip_listing(self, tmp_path):
+        cache = _cache(tmp_path)
+        assert not cache.has_listing(1)
+
+        cache.save_listing(1, "<html>page 1</html>")
+
+        assert cache.has_listing(1)
+        assert cache.get_listing(1) == "<html>page 1</html>"
+
+    def test_roundtrip_detail_with_slash_in_slug(self, tmp_path):
+        cache = _cache(tmp_path)
+        cache.save_detail("a/b", "<html>detail</html>")
+
+        assert cache.get_detail("a/b") == "<html>detail</html>"
+        assert (tmp_path / "details" / "a_b.html").exists()
+
+    def test_missing_entries(self, tmp_path):
+        cache = _cache(tmp_path)
+        assert cache.get_listing(3) is None
+        assert cache.get_detail_entry("nope") is None
+
+    def test_entry_stores_validators(self, tmp_path):
+        cache = _cache(tmp_path)
+        cache.save_detail("slug", "<html/>", etag='"abc"', last_modified="Mon, 01 Jan 2024")
+
+        entry = cache.get_detail_entry("slug")
+
+        assert entry is not None
+        assert entry.body == b"<html/>"
+        assert entry.etag == '"abc"'
+        assert entry.last_modified == "Mon, 01 Jan 2024"
+        assert entry.fetched_at is not None
+
+    def test_entry_without_validators(self, tmp_path):
+        cache = _cache(tmp_path)
+        cache.save_listing(2, "<html/>", etag='"old"')
+        cache.save_listing(2, "<html>new</html>")
+
+        entry = cache.get_listing_entry(2)
+
+        assert entry is not None
+        assert entry.body == b"<html>new</html>"
+        assert entry.etag is None
+        assert entry.fetched_at is None
+
+    def test_url_keys_in_namespace(self, tmp_path):
+        cache = _cache(tmp_path)
+        url = "https://www.restaurantweekboston.com/fetch/mistral/dinner/?x=1"
+
+        cache.save(MENUS, url, "<p>menu</p>")
+
+        assert cache.has(MENUS, url)
+        assert cache.get(MENUS, url) == "<p>menu</p>"
+        assert not cache.has(MENUS, url.replace("dinner", "lunch"))
+        [path] = (tmp_path / "menus").glob("*.html")
+        assert path.name.startswith("www.restaurantweekboston.com_fetch_mistral_dinner")
+
+    def test_bytes_stored_verbatim_with_charset(self, tmp_path):
+        cache = _cache(tmp_path)
+        cache.save_detail("slug", "café".encode("latin-1"), encoding="ISO-8859-1")
+
+        entry = cache.get_detail_entry("slug")
+
+        assert entry is not None
+        assert entry.body == b"caf\xe9"
+        assert entry.encoding == "ISO-8859-1"
+        assert cache.get_detail("slug") == "café"
+        assert (tmp_path / "details" / "slug.html").read_bytes() == b"caf\xe9"
+
+    def test_text_is_recorded_as_utf8(self, tmp_path):
+        cache = _cache(tmp_path)
+        html = '<meta charset="iso-8859-1"><p>1 Café St</p>'
+        cache.save_detail("slug", html)
+
+        entry = cache.get_detail_entry("slug")
+
+        assert entry is not None
+        assert entry.encoding == "utf-8"
+        soup = parse_soup(entry.body, entry.encoding)
+        assert soup.p is not None and soup.p.get_text() == "1 Café St"
+        assert not (tmp_path / "details" / "slug.meta.json").exists()
+
+    def test_legacy_text_entries_read_as_utf8(self, tmp_path):
+        path = tmp_path / "details" / "slug.html"
+        path.parent.mkdir()
+        path.write_text('<meta charset="iso-8859-1">Café', encoding="utf-8")
+        path.with_suffix(".meta.json").write_text('{"etag": "\\"x\\""}', encoding="utf-8")
+
+        entry = _cache(tmp_path).get_detail_entry("slug")
+
+        assert entry is not None
+        assert (entry.encoding, entry.etag) == ("utf-8", '"x"')
+        assert entry.text.endswith("Café")
+
+    def test_bytes_without_charset_keep_none(self, tmp_path):
+        cache = _cache(tmp_path)
+        cache.save_detail("slug", b"caf\xe9")
+
+        entry = cache.get_detail_entry("slug")
+
+        assert entry is not None
+        assert entry.encoding is None
+
+    def test_namespaces_are_separate(self, tmp_path):
+        cache = _cache(tmp_path)
+        cache.save("listings", "page_1", "listing")
+        cache.save("details", "page_1", "detail")
+
+        assert cache.get("listings", "page_1") == "listing"
+        assert cache.get("details", "page_1") == "detail"
+
+
+class TestPackBackend:
+    def _pack(self, tmp_path) -> Cache:
+        return Cache(tmp_path, backend=PackBackend(tmp_path / "cache.pack"))
+
+    def test_roundtrip_across_reopen(self, tmp_path):
+        with self._pack(tmp_path) as cache:
+            cache.save_listing(1, "<html>page 1</html>")
+            cache.save_detail("slug", "<html/>", etag='"abc"')
+            assert cache.get_listing(1) == "<html>page 1</html>"
+
+        assert (tmp_path / "cache.pack.idx").exists()
+        with self._pack(tmp_path) as cache:
+            assert cache.get_listing(1) == "<html>page 1</html>"
+            entry = cache.get_detail_entry("slug")
+            assert entry is not None
+            assert entry.etag == '"abc"'
+            assert entry.fetched_at is not None
+            assert not cache.has_listing(2)
+
+    def test_bytes_and_charset_across_reopen(self, tmp_path):
+        with self._pack(tmp_path) as cache:
+            cache.save_detail("slug", b"caf\xe9", encoding="ISO-8859-1")
+
+        with self._pack(tmp_path) as cache:
+            entry = cache.get_detail_entry("slug")
+            assert entry is not None
+            assert (entry.body, entry.encoding) == (b"caf\xe9", "ISO-8859-1")
+
+    def test_overwrite_returns_latest(self, tmp_path):
+        with self._pack(tmp_path) as cache:
+            cache.save(MENUS, "https://example.com/m", "old")
+            assert cache.get(MENUS, "https://example.com/m") == "old"
+            cache.save(MENUS, "https://example.com/m", "new")
+            assert cache.get(MENUS, "https://example.com/m") == "new"
+
+    def test_records_are_compressed(self, tmp_path):
+        body = "<tr><td>dish</td></tr>" * 1000
+        with self._pack(tmp_path) as cache:
+            cache.save_detail("slug", body)
+
+        assert (tmp_path / "cache.pack").stat().st_size < len(body) / 10
+
+    def test_rebuilds_missing_index(self, tmp_path):
+        with self._pack(tmp_path) as cache:
+            cache.save_listing(1, "one")
+            cache.save_listing(2, "two")
+        (tmp_path / "cache.pack.idx").unlink()
+
+        with self._pack(tmp_path) as cache:
+            assert cache.get_listing(1) == "one"
+            assert cache.get_listing(2) == "two"
+
+    def test_scans_records_written_after_index(self, tmp_path):
+        with self._pack(tmp_path) as cache:
+            cache.save_listing(1, "one")
+        backend = PackBackend(tmp_path / "cache.pack")
+        Cache(tmp_path, backend=backend).save_listing(2, "two")
+        backend._file.close()  # simulate a crash: records flushed, index not rewritten
+
+        with self._pack(tmp_path) as cache:
+            assert cache.get_listing(1) == "one"
+            assert cache.get_listing(2) == "two"
+
+    def test_drops_torn_record(self, tmp_path):
+        with self._pack(tmp_path) as cache:
+            cache.save_listing(1, "one")
+        (tmp_path / "cache.pack.idx").unlink()
+        size = (tmp_path / "cache.pack").stat().st_size
+        with open(tmp_path / "cache.pack", "ab") as f:
+            f.write(b"REC1\x08\x00")
+
+        with self._pack(tmp_path) as cache:
+            assert cache.get_listing(1) == "one"
+            cache.save_listing(2, "two")
+            assert cache.get_listing(2) == "two"
+        assert (tmp_path / "cache.pack").stat().st_size > size
+
+    def test_resaving_across_sessions_stays_bounded(self, tmp_path):
+        bodies = {page: os.urandom(500).hex() for page in range(10)}
+        sizes = []
+        for _ in range(5):
+            with self._pack(tmp_path) as cache:
+                for page, body in bodies.items():
+                    cache.save_listing(page, body)
+            sizes.append((tmp_path / "cache.pack").stat().st_size)
+
+        assert max(sizes) < sizes[0] * 1.5
+        with self._pack(tmp_path) as cache:
+            assert cache.get_listing(9) == bodies[9]
+
+    def test_rejects_foreign_file(self, tmp_path):
+        (tmp_path / "cache.pack").write_bytes(b"not a pack")
+
+        with pytest.raises(ValueError, match="not a cache pack"):
+            PackBackend(tmp_path / "cache.pack")
+
+
+class TestCachedFetcher:
+    @responses.activate
+    def test_trusts_cache_without_network(self, tmp_path):
+        cache = _cache(tmp_path)
+        cache.save(MENUS, "https://example.com/menu", "cached")
+
+        with RateLimitedClient(delay=0) as client:
+            result = CachedFetcher(client, cache, use_cache=True).load(
+                MENUS, "https://example.com/menu", "https://example.com/menu"
+            )
+
+        assert result.text == "cached"
+        assert result.source == "cached"
+        assert len(responses.calls) == 0
+
+    @responses.activate
+    def test_fetches_and_stores_misses(self, tmp_path):
+        responses.add(
+            responses.GET, "https://example.com/menu", body="fresh", headers={"ETag": '"1"'}
+        )
+        cache = _cache(tmp_path)
+
+        with RateLimitedClient(delay=0) as client:
+            result = CachedFetcher(client, cache, use_cache=True).load(
+                MENUS, "https://example.com/menu", "https://example.com/menu"
+            )
+
+        assert result.source == "fetched"
+        entry = cache.get_entry(MENUS, "https://example.com/menu")
+        assert entry is not None
+        assert entry.body == b"fresh"
+        assert entry.etag == '"1"'
+
+    @responses.activate
+    def test_keeps_raw_bytes_and_charset(self, tmp_path):
+        responses.add(
+            responses.GET,
+            "https://example.com/menu",
+            body="café".encode("latin-1"),
+            content_type="text/html; charset=ISO-8859-1",
+        )
+        cache = _cache(tmp_path)
+
+        with RateLimitedClient(delay=0) as client:
+            fetcher = CachedFetcher(client, cache, use_cache=True)
+            fetched = fetcher.load(MENUS, "https://example.com/menu", "https://example.com/menu")
+            cached = fetcher.load(MENUS, "https://example.com/menu", "https://example.com/menu")
+
+        assert (fetched.content, fetched.encoding) == (b"caf\xe9", "ISO-8859-1")
+        assert (cached.content, cached.encoding) == (b"caf\xe9", "ISO-8859-1")
+        assert cached.from_cache
+        assert cached.text == "café"
+
+    @responses.activate
+    def test_without_cache_policy_skips_cache(self, tmp_path):
+        responses.add(responses.GET, "https://example.com/menu", body="fresh")
+        cache = _cache(tmp_path)
+        cache.save(MENUS, "https://example.com/menu", "cached")
+
+        with RateLimitedClient(delay=0) as client:
+            result = CachedFetcher(client, cache).load(
+                MENUS, "https://example.com/menu", "https://example.com/menu"
+            )
+
+        assert result.text == "fresh"
+        assert cache.get(MENUS, "https://example.com/menu") == "cached"
+
+
+class TestCachePolicy:
+    def _age(self, tmp_path, namespace: str, key: str, seconds: float) -> None:
+        path = tmp_path / namespace / f"{key}.html"
+        stat = path.stat()
+        os.utime(path, (stat.st_atime - seconds, stat.st_mtime - seconds))
+
+    def test_entries_expire_per_namespace(self, tmp_path):
+        cache = Cache(tmp_path, ttls={"listings": 60, "details": None})
+        cache.save_listing(1, "listing")
+        cache.save_detail("slug", "detail")
+        self._age(tmp_path, "listings", "page_1", 120)
+        self._age(tmp_path, "details", "slug", 10**6)
+
+        assert not cache.is_fresh("listings", cache.get_listing_entry(1))
+        assert cache.is_fresh("details", cache.get_detail_entry("slug"))
+        assert cache.stats()["listings"].expired == 1
+        assert cache.stats()["details"].expired == 0
+
+    @responses.activate
+    def test_stale_entries_are_refetched_with_validators(self, tmp_path):
+        responses.add(responses.GET, "https://example.com/page", status=304)
+        cache = Cache(tmp_path, ttls={MENUS: 60})
+        cache.save(MENUS, "page", "cached", etag='"v1"')
+        self._age(tmp_path, MENUS, "page", 120)
+
+        with RateLimitedClient(delay=0) as client:
+            result = CachedFetcher(client, cache, use_cache=True).load(
+                MENUS, "page", "https://example.com/page"
+            )
+
+        assert result.source == "revalidated"
+        assert result.text == "cached"
+        assert responses.calls[0].request.headers["If-None-Match"] == '"v1"'
+        assert cache.is_fresh(MENUS, cache.get_entry(MENUS, "page"))
+
+    @responses.activate
+    def test_revalidation_does_not_rewrite_packed_body(self, tmp_path):
+        responses.add(
+            responses.GET, "https://example.com/page", status=304, headers={"ETag": '"v2"'}
+        )
+        pack = tmp_path / "cache.pack"
+        with Cache(tmp_path, backend=PackBackend(pack), ttls={MENUS: 60}) as cache:
+            cache.save(MENUS, "page", "cached", etag='"v1"')
+        size = pack.stat().st_size
+
+        with Cache(tmp_path, backend=PackBackend(pack), ttls={MENUS: 0}) as cache:
+            with RateLimitedClient(delay=0) as client:
+                result = CachedFetcher(client, cache, use_cache=True).load(
+                    MENUS, "page", "https://example.com/page"
+                )
+            assert result.source == "revalidated"
+
+        assert pack.stat().st_size == size
+        with Cache(tmp_path, backend=PackBackend(pack), ttls={MENUS: 60}) as cache:
+            entry = cache.get_entry(MENUS, "page")
+            assert entry is not None
+            assert (entry.text, entry.etag) == ("cached", '"v2"')
+            assert cache.is_fresh(MENUS, entry)
+
+    def test_prune_expired(self, tmp_path):
+        cache = Cache(tmp_path, ttls={"listings": 60})
+        cache.save_listing(1, "old")
+        cache.save_listing(2, "new")
+        self._age(tmp_path, "listings", "page_1", 120)
+
+        result = cache.prune(expired=True)
+
+        assert result.expired == 1
+        assert not cache.has_listing(1)
+        assert cache.has_listing(2)
+
+    def test_prune_evicts_least_recently_used(self, tmp_path):
+        cache = Cache(tmp_path)
+        for page in (1, 2, 3):
+            cache.save_listing(page, "x" * 100)
+            self._age(tmp_path, "listings", f"page_{page}", 100 * (4 - page))
+        cache.get_listing(1)
+
+        result = cache.prune(max_bytes=250)
+
+        assert result.evicted == 1
+        assert result.freed == 100
+        assert cache.has_listing(1)
+        assert not cache.has_listing(2)
+        assert cache.has_listing(3)
+
+    def test_close_enforces_size_cap_on_pack(self, tmp_path):
+        pack = tmp_path / "cache.pack"
+        with Cache(tmp_path, backend=PackBackend(pack), max_bytes=None) as cache:
+            for page in range(10):
+                cache.save_listing(page, os.urandom(500).hex())
+            cache.get_listing(0)
+            full_size = cache.disk_usage()
+
+        with Cache(tmp_path, backend=PackBackend(pack), max_bytes=full_size // 2) as cache:
+            pass
+
+        with Cache(tmp_path, backend=PackBackend(pack), max_bytes=None) as cache:
+            assert cache.stats()["listings"].size <= full_size // 2
+            assert cache.disk_usage() < full_size // 2 + 100
+            assert cache.has_listing(0)
+            assert not cache.has_listing(1)
+            assert cache.get_listing(9) is not None
@@ -0,0 +1,511 @@
+"""Tests for the async crawl engine."""
+
+import functools
+import threading
+import time
+
+import pytest
+import responses
+
+from scraper.config import BASE_URL, LISTING_PAGE_URL, LISTING_URL
+from scraper.crawler import AsyncCrawler, PipelineCrawler
+from scraper.fetcher import Cache, CrawlJournal, RateLimitedClient
+from scraper.parser import DetailParser, ListingParser, ParseMemo
+from scraper.storage import JsonWriter, PreviousRun
+
+PAGE_2_HTML = """
+<html><body>
+    <div class="paginationControls">page 2 of 2</div>
+    <div id="restaurantID-legal-sea-foods" class="restaurantEntry">
+        <h4><a href="/restaurant/legal-sea-foods">Legal Sea Foods</a></h4>
+    </div>
+    <div id="restaurantID-mistral" class="restaurantEntry">
+        <h4><a href="/restaurant/mistral">Mistral</a></h4>
+        <p><strong>Dinner</strong>: $55</p>
+    </div>
+</body></html>
+"""
+
+DETAIL_HTML = """
+<html><body>
+    <p class="restAddress">1 Main Street, Boston, MA 02116</p>
+    <script>
+    var lunchMenuURL = "";
+    var dinnerMenuURL = "/fetch/{slug}/dinner/";
+    </script>
+</body></html>
+"""
+
+MENU_HTML = """
+<p><strong>MAINS</strong></p>
+<p>Grilled Steak<br />Sirloin</p>
+"""
+
+
+def _register_site(listing_html: str) -> None:
+    responses.add(responses.GET, LISTING_URL, body=listing_html)
+    responses.add(responses.GET, LISTING_PAGE_URL.format(page=2), body=PAGE_2_HTML)
+    for slug in ["the-capital-grille", "legal-sea-foods", "mistral"]:
+        responses.add(
+            responses.GET,
+            f"{BASE_URL}/restaurant/{slug}/",
+            body=DETAIL_HTML.replace("{slug}", slug),
+        )
+        responses.add(responses.GET, f"{BASE_URL}/fetch/{slug}/dinner/", body=MENU_HTML)
+
+
+def _site_body(url: str) -> str:
+    """The page ``_register_site`` serves at a mistral URL."""
+    return MENU_HTML if "/fetch/" in url else DETAIL_HTML.replace("{slug}", "mistral")
+
+
+def _counted(func, calls: list):
+    @functools.wraps(func)
+    def counted(*args, **kwargs):
+        calls.append(func.__qualname__)
+        return func(*args, **kwargs)
+
+    return counted
+
+
+def _crawler(
+    client: RateLimitedClient, tmp_path, concurrency: int = 4, crawler_class=AsyncCrawler, **kwargs
+) -> AsyncCrawler:
+    return crawler_class(
+        client=client,
+        cache=Cache(tmp_path),
+        listing_parser=ListingParser(),
+        detail_parser=DetailParser(),
+        concurrency=concurrency,
+        **kwargs,
+    )
+
+
+class TestAsyncCrawler:
+    @responses.activate
+    def test_crawl_dedupes_and_keeps_page_order(self, sample_listing_html, tmp_path):
+        _register_site(sample_listing_html.replace("page 1 of 3", "page 1 of 2"))
+
+        with RateLimitedClient(delay=0) as client:
+            restaurants = _crawler(client, tmp_path).run()
+
+        assert [r.slug for r in restaurants] == [
+            "the-capital-grille",
+            "legal-sea-foods",
+            "mistral",
+        ]
+
+    @pytest.mark.parametrize("crawler_class", [AsyncCrawler, PipelineCrawler])
+    @responses.activate
+    def test_details_start_while_listing_pages_load(
+        self, sample_listing_html, tmp_path, crawler_class
+    ):
+        detail_requested = threading.Event()
+
+        def page_2(request):
+            # Page 2 only answers once a page 1 restaurant's details are being fetched.
+            if not detail_requested.wait(timeout=5):
+                return (500, {}, "")
+            return (200, {}, PAGE_2_HTML)
+
+        def detail(request):
+            detail_requested.set()
+            return (200, {}, DETAIL_HTML.replace("{slug}", "the-capital-grille"))
+
+        responses.add(
+            responses.GET,
+            LISTING_URL,
+            body=sample_listing_html.replace("page 1 of 3", "page 1 of 2"),
+        )
+        responses.add_callback(responses.GET, LISTING_PAGE_URL.format(page=2), callback=page_2)
+        responses.add_callback(
+            responses.GET, f"{BASE_URL}/restaurant/the-capital-grille/", callback=detail
+        )
+        for slug in ["legal-sea-foods", "mistral"]:
+            responses.add(
+                responses.GET,
+                f"{BASE_URL}/restaurant/{slug}/",
+                body=DETAIL_HTML.replace("{slug}", slug),
+            )
+        for slug in ["the-capital-grille", "legal-sea-foods", "mistral"]:
+            responses.add(responses.GET, f"{BASE_URL}/fetch/{slug}/dinner/", body=MENU_HTML)
+
+        with RateLimitedClient(delay=0) as client:
+            restaurants = _crawler(client, tmp_path, crawler_class=crawler_class).run()
+
+        assert [r.slug for r in restaurants] == [
+            "the-capital-grille",
+            "legal-sea-foods",
+            "mistral",
+        ]
+
+    @pytest.mark.parametrize("crawler_class", [AsyncCrawler, PipelineCrawler])
+    @responses.activate
+    def test_incremental_fetches_only_changed_listings(
+        self, sample_listing_html, tmp_path, crawler_class
+    ):
+        _register_site(sample_listing_html.replace("page 1 of 3", "page 1 of 2"))
+        output = tmp_path / "restaurants.json"
+
+        previous = PreviousRun(output)
+        with RateLimitedClient(delay=0) as client:
+            expected = _crawler(
+                client, tmp_path, crawler_class=crawler_class, reuse=previous.reuse
+            ).run()
+        JsonWriter(output).write(expected)
+        previous.save()
+
+        responses.replace(
+            responses.GET,
+            LISTING_PAGE_URL.format(page=2),
+            body=PAGE_2_HTML.replace("$55", "$60"),
+        )
+        responses.calls.reset()
+        previous = PreviousRun(output)
+        with RateLimitedClient(delay=0) as client:
+            actual = _crawler(
+                client, tmp_path, crawler_class=crawler_class, reuse=previous.reuse
+            ).run()
+
+        assert previous.reused == 2
+        assert sorted(call.request.url for call in responses.calls) == [
+            LISTING_URL,
+            LISTING_PAGE_URL.format(page=2),
+            f"{BASE_URL}/fetch/mistral/dinner/",
+            f"{BASE_URL}/restaurant/mistral/",
+        ]
+        assert [r.slug for r in actual] == [r.slug for r in expected]
+        assert actual[2].pricing.dinner == 60
+        assert actual[0].to_dict() == expected[0].to_dict()
+
+    @pytest.mark.parametrize("crawler_class", [AsyncCrawler, PipelineCrawler])
+    @pytest.mark.parametrize(
+        "failing_url", [f"{BASE_URL}/restaurant/mistral/", f"{BASE_URL}/fetch/mistral/dinner/"]
+    )
+    @responses.activate
+    def test_incremental_refetches_after_failed_fetch(
+        self, sample_listing_html, tmp_path, crawler_class, failing_url
+    ):
+        _register_site(sample_listing_html.replace("page 1 of 3", "page 1 of 2"))
+        responses.replace(responses.GET, failing_url, body=ConnectionError("reset"))
+        output = tmp_path / "restaurants.json"
+
+        previous = PreviousRun(output)
+        with RateLimitedClient(delay=0) as client:
+            first = _crawler(
+                client,
+                tmp_path,
+                crawler_class=crawler_class,
+                reuse=previous.reuse,
+                on_error=previous.forget,
+            ).run()
+        JsonWriter(output).write(first)
+        previous.save()
+        assert first[2].menu is None
+
+        responses.replace(responses.GET, failing_url, body=_site_body(failing_url))
+        responses.calls.reset()
+        previous = PreviousRun(output)
+        with RateLimitedClient(delay=0) as client:
+            actual = _crawler(
+                client,
+                tmp_path,
+                crawler_class=crawler_class,
+                reuse=previous.reuse,
+                on_error=previous.forget,
+            ).run()
+
+        assert previous.reused == 2
+        assert failing_url in {call.request.url for call in responses.calls}
+        assert actual[2].menu is not None
+
+    @pytest.mark.parametrize("crawler_class", [AsyncCrawler, PipelineCrawler])
+    @responses.activate
+    def test_resume_reuses_journaled_pages(
+        self, sample_listing_html, tmp_path, crawler_class, monkeypatch
+    ):
+        _register_site(sample_listing_html.replace("page 1 of 3", "page 1 of 2"))
+        journal_path = tmp_path / "journal.jsonl"
+        written = []
+
+        def crash_on_last(restaurant):
+            written.append(restaurant)
+            if len(written) == 3:
+                raise KeyboardInterrupt
+
+        # As the CLI does with --journal, the crawl is memoized without --use-cache.
+        with pytest.raises(KeyboardInterrupt):
+            with RateLimitedClient(delay=0) as client, CrawlJournal(journal_path) as journal:
+                _crawler(
+                    client,
+                    tmp_path,
+                    crawler_class=crawler_class,
+                    journal=journal,
+                    parse_memo=ParseMemo(Cache(tmp_path)),
+                    on_complete=crash_on_last,
+                ).run()
+        fetched = len(responses.calls)
+        assert set(journal.states.values()) == {"fetched"}
+
+        parser_calls = []
+        for parser_class, name in [
+            (ListingParser, "parse_page"),
+            (ListingParser, "parse"),
+            (DetailParser, "parse"),
+            (DetailParser, "parse_menu_html"),
+        ]:
+            monkeypatch.setattr(
+                parser_class, name, _counted(getattr(parser_class, name), parser_calls)
+            )
+        with (
+            RateLimitedClient(delay=0) as client,
+            CrawlJournal(journal_path, resume=True) as journal,
+        ):
+            actual = _crawler(
+                client,
+                tmp_path,
+                crawler_class=crawler_class,
+                journal=journal,
+                parse_memo=ParseMemo(Cache(tmp_path)),
+            ).run()
+
+        assert len(responses.calls) == fetched
+        assert parser_calls == []
+        by_slug = {r.slug: r.to_dict() for r in written}
+        assert {r.slug: r.to_dict() for r in actual} == by_slug
+
+    @responses.activate
+    def test_crawl_fetches_details_and_menus(self, sample_listing_html, tmp_path):
+        _register_site(sample_listing_html.replace("page 1 of 3", "page 1 of 2"))
+
+        with RateLimitedClient(delay=0) as client:
+            restaurants = _crawler(client, tmp_path).run()
+
+        mistral = next(r for r in restaurants if r.slug == "mistral")
+        assert mistral.address == "1 Main Street, Boston, MA 02116"
+        assert mistral.menu is not None
+        assert [m.meal_type for m in mistral.menu.menus] == ["dinner"]
+        assert mistral.menu.menus[0].price == 55
+        assert mistral.menu_urls == {}
+
+    @responses.activate
+    def test_listings_only(self, sample_listing_html, tmp_path):
+        _register_site(sample_listing_html.replace("page 1 of 3", "page 1 of 2"))
+
+        with RateLimitedClient(delay=0) as client:
+            restaurants = _crawler(client, tmp_path).run(listings_only=True)
+
+        assert len(restaurants) == 3
+        assert all(r.menu is None for r in restaurants)
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_detail_errors_do_not_abort_crawl(self, sample_listing_html, tmp_path):
+        responses.add(responses.GET, LISTING_URL, body=sample_listing_html)
+        responses.add(responses.GET, f"{BASE_URL}/restaurant/the-capital-grille/", status=404)
+        responses.add(
+            responses.GET,
+            f"{BASE_URL}/restaurant/legal-sea-foods/",
+            body=DETAIL_HTML.replace("{slug}", "legal-sea-foods"),
+        )
+        responses.add(responses.GET, f"{BASE_URL}/fetch/legal-sea-foods/dinner/", body=MENU_HTML)
+
+        with RateLimitedClient(delay=0) as client:
+            restaurants = _crawler(client, tmp_path).run(max_pages=1)
+
+        assert restaurants[0].address is not None
+        assert restaurants[1].menu is not None
+
+    @responses.activate
+    def test_listing_pages_fetched_in_parallel_with_cap(self, tmp_path):
+        total_pages = 6
+        lock = threading.Lock()
+        in_flight = 0
+        max_in_flight = 0
+
+        def listing_page(page: int) -> str:
+            entries = f"""
+            <div id="restaurantID-shared" class="restaurantEntry">
+                <h4><a href="/restaurant/shared">Shared {page}</a></h4>
+            </div>
+            <div id="restaurantID-only-{page}" class="restaurantEntry">
+                <h4><a href="/restaurant/only-{page}">Only {page}</a></h4>
+            </div>
+            """
+            return f"""<html><body>
+            <div class="paginationControls">page {page} of {total_pages}</div>
+            {entries}</body></html>"""
+
+        def callback(request):
+            nonlocal in_flight, max_in_flight
+            # Callbacks ignore query strings, so answer the page actually requested.
+            page = int(request.url.rsplit("page=", 1)[1])
+            with lock:
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+            # Later pages answer first so completion order differs from page order.
+            time.sleep(0.01 * (total_pages - page + 1))
+            with lock:
+                in_flight -= 1
+            return (200, {}, listing_page(page))
+
+        responses.add(responses.GET, LISTING_URL, body=listing_page(1))
+        for page in range(2, total_pages + 1):
+            responses.add_callback(
+                responses.GET, LISTING_PAGE_URL.format(page=page), callback=callback
+            )
+
+        with RateLimitedClient(delay=0) as client:
+            crawler = AsyncCrawler(
+                client=client,
+                cache=Cache(tmp_path),
+                listing_parser=ListingParser(),
+                detail_parser=DetailParser(),
+                concurrency=8,
+                listing_concurrency=2,
+            )
+            restaurants = crawler.run(listings_only=True)
+
+        assert max_in_flight == 2
+        assert [r.slug for r in restaurants] == ["shared", "only-1"] + [
+            f"only-{page}" for page in range(2, total_pages + 1)
+        ]
+        assert restaurants[0].name == "Shared 1"
+
+    @responses.activate
+    def test_process_pool_parsing_matches_inline(self, sample_listing_html, tmp_path):
+        _register_site(sample_listing_html.replace("page 1 of 3", "page 1 of 2"))
+
+        with RateLimitedClient(delay=0) as client:
+            expected = _crawler(client, tmp_path).run()
+            actual = _crawler(client, tmp_path, parse_workers=2).run()
+
+        assert [r.to_dict() for r in actual] == [r.to_dict() for r in expected]
+        assert not any(r.menu_urls for r in actual)
+
+    @responses.activate
+    def test_revalidate_uses_conditional_requests(self, sample_listing_html, tmp_path):
+        cache = Cache(tmp_path)
+        cache.save_listing(1, sample_listing_html, etag='"listing-v1"')
+        responses.add(responses.GET, LISTING_URL, status=304)
+
+        with RateLimitedClient(delay=0) as client:
+            crawler = AsyncCrawler(
+                client=client,
+                cache=cache,
+                listing_parser=ListingParser(),
+                detail_parser=DetailParser(),
+                concurrency=2,
+                revalidate=True,
+            )
+            restaurants = crawler.run(max_pages=1, listings_only=True)
+
+        assert len(restaurants) == 2
+        assert responses.calls[0].request.headers["If-None-Match"] == '"listing-v1"'
+
+    @responses.activate
+    def test_fully_cached_crawl_uses_no_network(self, sample_listing_html, tmp_path):
+        _register_site(sample_listing_html.replace("page 1 of 3", "page 1 of 2"))
+        with RateLimitedClient(delay=0) as client:
+            first = _crawler(client, tmp_path, use_cache=True).run()
+
+        responses.reset()
+        with RateLimitedClient(delay=0) as client:
+            second = _crawler(client, tmp_path, use_cache=True).run()
+
+        assert len(responses.calls) == 0
+        assert [r.to_dict() for r in second] == [r.to_dict() for r in first]
+        assert second[-1].menu is not None
+
+    def test_rejects_zero_concurrency(self, tmp_path):
+        with pytest.raises(ValueError):
+            _crawler(RateLimitedClient(delay=0), tmp_path, concurrency=0)
+
+
+class TestPipelineCrawler:
+    @responses.activate
+    def test_matches_phase_by_phase_output(self, sample_listing_html, tmp_path):
+        _register_site(sample_listing_html.replace("page 1 of 3", "page 1 of 2"))
+
+        with RateLimitedClient(delay=0) as client:
+            expected = _crawler(client, tmp_path).run()
+            actual = _crawler(client, tmp_path, crawler_class=PipelineCrawler, queue_size=1).run()
+
+        assert [r.to_dict() for r in actual] == [r.to_dict() for r in expected]
+
+    @responses.activate
+    def test_process_pool_parsing(self, sample_listing_html, tmp_path):
+        _register_site(sample_listing_html.replace("page 1 of 3", "page 1 of 2"))
+
+        with RateLimitedClient(delay=0) as client:
+            expected = _crawler(client, tmp_path).run()
+            actual = _crawler(
+                client, tmp_path, crawler_class=PipelineCrawler, parse_workers=2
+            ).run()
+
+        assert [r.to_dict() for r in actual] == [r.to_dict() for r in expected]
+
+    @responses.activate
+    def test_writer_stage_receives_each_restaurant(self, sample_listing_html, tmp_path):
+        _register_site(sample_listing_html.replace("page 1 of 3", "page 1 of 2"))
+        written = []
+
+        with RateLimitedClient(delay=0) as client:
+            restaurants = _crawler(
+                client, tmp_path, crawler_class=PipelineCrawler, on_complete=written.append
+            ).run()
+
+        assert sorted(r.slug for r in written) == sorted(r.slug for r in restaurants)
+        assert all(r.menu is not None for r in written)
+
+    @pytest.mark.parametrize("crawler_class", [AsyncCrawler, PipelineCrawler])
+    @pytest.mark.parametrize("listings_only", [False, True])
+    @responses.activate
+    def test_streaming_without_keeping_results(
+        self, sample_listing_html, tmp_path, crawler_class, listings_only
+    ):
+        _register_site(sample_listing_html.replace("page 1 of 3", "page 1 of 2"))
+        written = []
+
+        with RateLimitedClient(delay=0) as client:
+            restaurants = _crawler(
+                client,
+                tmp_path,
+                crawler_class=crawler_class,
+                on_complete=written.append,
+                keep_results=False,
+            ).run(listings_only=listings_only)
+
+        assert restaurants == []
+        assert sorted(r.slug for r in written) == [
+            "legal-sea-foods",
+            "mistral",
+            "the-capital-grille",
+        ]
+        assert all((r.menu is None) == listings_only for r in written)
+
+    @responses.activate
+    def test_listings_only(self, sample_listing_html, tmp_path):
+        _register_site(sample_listing_html.replace("page 1 of 3", "page 1 of 2"))
+
+        with RateLimitedClient(delay=0) as client:
+            restaurants = _crawler(client, tmp_path, crawler_class=PipelineCrawler).run(
+                listings_only=True
+            )
+
+        assert [r.slug for r in restaurants] == [
+            "the-capital-grille",
+            "legal-sea-foods",
+            "mistral",
+        ]
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_listing_error_stops_pipeline(self, sample_listing_html, tmp_path):
+        _register_site(sample_listing_html.replace("page 1 of 3", "page 1 of 2"))
+        responses.replace(responses.GET, LISTING_PAGE_URL.format(page=2), status=404)
+
+        with RateLimitedClient(delay=0) as client:
+            crawler = _crawler(client, tmp_path, crawler_class=PipelineCrawler)
+            with pytest.raises(Exception, match="404"):
+                crawler.run()
@@ -29,13 +29,13 @@ class TestDetailParser:
         restaurant = Restaurant(
             slug="test",
             name="Test",
-            cuisine="Italian",
+            cuisine=["Italian"],
             neighborhood="North End",
         )
         parser = DetailParser()
         result = parser.parse(sample_detail_html, restaurant)
 
-        assert result.cuisine == "Italian"
+        assert result.cuisine == ["Italian"]
         assert result.neighborhood == "North End"
 
     def test_parse_menu_html(self):
@@ -79,9 +79,8 @@ class TestDetailParser:
         restaurant = Restaurant(slug="test-restaurant", name="Test")
         result = parser.parse(html, restaurant)
 
-        assert hasattr(result, "_menu_urls")
-        assert result._menu_urls["lunch"] == "/fetch/test-restaurant/lunch/"
-        assert result._menu_urls["dinner"] == "/fetch/test-restaurant/dinner/"
+        assert result.menu_urls["lunch"] == "/fetch/test-restaurant/lunch/"
+        assert result.menu_urls["dinner"] == "/fetch/test-restaurant/dinner/"
 
     def test_extract_menu_urls_empty(self):
         parser = DetailParser()
@@ -94,8 +93,24 @@ class TestDetailParser:
         restaurant = Restaurant(slug="test-restaurant", name="Test")
         result = parser.parse(html, restaurant)
 
-        menu_urls = getattr(result, "_menu_urls", {})
-        assert "lunch" not in menu_urls or not menu_urls["lunch"]
+        assert result.menu_urls == {}
+
+    def test_empty_placeholder_does_not_hide_later_menu_url(self):
+        parser = DetailParser()
+        html = """
+        <script>
+        var lunchMenuURL = "";
+        var dinnerMenuURL = "";
+        var brunchMenuURL = "";
+        </script>
+        <script>
+        var lunchMenuURL = "/fetch/x/lunch/";
+        var dinnerMenuURL = "/fetch/x/dinner/";
+        </script>
+        """
+        result = parser.parse(html, Restaurant(slug="x", name="X"))
+
+        assert result.menu_urls == {"lunch": "/fetch/x/lunch/", "dinner": "/fetch/x/dinner/"}
 
     def test_parse_dish_name_extracts_only_name(self):
         parser = DetailParser()
@@ -109,3 +124,89 @@ class TestDetailParser:
         appetizers = meal_menu.courses[0]
         assert "Shrimp Cocktail" in appetizers.options[0]
         assert "cocktail sauce" not in appetizers.options[0]
+
+    def test_scan_scripts_finds_menus_and_coordinates(self):
+        parser = DetailParser()
+        html = """
+        <script>var map = {lat: 42.35, lng: -71.06};</script>
+        <script>
+        var brunchMenuURL = "/fetch/x/brunch/";
+        var dinnerMenuURL = "/fetch/x/dinner/";
+        var lunchMenuURL = "";
+        </script>
+        <script>var map = {latitude: 1.0, longitude: 2.0};</script>
+        """
+        result = parser.parse(html, Restaurant(slug="x", name="X"))
+
+        assert list(result.menu_urls) == ["dinner", "brunch"]
+        assert result.coordinates is not None
+        assert (result.coordinates.latitude, result.coordinates.longitude) == (42.35, -71.06)
+
+    def test_script_coordinates_need_lat_and_lng_together(self):
+        parser = DetailParser()
+        html = """
+        <script>var lat = 10;</script>
+        <script>var lng = 20;</script>
+        <script>var pos = {"latitude": 42.1, "longitude": -71.2};</script>
+        """
+        result = parser.parse(html, Restaurant(slug="x", name="X"))
+
+        assert result.coordinates is not None
+        assert (result.coordinates.latitude, result.coordinates.longitude) == (42.1, -71.2)
+
+    def test_data_attribute_coordinates_win(self):
+        parser = DetailParser()
+        html = """
+        <div id="map" data-lat="42.5" data-lng="-71.5"></div>
+        <script>var map = {lat: 1, lng: 2};</script>
+        """
+        result = parser.parse(html, Restaurant(slug="x", name="X"))
+
+        assert result.coordinates is not None
+        assert (result.coordinates.latitude, result.coordinates.longitude) == (42.5, -71.5)
+
+    def test_scoped_parse_keeps_nested_regions(self):
+        parser = DetailParser()
+        html = """
+        <html><body>
+            <nav><p>Call us: 800-555-0100</p></nav>
+            <div class="col"><div class="hero-image"><img data-src="/hero.png" /></div></div>
+            <section><p class="restAddress">1 Main Street,
+                Boston, MA</p></section>
+            <ul><li><span class="contact-phone">(617) 555-0199</span></li></ul>
+        </body></html>
+        """
+        result = parser.parse(html, Restaurant(slug="x", name="X"))
+
+        assert result.image_url == "https://www.restaurantweekboston.com/hero.png"
+        assert result.address == "1 Main Street, Boston, MA"
+        assert result.phone == "(617) 555-0199"
+
+    def test_parse_bytes_with_declared_charsets(self):
+        parser = DetailParser()
+        html = """<html><head><meta charset="iso-8859-1"></head><body>
+            <p class="restAddress">1 Caf\xe9 Street, Boston, MA</p>
+            <script>var dinnerMenuURL = "/fetch/x/dinner/";</script>
+        </body></html>""".encode("latin-1")
+
+        from_meta = parser.parse(html, Restaurant(slug="x", name="X"))
+        from_header = parser.parse(
+            html.replace(b"iso-8859-1", b"utf-8"), Restaurant(slug="x", name="X"), "latin-1"
+        )
+
+        assert from_meta.address == from_header.address == "1 Caf\xe9 Street, Boston, MA"
+        assert from_meta.menu_urls == {"dinner": "/fetch/x/dinner/"}
+
+    def test_parse_menu_html_from_bytes(self):
+        meal_menu = DetailParser().parse_menu_html(
+            "<p><strong>MAINS</strong></p><p>Crème brûlée<br />x</p>".encode(), "dinner"
+        )
+
+        assert meal_menu.courses[0].options == ["Crème brûlée"]
+
+    def test_phone_falls_back_to_page_text(self):
+        parser = DetailParser()
+        html = "<html><body><div><p>Reservations: 617.555.0123</p></div></body></html>"
+        result = parser.parse(html, Restaurant(slug="x", name="X"))
+
+        assert result.phone == "617.555.0123"
@@ -1,8 +1,14 @@
 """Tests for HTTP client."""
 
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
 import responses
 
-from scraper.fetcher import RateLimitedClient
+from scraper.fetcher import AdaptiveRateLimiter, CacheEntry, RateLimitedClient, RateLimiter
+from scraper.fetcher.http_client import declared_charset, parse_retry_after
 
 
 class TestRateLimitedClient:
@@ -69,3 +75,294 @@ class TestRateLimitedClient:
 
         assert result == "Success"
         assert len(responses.calls) == 2
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps: list[float] = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRateLimiter:
+    def test_spaces_requests_by_rate(self):
+        clock = FakeClock()
+        limiter = RateLimiter(rate=4, clock=clock.time, sleep=clock.sleep)
+
+        for _ in range(3):
+            limiter.acquire()
+
+        assert clock.sleeps == [0.25, 0.25]
+
+    def test_reserves_slots_for_concurrent_callers(self):
+        clock = FakeClock()
+        sleeps: list[float] = []
+        limiter = RateLimiter(rate=2, clock=clock.time, sleep=sleeps.append)
+
+        for _ in range(3):
+            limiter.acquire()
+
+        assert sleeps == [0.5, 1.0]
+
+    def test_unlimited_rate_never_sleeps(self):
+        clock = FakeClock()
+        limiter = RateLimiter(rate=None, clock=clock.time, sleep=clock.sleep)
+
+        for _ in range(5):
+            limiter.acquire()
+
+        assert clock.sleeps == []
+
+    @responses.activate
+    def test_client_uses_shared_limiter(self):
+        responses.add(responses.GET, "https://example.com/test", body="Test", status=200)
+        clock = FakeClock()
+        limiter = RateLimiter(rate=1, clock=clock.time, sleep=clock.sleep)
+
+        with RateLimitedClient(rate_limiter=limiter) as client:
+            client.get("https://example.com/test")
+            client.get("https://example.com/test")
+
+        assert clock.sleeps == [1.0]
+
+
+class TestAdaptiveRateLimiter:
+    def _limiter(self, clock: FakeClock, **kwargs) -> AdaptiveRateLimiter:
+        options = {"min_rate": 0.5, "max_rate": 4.0, "increase": 0.5}
+        options.update(kwargs)
+        return AdaptiveRateLimiter(2.0, clock=clock.time, sleep=clock.sleep, **options)
+
+    def test_additive_increase_when_healthy(self):
+        limiter = self._limiter(FakeClock())
+
+        limiter.record(200, 0.1)
+        limiter.record(200, 0.1)
+
+        assert limiter.rate == 3.0
+
+    def test_increase_is_capped(self):
+        limiter = self._limiter(FakeClock())
+
+        for _ in range(10):
+            limiter.record(200, 0.1)
+
+        assert limiter.rate == 4.0
+
+    def test_multiplicative_decrease_on_throttle(self):
+        limiter = self._limiter(FakeClock())
+
+        limiter.record(429, 0.1)
+
+        assert limiter.rate == 1.0
+
+    def test_burst_of_failures_decreases_once_per_cooldown(self):
+        clock = FakeClock()
+        limiter = self._limiter(clock)
+
+        limiter.record(503, 0.1)
+        limiter.record(503, 0.1)
+        assert limiter.rate == 1.0
+
+        clock.now += 5
+        limiter.record(None, 0.1)
+        assert limiter.rate == 0.5
+
+    def test_rising_latency_backs_off(self):
+        limiter = self._limiter(FakeClock(), latency_factor=2.0)
+
+        limiter.record(200, 0.1)
+        for _ in range(10):
+            limiter.record(200, 2.0)
+
+        assert limiter.rate < 2.5
+
+    def test_latency_shift_is_not_held_against_the_rate(self):
+        clock = FakeClock()
+        limiter = self._limiter(clock, latency_factor=3.0)
+
+        for _ in range(20):
+            limiter.record(304, 0.01)
+            clock.now += 0.5
+        for _ in range(300):
+            limiter.record(200, 0.3)
+            clock.now += 0.5
+
+        assert limiter.rate == 4.0
+
+    def test_mixed_latency_keeps_increasing(self):
+        limiter = self._limiter(FakeClock())
+
+        for _ in range(100):
+            limiter.record(304, 0.01)
+            limiter.record(200, 0.3)
+
+        assert limiter.rate == 4.0
+
+    def test_retry_after_holds_requests(self):
+        clock = FakeClock()
+        limiter = self._limiter(clock)
+
+        limiter.record(429, 0.1, retry_after=10)
+        limiter.acquire()
+
+        assert clock.sleeps == [10]
+
+    def test_reports_rate_changes(self):
+        messages: list[str] = []
+        limiter = self._limiter(FakeClock(), report=messages.append)
+
+        limiter.record(429, 0.1, retry_after=3)
+
+        assert any("retry after 3.0s" in m for m in messages)
+        assert any("1.00/s" in m for m in messages)
+
+    @responses.activate
+    def test_client_retries_throttled_requests_through_limiter(self):
+        responses.add(
+            responses.GET,
+            "https://example.com/test",
+            status=429,
+            headers={"Retry-After": "2"},
+        )
+        responses.add(responses.GET, "https://example.com/test", body="Success", status=200)
+        clock = FakeClock()
+        limiter = self._limiter(clock)
+
+        with RateLimitedClient(rate_limiter=limiter) as client:
+            result = client.get("https://example.com/test")
+
+        assert result == "Success"
+        assert len(responses.calls) == 2
+        assert clock.sleeps == [2]
+
+    @responses.activate
+    def test_client_gives_up_after_max_retries(self):
+        responses.add(responses.GET, "https://example.com/test", status=503)
+        limiter = self._limiter(FakeClock())
+
+        with RateLimitedClient(rate_limiter=limiter) as client:
+            with pytest.raises(Exception, match="503"):
+                client.get("https://example.com/test")
+
+        assert len(responses.calls) == 4
+
+
+class TestParseRetryAfter:
+    def test_seconds(self):
+        assert parse_retry_after("120") == 120.0
+
+    def test_http_date_in_past(self):
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+    def test_missing_or_invalid(self):
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+
+
+class TestDeclaredCharset:
+    def test_reads_charset_parameter(self):
+        assert declared_charset("text/html; charset=ISO-8859-1") == "ISO-8859-1"
+        assert declared_charset('text/html; Charset="utf-8"; x=y') == "utf-8"
+
+    def test_missing(self):
+        assert declared_charset("text/html") is None
+        assert declared_charset(None) is None
+
+
+class _ValidatingHandler(BaseHTTPRequestHandler):
+    """Serve one page with an ETag and Last-Modified, honouring conditional GETs."""
+
+    body = b"<html>fresh</html>"
+    etag = '"v1"'
+    last_modified = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == self.etag or (
+            self.headers.get("If-Modified-Since") == self.last_modified
+        ):
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", self.etag)
+        self.send_header("Last-Modified", self.last_modified)
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def validating_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ValidatingHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestConditionalGet:
+    def test_full_fetch_returns_validators(self, validating_server):
+        url = f"http://127.0.0.1:{validating_server.server_port}/page"
+
+        with RateLimitedClient(delay=0) as client:
+            result = client.fetch(url)
+
+        assert result.content == b"<html>fresh</html>"
+        assert result.encoding == "utf-8"
+        assert result.etag == '"v1"'
+        assert result.last_modified == "Wed, 01 Jan 2025 00:00:00 GMT"
+        assert result.not_modified is False
+        assert "If-None-Match" not in validating_server.requests[0]
+
+    def test_not_modified_serves_cached_body(self, validating_server):
+        url = f"http://127.0.0.1:{validating_server.server_port}/page"
+        cached = CacheEntry(body=b"<html>cached</html>", etag='"v1"')
+
+        with RateLimitedClient(delay=0) as client:
+            result = client.fetch(url, cached)
+
+        assert result.not_modified is True
+        assert result.text == "<html>cached</html>"
+        assert result.etag == '"v1"'
+        assert validating_server.requests[0]["If-None-Match"] == '"v1"'
+
+    def test_if_modified_since(self, validating_server):
+        url = f"http://127.0.0.1:{validating_server.server_port}/page"
+        cached = CacheEntry(body=b"cached", last_modified="Wed, 01 Jan 2025 00:00:00 GMT")
+
+        with RateLimitedClient(delay=0) as client:
+            assert client.get(url, cached) == "cached"
+
+        assert "If-Modified-Since" in validating_server.requests[0]
+
+    def test_stale_validator_refetches(self, validating_server):
+        url = f"http://127.0.0.1:{validating_server.server_port}/page"
+        cached = CacheEntry(body=b"old", etag='"v0"')
+
+        with RateLimitedClient(delay=0) as client:
+            result = client.fetch(url, cached)
+
+        assert result.not_modified is False
+        assert result.text == "<html>fresh</html>"
+
+    @responses.activate
+    def test_not_modified_without_cached_copy_is_an_error(self):
+        responses.add(responses.GET, "https://example.com/page", status=304)
+
+        with RateLimitedClient(delay=0) as client:
+            with pytest.raises(requests.HTTPError, match="no cached copy"):
+                client.fetch("https://example.com/page")
@@ -0,0 +1,148 @@
+"""Tests for the crawl journal."""
+
+import json
+
+import pytest
+import responses
+
+from scraper.fetcher import MENUS, Cache, CachedFetcher, CrawlJournal, RateLimitedClient
+
+URL = "https://example.com/menu"
+
+
+def _records(path):
+    lines = path.read_text(encoding="utf-8").splitlines()
+    return [json.loads(line) for line in lines if "options" not in json.loads(line)]
+
+
+class TestCrawlJournal:
+    def test_states_only_move_forward(self, tmp_path):
+        path = tmp_path / "journal.jsonl"
+        with CrawlJournal(path) as journal:
+            journal.mark(URL, journal.PENDING)
+            journal.mark(URL, journal.FETCHED)
+            journal.mark(URL, journal.PENDING)
+            journal.mark(URL, journal.FETCHED)
+
+        assert [r["state"] for r in _records(path)] == ["pending", "fetched"]
+        assert journal.reached(URL, journal.PENDING)
+        assert not journal.reached("https://example.com/other", journal.PENDING)
+
+    def test_resume_replays_furthest_state(self, tmp_path):
+        path = tmp_path / "journal.jsonl"
+        path.write_text(
+            '{"options": {}}\n'
+            '{"url": "a", "state": "fetched"}\n'
+            '{"url": "a", "state": "pending"}\n'
+            '{"url": "b", "state": "pending"}\n'
+            '{"url": "c", "sta',
+            encoding="utf-8",
+        )
+
+        with CrawlJournal(path, resume=True) as journal:
+            assert journal.states == {"a": "fetched", "b": "pending"}
+            journal.mark("b", journal.FETCHED)
+
+        last = path.read_text(encoding="utf-8").splitlines()[-1]
+        assert json.loads(last) == {"url": "b", "state": "fetched"}
+
+    def test_fresh_journal_starts_over(self, tmp_path):
+        path = tmp_path / "journal.jsonl"
+        path.write_text('{"options": {}}\n{"url": "a", "state": "fetched"}\n', encoding="utf-8")
+
+        with CrawlJournal(path, options={"output": "out.json"}) as journal:
+            assert journal.states == {}
+
+        assert path.read_text(encoding="utf-8") == '{"options": {"output": "out.json"}}\n'
+
+    def test_resume_requires_matching_options(self, tmp_path):
+        path = tmp_path / "journal.jsonl"
+        with CrawlJournal(path, options={"output": "out.json", "pages": None}) as journal:
+            journal.mark("a", journal.FETCHED)
+
+        with pytest.raises(ValueError, match="different options"):
+            CrawlJournal(path, resume=True, options={"output": "other.json", "pages": None})
+        with CrawlJournal(path, resume=True, options={"output": "out.json", "pages": None}) as j:
+            assert j.states == {"a": "fetched"}
+
+    def test_resume_refuses_journal_without_options(self, tmp_path):
+        path = tmp_path / "journal.jsonl"
+        path.write_text('{"url": "a", "state": "fetched"}\n', encoding="utf-8")
+
+        with pytest.raises(ValueError, match="different options"):
+            CrawlJournal(path, resume=True)
+
+    def test_resume_without_journal_starts_one(self, tmp_path):
+        path = tmp_path / "journal.jsonl"
+
+        with CrawlJournal(path, resume=True, options={"pages": 2}) as journal:
+            assert journal.states == {}
+
+        assert json.loads(path.read_text(encoding="utf-8")) == {"options": {"pages": 2}}
+
+    def test_buffers_until_flush_every(self, tmp_path):
+        path = tmp_path / "journal.jsonl"
+        journal = CrawlJournal(path, flush_every=3, flush_interval=3600)
+
+        journal.mark("a", journal.PENDING)
+        journal.mark("b", journal.PENDING)
+        assert _records(path) == []
+
+        journal.mark("c", journal.PENDING)
+        assert len(_records(path)) == 3
+        journal.close()
+
+    def test_flushes_after_interval(self, tmp_path):
+        path = tmp_path / "journal.jsonl"
+        journal = CrawlJournal(path, flush_every=100, flush_interval=0)
+
+        journal.mark("a", journal.PENDING)
+
+        assert len(_records(path)) == 1
+        journal.close()
+
+    def test_flushes_when_interrupted(self, tmp_path):
+        path = tmp_path / "journal.jsonl"
+
+        with pytest.raises(KeyboardInterrupt), CrawlJournal(path, flush_interval=3600) as journal:
+            journal.mark("a", journal.FETCHED)
+            raise KeyboardInterrupt
+
+        assert _records(path) == [{"url": "a", "state": "fetched"}]
+
+
+class TestJournaledFetcher:
+    @responses.activate
+    def test_caches_and_journals_fetches_without_use_cache(self, tmp_path):
+        responses.add(responses.GET, URL, body="fresh")
+        cache = Cache(tmp_path / "cache")
+
+        with (
+            CrawlJournal(tmp_path / "journal.jsonl") as journal,
+            RateLimitedClient(delay=0) as client,
+        ):
+            CachedFetcher(client, cache, journal=journal).load(MENUS, URL, URL)
+
+        assert journal.states == {URL: "fetched"}
+        entry = cache.get_entry(MENUS, URL)
+        assert entry is not None
+        assert entry.body == b"fresh"
+
+    @responses.activate
+    def test_resume_serves_journaled_pages_from_cache(self, tmp_path):
+        cache = Cache(tmp_path / "cache", ttls={MENUS: 0})
+        cache.save(MENUS, URL, "cached")
+        path = tmp_path / "journal.jsonl"
+        path.write_text(
+            '{"options": {}}\n' + json.dumps({"url": URL, "state": "fetched"}) + "\n",
+            encoding="utf-8",
+        )
+
+        with (
+            CrawlJournal(path, resume=True) as journal,
+            RateLimitedClient(delay=0) as client,
+        ):
+            result = CachedFetcher(client, cache, journal=journal).load(MENUS, URL, URL)
+
+        assert result.text == "cached"
+        assert len(responses.calls) == 0
@@ -1,67 +1,200 @@
 """Tests for listing page parser."""
 
-from scraper.parser import ListingParser
+import pytest
+
+from scraper.config import BASE_URL
+from scraper.parser import (
+    LISTING_SPEC,
+    Field,
+    ListingPage,
+    ListingParser,
+    LxmlListingParser,
+    Select,
+)
+
+TRICKY_LISTING_HTML = """
+<html><body>
+    <div class="paginationControls"><a href="/?page=2">2</a> <a href="/?page=7">7</a></div>
+    <div id="restaurantID-mistral" class="restaurantEntry  featured">
+        <!-- Brunch: $99 is a comment, not a price -->
+        <script>var note = "Lunch: $1 outdoor";</script>
+        <style>.patio { color: red; }</style>
+        <div class="restaurantLogo"><span>no image here</span></div>
+        <div class="restaurantLogo"><img src="https://cdn.example.com/second.png" /></div>
+        <a href="/restaurant/mistral">  </a>
+        <h4><a href="/elsewhere">Mistral&nbsp;Bistro</a></h4>
+        <a href="/?cuisine=french"><span class="restClass">French</span></a>
+        <a href="/?cuisine=x"><span class="restClass">|</span></a>
+        <a href="/?cuisine=med"><b>Mediterranean</b><span class="restClass"> Med </span></a>
+        <a href="/?neighborhood=south-end"><span class="restClass">,</span></a>
+        <a href="/?neighborhood=back-bay"><span class="restClass">Back Bay</span></a>
+        <a href="/map/x/">Somewhere else</a>
+        <a href="/map/y/"> 223 Columbus Ave, Boston, MA </a>
+        <p><strong>DINNER</strong>:$55 &middot; brunch : $30 Takeout &amp; delivery</p>
+        <div class="restaurantFeatureIcons">
+            <img title="Patio" /><img alt="" /><img alt="Valet" title="ignored" />
+        </div>
+    </div>
+    <div id="restaurantID-" class="restaurantEntry"></div>
+    <div id="other" class="restaurantEntry"></div>
+    <div id="restaurantID-no-links" class="restaurantEntryish restaurantEntry"></div>
+</body></html>
+"""
+
+
+@pytest.fixture(params=[ListingParser, LxmlListingParser], ids=["bs4", "lxml"])
+def parser(request) -> ListingParser:
+    return request.param()
 
 
 class TestListingParser:
-    def test_parse_restaurants(self, sample_listing_html):
-        parser = ListingParser()
+    def test_parse_restaurants(self, parser, sample_listing_html):
         restaurants = parser.parse(sample_listing_html)
 
         assert len(restaurants) == 2
 
         capital_grille = next(r for r in restaurants if r.slug == "the-capital-grille")
         assert capital_grille.name == "The Capital Grille"
-        assert capital_grille.cuisine == "Steakhouse"
+        assert capital_grille.cuisine == ["Steakhouse"]
         assert capital_grille.neighborhood == "Back Bay"
         assert capital_grille.pricing.lunch == 28
         assert capital_grille.pricing.dinner == 45
 
-    def test_parse_availability(self, sample_listing_html):
-        parser = ListingParser()
+    def test_parse_availability(self, parser, sample_listing_html):
         restaurants = parser.parse(sample_listing_html)
 
         capital_grille = next(r for r in restaurants if r.slug == "the-capital-grille")
         assert capital_grille.availability.lunch is True
         assert capital_grille.availability.dinner is True
 
-    def test_parse_image_url(self, sample_listing_html):
-        parser = ListingParser()
+    def test_parse_image_url(self, parser, sample_listing_html):
         restaurants = parser.parse(sample_listing_html)
 
         capital_grille = next(r for r in restaurants if r.slug == "the-capital-grille")
         assert capital_grille.image_url is not None
         assert "capital-grille.gif" in capital_grille.image_url
 
-    def test_get_total_pages(self, sample_listing_html):
-        parser = ListingParser()
+    def test_get_total_pages(self, parser, sample_listing_html):
         total_pages = parser.get_total_pages(sample_listing_html)
         assert total_pages == 3
 
-    def test_parse_empty_html(self):
-        parser = ListingParser()
+    def test_parse_empty_html(self, parser):
         restaurants = parser.parse("<html><body></body></html>")
         assert len(restaurants) == 0
 
-    def test_detail_url_construction(self, sample_listing_html):
-        parser = ListingParser()
+    def test_detail_url_construction(self, parser, sample_listing_html):
         restaurants = parser.parse(sample_listing_html)
 
         capital_grille = next(r for r in restaurants if r.slug == "the-capital-grille")
         assert "restaurantweekboston.com" in capital_grille.detail_url
         assert "the-capital-grille" in capital_grille.detail_url
 
-    def test_parse_address(self, sample_listing_html):
-        parser = ListingParser()
+    def test_parse_address(self, parser, sample_listing_html):
         restaurants = parser.parse(sample_listing_html)
 
         capital_grille = next(r for r in restaurants if r.slug == "the-capital-grille")
         assert capital_grille.address is not None
         assert "900 Boylston Street" in capital_grille.address
 
-    def test_parse_features(self, sample_listing_html):
-        parser = ListingParser()
+    def test_parse_features(self, parser, sample_listing_html):
         restaurants = parser.parse(sample_listing_html)
 
         capital_grille = next(r for r in restaurants if r.slug == "the-capital-grille")
         assert "outdoor dining" in capital_grille.features
+
+    def test_get_total_pages_from_links(self, parser):
+        assert parser.get_total_pages(TRICKY_LISTING_HTML) == 7
+
+    def test_parse_tricky_entry(self, parser):
+        restaurants = parser.parse(TRICKY_LISTING_HTML)
+
+        assert [r.slug for r in restaurants] == ["mistral", "no-links"]
+        mistral = restaurants[0]
+        assert mistral.name == "Mistral\xa0Bistro"
+        assert mistral.cuisine == ["French", "Med"]
+        assert mistral.neighborhood == "Back Bay"
+        assert mistral.address == "223 Columbus Ave, Boston, MA"
+        assert mistral.image_url is None
+        assert mistral.pricing.lunch is None
+        assert mistral.pricing.dinner == 55
+        assert mistral.pricing.brunch == 30
+        assert mistral.availability.lunch is False
+        assert mistral.features == ["patio", "valet", "delivery", "takeout"]
+        assert restaurants[1].name == "No Links"
+
+    def test_parse_page(self, parser, sample_listing_html):
+        page = parser.parse_page(sample_listing_html)
+
+        assert isinstance(page, ListingPage)
+        assert page.restaurants == parser.parse(sample_listing_html)
+        assert page.total_pages == 3
+        assert page.page_urls == []
+
+    def test_parse_page_links(self, parser):
+        page = parser.parse_page(TRICKY_LISTING_HTML)
+
+        assert page.total_pages == 7
+        assert page.page_urls == [f"{BASE_URL}/?page=2", f"{BASE_URL}/?page=7"]
+
+    def test_pagination_is_scoped_to_controls(self, parser):
+        html = """
+        <html><body>
+            <p>Showing page 1 of 40 reviews</p>
+            <a href="/reviews?page=12">more reviews</a>
+            <div class="paginationControls">page 1 of 2</div>
+        </body></html>
+        """
+
+        assert parser.parse_page(html).total_pages == 2
+        assert parser.get_total_pages("<p>page 1 of 40</p>") == 1
+
+    def test_parse_page_ignores_markup_outside_entries(self, parser):
+        html = """
+        <html><body>
+            <p>Lunch: $5 on the patio</p>
+            <main><section class="results">
+                <div id="restaurantID-mistral" class="featured restaurantEntry">
+                    <h4><a href="/restaurant/mistral">Mistral</a></h4>
+                </div>
+            </section></main>
+            <footer><div class="paginationControls">page 1 of 4</div></footer>
+        </body></html>
+        """
+        page = parser.parse_page(html)
+
+        assert [r.name for r in page.restaurants] == ["Mistral"]
+        assert page.restaurants[0].features == []
+        assert page.restaurants[0].pricing.lunch is None
+        assert page.total_pages == 4
+
+    def test_parse_page_from_bytes(self, parser, sample_listing_html):
+        html = sample_listing_html.replace("Capital Grille", "Capital Grillé")
+
+        assert parser.parse_page(html.encode("utf-8")) == parser.parse_page(html)
+        assert parser.parse_page(html.encode("cp1252"), "windows-1252") == parser.parse_page(html)
+        assert parser.get_total_pages(html.encode("utf-8")) == 3
+
+    def test_parse_page_empty_html(self, parser):
+        assert parser.parse_page("") == ListingPage()
+
+
+class TestListingEngines:
+    def test_engines_agree(self, sample_listing_html):
+        for html in (sample_listing_html, TRICKY_LISTING_HTML):
+            assert LxmlListingParser().parse_page(html) == ListingParser().parse_page(html)
+            assert LxmlListingParser().get_total_pages(html) == ListingParser().get_total_pages(
+                html
+            )
+
+    def test_engines_follow_spec_edits(self, monkeypatch):
+        monkeypatch.setitem(
+            LISTING_SPEC.fields,
+            "address",
+            Field(Select('a[href*="/map/"]', accept=lambda text: "else" in text, each=True)),
+        )
+        monkeypatch.setitem(LISTING_SPEC.fields, "cuisine", Field(Select("a b")))
+
+        for engine in (ListingParser(), LxmlListingParser()):
+            restaurant = engine.parse(TRICKY_LISTING_HTML)[0]
+            assert restaurant.address == "Somewhere else"
+            assert restaurant.cuisine == ["Mediterranean"]
@@ -0,0 +1,75 @@
+"""Tests for scraper.loader.manifest."""
+
+import json
+
+from scraper.loader.manifest import LoadManifest, row_hash
+from scraper.loader.transform import transform_restaurant
+
+TARGET = "https://project.supabase.co"
+
+
+def _row(slug, **overrides):
+    row = transform_restaurant({"slug": slug, "name": slug.title(), "cuisine": ["Italian"]})
+    row.update(overrides)
+    return row
+
+
+class TestRowHash:
+    def test_ignores_key_order(self):
+        row = _row("a")
+
+        assert row_hash(row) == row_hash(dict(reversed(row.items())))
+        assert row_hash(row) != row_hash(_row("a", dinner_price=45))
+
+
+class TestLoadManifest:
+    def test_first_load_inserts_everything(self, tmp_path):
+        diff = LoadManifest(TARGET, tmp_path / "manifest.json").diff([_row("a"), _row("b")])
+
+        assert [row["slug"] for row in diff.rows] == ["a", "b"]
+        assert (diff.changed, diff.unchanged, diff.removed) == ([], 0, [])
+
+    def test_only_new_and_changed_rows_are_pending(self, tmp_path):
+        manifest = LoadManifest(TARGET, tmp_path / "manifest.json")
+        manifest.record([_row("a"), _row("b"), _row("gone")])
+        manifest.save()
+
+        rows = [_row("a"), _row("b", menu={"menus": []}), _row("c")]
+        diff = LoadManifest(TARGET, tmp_path / "manifest.json").diff(rows)
+
+        assert [row["slug"] for row in diff.inserted] == ["c"]
+        assert [row["slug"] for row in diff.changed] == ["b"]
+        assert diff.unchanged == 1
+        assert diff.removed == ["gone"]
+        assert [row["slug"] for row in diff.rows] == ["c", "b"]
+
+    def test_recorded_rows_are_unchanged_next_time(self, tmp_path):
+        manifest = LoadManifest(TARGET, tmp_path / "manifest.json")
+        rows = [_row("a"), _row("b")]
+        manifest.record(manifest.diff(rows).rows)
+        manifest.save()
+
+        diff = LoadManifest(TARGET, tmp_path / "manifest.json").diff(rows)
+        assert (diff.rows, diff.unchanged) == ([], 2)
+        assert sorted(tmp_path.iterdir()) == [tmp_path / "manifest.json"]
+
+    def test_targets_are_kept_apart(self, tmp_path):
+        path = tmp_path / "manifest.json"
+        staging = LoadManifest("https://staging.supabase.co", path)
+        staging.record([_row("a"), _row("b")])
+        staging.save()
+
+        production = LoadManifest("https://production.supabase.co/", path)
+        assert [row["slug"] for row in production.diff([_row("a")]).inserted] == ["a"]
+        production.record([_row("a")])
+        production.save()
+
+        assert LoadManifest("https://staging.supabase.co/", path).diff([_row("b")]).unchanged == 1
+        assert LoadManifest("https://production.supabase.co", path).diff([_row("a")]).unchanged == 1
+
+    def test_manifest_without_targets_is_ignored(self, tmp_path):
+        path = tmp_path / "manifest.json"
+        path.write_text(json.dumps({"a": row_hash(_row("a"))}), encoding="utf-8")
+
+        diff = LoadManifest(TARGET, path).diff([_row("a")])
+        assert ([row["slug"] for row in diff.inserted], diff.removed) == (["a"], [])
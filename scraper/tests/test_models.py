@@ -1,5 +1,9 @@
 """Tests for data models."""
 
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
 from scraper.models import (
     Availability,
     Coordinates,
@@ -8,6 +12,7 @@ from scraper.models import (
     Menu,
     Pricing,
     Restaurant,
+    Vocabulary,
 )
 
 
@@ -40,6 +45,13 @@ class TestPricing:
         pricing = Pricing(lunch=28, dinner=45)
         assert pricing.to_dict() == {"lunch": 28, "dinner": 45, "brunch": None}
 
+    def test_for_meal(self):
+        pricing = Pricing(lunch=28, dinner=45)
+        assert pricing.for_meal("lunch") == 28
+        assert pricing.for_meal("dinner") == 45
+        assert pricing.for_meal("brunch") is None
+        assert pricing.for_meal("breakfast") is None
+
 
 class TestCourse:
     def test_to_dict(self):
@@ -87,7 +99,7 @@ class TestRestaurant:
         result = r.to_dict()
         assert result["slug"] == "test-place"
         assert result["name"] == "Test Place"
-        assert result["cuisine"] is None
+        assert result["cuisine"] == []
         assert "menu" not in result
         assert "coordinates" not in result
 
@@ -95,7 +107,7 @@ class TestRestaurant:
         r = Restaurant(
             slug="capital-grille",
             name="The Capital Grille",
-            cuisine="Steakhouse",
+            cuisine=["Steakhouse"],
             neighborhood="Back Bay",
             address="900 Boylston Street",
             phone="617-262-8900",
@@ -112,7 +124,7 @@ class TestRestaurant:
 
         assert result["slug"] == "capital-grille"
         assert result["name"] == "The Capital Grille"
-        assert result["cuisine"] == "Steakhouse"
+        assert result["cuisine"] == ["Steakhouse"]
         assert result["neighborhood"] == "Back Bay"
         assert result["address"] == "900 Boylston Street"
         assert result["phone"] == "617-262-8900"
@@ -122,3 +134,83 @@ class TestRestaurant:
         assert "menu" in result
         assert "coordinates" in result
         assert result["features"] == ["outdoor", "reservations"]
+
+    def test_from_dict_roundtrip(self):
+        r = Restaurant(
+            slug="capital-grille",
+            name="The Capital Grille",
+            cuisine=["Steakhouse"],
+            availability=Availability(dinner=True),
+            pricing=Pricing(dinner=45),
+            menu=Menu(
+                menus=[
+                    MealMenu(
+                        meal_type="dinner",
+                        price=45,
+                        courses=[Course(name="Entree", options=["Steak"])],
+                    )
+                ]
+            ),
+            coordinates=Coordinates(42.3601, -71.0589),
+            features=["outdoor"],
+        )
+
+        assert Restaurant.from_dict(r.to_dict()) == r
+        assert Restaurant.from_dict({"slug": "x", "name": "X"}) == Restaurant(slug="x", name="X")
+
+    def test_from_dict_reads_cuisine_strings_and_interns_terms(self):
+        first = Restaurant.from_dict(
+            {
+                "slug": "a",
+                "name": "A",
+                "cuisine": "French, Med",
+                "neighborhood": "".join("Back Bay"),
+            }
+        )
+        second = Restaurant.from_dict(
+            {"slug": "b", "name": "B", "cuisine": ["French"], "neighborhood": "".join("Back Bay")}
+        )
+
+        assert first.cuisine == ["French", "Med"]
+        assert first.cuisine[0] is second.cuisine[0]
+        assert first.neighborhood is second.neighborhood
+
+    def test_menu_urls_are_crawl_state(self):
+        r = Restaurant(slug="x", name="X")
+        r.menu_urls = {"dinner": "/fetch/x/dinner/"}
+
+        assert "menu_urls" not in r.to_dict()
+        assert r == Restaurant(slug="x", name="X")
+
+    def test_slotted(self):
+        r = Restaurant(slug="x", name="X")
+
+        assert not hasattr(r, "__dict__")
+        with pytest.raises(AttributeError):
+            r._pending = {}
+
+
+class TestVocabulary:
+    def test_numbers_terms_in_first_seen_order(self):
+        vocabulary = Vocabulary(["Italian"])
+
+        assert vocabulary.id("Seafood") == 1
+        assert vocabulary.id("Italian") == 0
+        assert vocabulary.terms == ["Italian", "Seafood"]
+        assert len(vocabulary) == 2
+
+    def test_intern_returns_shared_copy(self):
+        vocabulary = Vocabulary()
+        term = vocabulary.intern("".join(["Back ", "Bay"]))
+
+        assert vocabulary.intern("".join(["Back", " Bay"])) is term
+
+    def test_ids_from_many_threads(self):
+        vocabulary = Vocabulary()
+        terms = [f"term-{i % 500}" for i in range(20_000)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            ids = list(pool.map(vocabulary.id, terms))
+
+        assert len(vocabulary) == 500
+        assert sorted(vocabulary.terms) == sorted(set(terms))
+        assert all(vocabulary.terms[i] == term for i, term in zip(ids, terms, strict=True))
@@ -0,0 +1,113 @@
+"""Tests for memoized parser output."""
+
+import responses
+
+from scraper.fetcher import PARSED, Cache, RateLimitedClient
+from scraper.models import Restaurant
+from scraper.parser import DetailParser, ListingParser, ParseMemo
+
+
+class CountingListingParser(ListingParser):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def parse(self, html: str) -> list[Restaurant]:
+        self.calls += 1
+        return super().parse(html)
+
+
+class TestParseMemo:
+    def test_unchanged_html_skips_parsing(self, tmp_path, sample_listing_html):
+        parser = CountingListingParser()
+        memo = ParseMemo(Cache(tmp_path))
+
+        first = memo.call(parser.parse, sample_listing_html)
+        second = memo.call(parser.parse, sample_listing_html)
+
+        assert parser.calls == 1
+        assert second == first
+        assert (memo.hits, memo.misses) == (1, 1)
+
+    def test_listing_page_roundtrip(self, tmp_path, sample_listing_html):
+        parser = ListingParser()
+        memo = ParseMemo(Cache(tmp_path))
+
+        first = memo.call(parser.parse_page, sample_listing_html)
+        second = memo.call(parser.parse_page, sample_listing_html)
+
+        assert memo.hits == 1
+        assert second == first
+        assert second.total_pages == 3
+
+    def test_changed_html_is_parsed(self, tmp_path, sample_listing_html):
+        parser = CountingListingParser()
+        memo = ParseMemo(Cache(tmp_path))
+
+        memo.call(parser.parse, sample_listing_html)
+        memo.call(parser.parse, sample_listing_html.replace("Legal Sea Foods", "Legal"))
+
+        assert parser.calls == 2
+
+    def test_parser_version_invalidates(self, tmp_path, sample_listing_html):
+        parser = CountingListingParser()
+        cache = Cache(tmp_path)
+
+        ParseMemo(cache, version="a").call(parser.parse, sample_listing_html)
+        ParseMemo(cache, version="b").call(parser.parse, sample_listing_html)
+
+        assert parser.calls == 2
+
+    def test_detail_result_keeps_menu_urls(self, tmp_path, sample_detail_html):
+        parser = DetailParser()
+        memo = ParseMemo(Cache(tmp_path))
+        html = sample_detail_html.replace(
+            "</body>", '<script>var dinnerMenuURL = "/fetch/x/dinner/";</script></body>'
+        )
+
+        parsed = memo.call(parser.parse, html, Restaurant(slug="x", name="X"))
+        memoized = memo.call(parser.parse, html, Restaurant(slug="x", name="X"))
+
+        assert memo.hits == 1
+        assert memoized.to_dict() == parsed.to_dict()
+        assert memoized.menu_urls == parsed.menu_urls == {"dinner": "/fetch/x/dinner/"}
+
+    def test_menu_key_includes_arguments(self, tmp_path):
+        parser = DetailParser()
+        memo = ParseMemo(Cache(tmp_path))
+        html = "<p><strong>MAINS</strong></p><p>Steak</p>"
+
+        dinner = memo.call(parser.parse_menu_html, html, "dinner", 45)
+        lunch = memo.call(parser.parse_menu_html, html, "lunch", 25)
+
+        assert (dinner.meal_type, dinner.price) == ("dinner", 45)
+        assert (lunch.meal_type, lunch.price) == ("lunch", 25)
+        assert memo.misses == 2
+
+    @responses.activate
+    def test_crawler_reuses_parses(self, tmp_path, sample_listing_html):
+        from scraper.config import LISTING_URL
+        from scraper.crawler import AsyncCrawler
+
+        responses.add(responses.GET, LISTING_URL, body=sample_listing_html.replace("of 3", "of 1"))
+        cache = Cache(tmp_path)
+
+        def crawl() -> tuple[list[Restaurant], ParseMemo]:
+            memo = ParseMemo(cache)
+            with RateLimitedClient(delay=0) as client:
+                crawler = AsyncCrawler(
+                    client=client,
+                    cache=cache,
+                    listing_parser=ListingParser(),
+                    detail_parser=DetailParser(),
+                    concurrency=2,
+                    use_cache=True,
+                    parse_memo=memo,
+                )
+                return crawler.run(listings_only=True), memo
+
+        first, _ = crawl()
+        second, memo = crawl()
+
+        assert [r.to_dict() for r in second] == [r.to_dict() for r in first]
+        assert memo.hits == 1
+        assert len(list((tmp_path / PARSED).iterdir())) == 1
@@ -0,0 +1,123 @@
+"""Tests for declarative extraction specs."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from bs4 import BeautifulSoup
+from lxml import etree
+
+from scraper.parser import DETAIL_SPEC, DetailParser, Field, RuleStats, Search, Select, Spec
+from scraper.parser.spec import Rule, attr, css_to_xpath, inside
+
+HTML = """
+<div>
+    <p class="name"></p>
+    <p class="name">Second</p>
+    <a href="/a">A</a>
+    <a href="/b"><span>B</span></a>
+    <p>Lunch: $25, Dinner: $45</p>
+</div>
+"""
+
+
+def _soup():
+    return BeautifulSoup(HTML, "lxml")
+
+
+class TestField:
+    def test_first_match_only_unless_each(self):
+        assert Field(Select("p.name")).first(_soup()) is None
+        assert Field(Select("p.name", each=True)).first(_soup()) == "Second"
+
+    def test_rules_tried_in_order_and_counted(self):
+        first = Select(".missing")
+        second = Select("a", read=attr("href"))
+        third = Select("p")
+        field = Field(first, second, third)
+
+        assert field.first(_soup()) == "/a"
+        assert (first.hits, first.misses) == (0, 1)
+        assert (second.hits, second.misses) == (1, 0)
+        assert (third.hits, third.misses) == (0, 0)
+
+    def test_all_collects_every_value(self):
+        field = Field(Select("a", read=inside("span")), Select("a", read=attr("href")))
+
+        assert field.all(_soup()) == ["B", "/a", "/b"]
+
+    def test_where_receives_context(self):
+        field = Field(Select("a", where=lambda link, href: link.get("href") == href))
+
+        assert field.first(_soup(), href="/b") == "B"
+
+    def test_accept_and_clean(self):
+        field = Field(Select("a", accept=lambda text: text == "B", clean=str.lower, each=True))
+
+        assert field.first(_soup()) == "b"
+
+    def test_search(self):
+        field = Field(Search(r"dinner:\s*\$(\d+)", convert=int))
+
+        assert field.first(_soup().get_text()) == 45
+        assert Field(Search(r"\$(\d+)")).all("$1 $2") == ["1", "2"]
+
+
+class TestLxmlTrees:
+    @pytest.mark.parametrize(
+        "selector",
+        ["p", "p.name", "a[href]", "a[href='/b'] span", "[href^='/'], p.name", "div *"],
+    )
+    def test_xpath_matches_css(self, selector):
+        root = etree.HTML(HTML)
+        expected = [element.get_text() for element in _soup().select(selector)]
+
+        assert [
+            "".join(e.itertext()) for e in etree.XPath(css_to_xpath(selector))(root)
+        ] == expected
+
+    def test_unsupported_selector(self):
+        with pytest.raises(ValueError, match="Unsupported selector"):
+            css_to_xpath("div > p")
+
+    def test_rules_read_lxml_elements(self):
+        root = etree.HTML(HTML)
+        field = Field(Select(".missing"), Select("a", read=inside("span"), each=True))
+
+        assert field.first(root) == "B"
+        assert Field(Select("a", read=attr("href"))).all(root) == ["/a", "/b"]
+        assert Field(Select("p.name", each=True)).first(root) == "Second"
+
+
+class TestRule:
+    def test_is_abstract(self):
+        with pytest.raises(TypeError):
+            Rule()
+
+    def test_counts_from_many_threads(self):
+        rule = Select("a")
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: rule.count(i % 2 == 0), range(10_000)))
+
+        assert (rule.hits, rule.misses) == (5_000, 5_000)
+
+
+class TestSpec:
+    def test_stats_and_reset(self):
+        spec = Spec(link=Field(Select("a"), Select("p")), price=Field(Search(r"\$(\d+)")))
+        spec["link"].first(_soup())
+        spec["price"].first("no price")
+
+        assert spec.stats() == [
+            RuleStats("link", "Select('a')", 1, 0),
+            RuleStats("link", "Select('p')", 0, 0),
+            RuleStats("price", "Search('\\\\$(\\\\d+)')", 0, 1),
+        ]
+        spec.reset()
+        assert all(s.hits == s.misses == 0 for s in spec.stats())
+
+    def test_parser_records_fallbacks(self, sample_detail_html, sample_restaurant):
+        DETAIL_SPEC.reset()
+        DetailParser().parse(sample_detail_html, sample_restaurant)
+
+        address = [(s.hits, s.misses) for s in DETAIL_SPEC.stats() if s.field == "address"]
+        assert address == [(0, 1), (1, 0), (0, 0), (0, 0), (0, 0)]
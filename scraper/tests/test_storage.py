@@ -0,0 +1,356 @@
+"""Tests for output writers."""
+
+import copy
+import json
+
+import pytest
+
+from scraper.loader.transform import load_restaurants
+from scraper.models import Availability, Coordinates, Course, MealMenu, Menu, Pricing, Restaurant
+from scraper.storage import (
+    ColumnarWriter,
+    Columns,
+    JsonWriter,
+    NdjsonWriter,
+    PreviousRun,
+    Vocabularies,
+    columnar_path,
+    encode_restaurant,
+    listing_fingerprint,
+    mask_of,
+    read_output,
+)
+
+
+class TestEncodeRestaurant:
+    def _dumps(self, restaurant):
+        record = Vocabularies().encode(restaurant.to_dict())
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+    def test_matches_json_dumps(self, sample_restaurant):
+        sample_restaurant.name = 'The "Capital" Grille \\ Café\n'
+        sample_restaurant.cuisine = ["Steakhouse", "Américan"]
+        sample_restaurant.features = ["outdoor", "ünïcode"]
+        sample_restaurant.menu = Menu(
+            menus=[
+                MealMenu("dinner", 45, [Course("Mains", ["Steak", 'Fish "n" Chips'])]),
+                MealMenu("lunch", None, []),
+            ]
+        )
+        sample_restaurant.coordinates = Coordinates(42.35, -71.0)
+
+        text = encode_restaurant(sample_restaurant, Vocabularies())
+        assert text == self._dumps(sample_restaurant)
+        plain = json.dumps(sample_restaurant.to_dict(), ensure_ascii=False, separators=(",", ":"))
+        assert encode_restaurant(sample_restaurant) == plain
+
+    def test_minimal(self):
+        restaurant = Restaurant(slug="x", name="X")
+
+        assert encode_restaurant(restaurant, Vocabularies()) == self._dumps(restaurant)
+
+    def test_terms_are_numbered(self, sample_restaurant):
+        vocabularies = Vocabularies({"cuisine": ["Seafood"]})
+        sample_restaurant.cuisine = ["Seafood", "Steakhouse"]
+        sample_restaurant.features = ["outdoor"]
+        record = json.loads(encode_restaurant(sample_restaurant, vocabularies))
+
+        assert (record["cuisine"], record["neighborhood"], record["features"]) == ([0, 1], 0, [0])
+        assert vocabularies.new_terms() == {
+            "cuisine": ["Steakhouse"],
+            "neighborhood": ["Back Bay"],
+            "features": ["outdoor"],
+        }
+        assert vocabularies.new_terms() == {}
+        assert vocabularies.decode(record) == sample_restaurant.to_dict()
+
+
+class TestJsonWriter:
+    def test_indented_by_default(self, sample_restaurant, tmp_path):
+        path = JsonWriter(tmp_path / "out.json").write([sample_restaurant])
+
+        text = path.read_text(encoding="utf-8")
+        assert text.startswith('[\n  {\n    "slug"')
+        assert json.loads(text) == [sample_restaurant.to_dict()]
+        assert list(tmp_path.iterdir()) == [path]
+
+    def test_compact(self, sample_restaurant, tmp_path):
+        path = JsonWriter(tmp_path / "out.json", indent=None).write([sample_restaurant])
+
+        text = path.read_text(encoding="utf-8")
+        assert "\n" not in text
+        assert '"slug":"the-capital-grille"' in text
+        assert json.loads(text) == [sample_restaurant.to_dict()]
+
+    def test_vocabularies_document(self, sample_restaurant, tmp_path):
+        path = JsonWriter(tmp_path / "out.json", vocabularies=True).write([sample_restaurant])
+
+        text = path.read_text(encoding="utf-8")
+        assert text.startswith('{\n  "restaurants": [\n    {\n      "slug"')
+        assert json.loads(text)["vocabularies"]["cuisine"] == ["Steakhouse"]
+        assert read_output(path) == [sample_restaurant.to_dict()]
+
+    def test_compact_vocabularies_document(self, sample_restaurant, tmp_path):
+        path = JsonWriter(tmp_path / "out.json", indent=None, vocabularies=True).write(
+            [sample_restaurant]
+        )
+
+        text = path.read_text(encoding="utf-8")
+        assert '"slug":"the-capital-grille","name":"The Capital Grille","cuisine":[0]' in text
+        assert text.endswith(
+            '"vocabularies":{"cuisine":["Steakhouse"],"neighborhood":["Back Bay"],"features":[]}}'
+        )
+        assert read_output(path) == [sample_restaurant.to_dict()]
+
+    def test_terms_are_stored_once(self, sample_restaurant, tmp_path):
+        path = JsonWriter(tmp_path / "out.json", indent=None, vocabularies=True).write(
+            [sample_restaurant] * 3
+        )
+
+        assert path.read_text(encoding="utf-8").count("Steakhouse") == 1
+        assert read_output(path) == [sample_restaurant.to_dict()] * 3
+
+
+class TestNdjsonWriter:
+    def test_lines_are_flushed_before_close(self, sample_restaurant, tmp_path):
+        writer = NdjsonWriter(tmp_path / "out.ndjson")
+        writer.append(sample_restaurant)
+
+        assert not writer.output_path.exists()
+        assert read_output(writer.partial_path) == [sample_restaurant.to_dict()]
+
+        assert writer.close() == tmp_path / "out.ndjson"
+        assert not writer.partial_path.exists()
+        assert writer.count == 1
+
+    def test_failure_keeps_partial_and_previous_output(self, sample_restaurant, tmp_path):
+        output = tmp_path / "out.ndjson"
+        output.write_text("previous\n", encoding="utf-8")
+
+        with pytest.raises(RuntimeError), NdjsonWriter(output) as writer:
+            writer.append(sample_restaurant)
+            raise RuntimeError("crawl failed")
+
+        assert output.read_text(encoding="utf-8") == "previous\n"
+        assert len(read_output(writer.partial_path)) == 1
+
+    def test_write_empty(self, tmp_path):
+        path = NdjsonWriter(tmp_path / "data" / "out.ndjson").write([])
+
+        assert path.read_text(encoding="utf-8") == ""
+        assert read_output(path) == []
+
+    def test_vocabulary_lines_precede_new_terms(self, sample_restaurant, tmp_path):
+        seafood = copy.deepcopy(sample_restaurant)
+        seafood.cuisine = ["Seafood"]
+        path = NdjsonWriter(tmp_path / "out.ndjson", vocabularies=True).write(
+            [sample_restaurant, sample_restaurant, seafood]
+        )
+
+        lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert [next(iter(line)) for line in lines] == [
+            "vocabularies",
+            "slug",
+            "slug",
+            "vocabularies",
+            "slug",
+        ]
+        assert lines[3] == {"vocabularies": {"cuisine": ["Seafood"]}}
+        assert lines[4]["cuisine"] == [1]
+        assert read_output(path) == [r.to_dict() for r in (sample_restaurant,) * 2 + (seafood,)]
+
+    def test_lines_are_plain_records_by_default(self, sample_restaurant, tmp_path):
+        path = NdjsonWriter(tmp_path / "out.ndjson").write([sample_restaurant] * 2)
+
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line) for line in lines] == [sample_restaurant.to_dict()] * 2
+
+    def test_loader_reads_either_format(self, sample_restaurant, tmp_path):
+        ndjson = NdjsonWriter(tmp_path / "out.ndjson").write([sample_restaurant] * 2)
+        json_path = JsonWriter(tmp_path / "out.json").write([sample_restaurant] * 2)
+
+        assert load_restaurants(ndjson) == load_restaurants(json_path)
+        assert load_restaurants(ndjson) == [sample_restaurant.to_dict()] * 2
+
+    def test_loader_reads_output_written_before_vocabularies(self, tmp_path):
+        record = {"slug": "x", "name": "X", "cuisine": "French, Med", "features": ["patio"]}
+        array = tmp_path / "out.json"
+        array.write_text(json.dumps([record], indent=2), encoding="utf-8")
+        lines = tmp_path / "out.ndjson"
+        lines.write_text(json.dumps(record) + "\n", encoding="utf-8")
+
+        assert load_restaurants(array) == load_restaurants(lines) == [record]
+        assert Restaurant.from_dict(record).cuisine == ["French", "Med"]
+
+
+def _dataset():
+    return [
+        Restaurant(
+            slug="capital-grille",
+            name="The Capital Grille",
+            cuisine=["Steakhouse"],
+            neighborhood="Back Bay",
+            availability=Availability(lunch=True, dinner=True),
+            pricing=Pricing(lunch=28, dinner=45),
+            coordinates=Coordinates(42.348, -71.083),
+            features=["outdoor", "parking"],
+        ),
+        Restaurant(
+            slug="mistral",
+            name="Mistral",
+            cuisine=["French", "Mediterranean"],
+            neighborhood="South End",
+            availability=Availability(dinner=True),
+            pricing=Pricing(dinner=55),
+            features=["parking"],
+        ),
+        Restaurant(
+            slug="legal",
+            name="Legal Sea Foods",
+            cuisine=["Seafood"],
+            availability=Availability(brunch=True),
+            pricing=Pricing(brunch=35),
+        ),
+    ]
+
+
+class TestColumns:
+    def test_mask_of(self):
+        assert mask_of([True, False, True]) == 0b101
+        assert mask_of([]) == 0
+
+    def test_filters(self):
+        columns = Columns.from_restaurants(_dataset())
+
+        assert columns.select(columns.all) == ["capital-grille", "mistral", "legal"]
+        assert columns.select(columns.offered("dinner")) == ["capital-grille", "mistral"]
+        assert columns.select(columns.price_at_most("dinner", 50)) == ["capital-grille"]
+        assert columns.select(columns.price_at_least("dinner", 40)) == ["capital-grille", "mistral"]
+        assert columns.select(columns.within(42.3, -71.1, 42.4, -71.0)) == ["capital-grille"]
+        assert columns.select(columns.any_of("cuisine", "French", "Seafood")) == [
+            "mistral",
+            "legal",
+        ]
+        assert columns.select(columns.all_of("features", "outdoor", "parking")) == [
+            "capital-grille"
+        ]
+        assert columns.any_of("neighborhood", "Nowhere") == 0
+        assert columns.select(columns.all & ~columns.any_of("neighborhood", "Back Bay")) == [
+            "mistral",
+            "legal",
+        ]
+
+    def test_combined_query(self):
+        columns = Columns.from_restaurants(_dataset())
+        cheap = columns.price_at_most("dinner", 60)
+        nearby = columns.any_of("neighborhood", "Back Bay", "South End")
+
+        assert columns.select(cheap & nearby & columns.any_of("cuisine", "French")) == ["mistral"]
+
+    def test_terms_are_padded_to_the_widest_row(self):
+        columns = Columns.from_restaurants(_dataset())
+
+        assert columns.width("cuisine") == columns.width("features") == 2
+        assert columns.arrays["features"].tolist() == [0, 1, 1, -1, -1, -1]
+        assert columns.arrays["cuisine"].tolist() == [0, -1, 1, 2, 3, -1]
+
+    def test_more_values_than_a_byte_can_code(self):
+        restaurants = [
+            Restaurant(
+                slug=f"r{i}",
+                name=f"R{i}",
+                cuisine=[f"c{i}"],
+                neighborhood=f"n{i}",
+                pricing=Pricing(dinner=i),
+            )
+            for i in range(300)
+        ]
+        columns = Columns.from_restaurants(restaurants)
+
+        assert columns.select(columns.price_at_most("dinner", 2)) == ["r0", "r1", "r2"]
+        assert columns.select(columns.any_of("neighborhood", "n299", "n7")) == ["r7", "r299"]
+        assert columns.select(columns.any_of("cuisine", "c256")) == ["r256"]
+
+    def test_empty(self):
+        columns = Columns.from_restaurants([])
+
+        assert columns.select(columns.price_at_most("dinner", 50)) == []
+        assert columns.within(42.3, -71.1, 42.4, -71.0) == 0
+        assert columns.any_of("cuisine", "French") == 0
+
+    def test_write_and_read(self, tmp_path):
+        path = ColumnarWriter(tmp_path / "out.columns").write(_dataset())
+        columns = Columns.read(path)
+
+        assert len(columns) == 3
+        built = Columns.from_restaurants(_dataset())
+        # Compared as bytes, since missing values are NaN.
+        assert {name: a.tobytes() for name, a in columns.arrays.items()} == {
+            name: a.tobytes() for name, a in built.arrays.items()
+        }
+        assert columns.select(columns.price_at_most("brunch", 35)) == ["legal"]
+        assert columns.select(columns.any_of("cuisine", "Mediterranean")) == ["mistral"]
+        assert list(tmp_path.iterdir()) == [path]
+
+    def test_each_output_gets_its_own_export(self, tmp_path):
+        assert columnar_path(tmp_path / "restaurants.json") == tmp_path / "restaurants.json.columns"
+        assert columnar_path(tmp_path / "restaurants.ndjson") != columnar_path(
+            tmp_path / "restaurants.json"
+        )
+
+
+class TestPreviousRun:
+    def _previous_output(self, restaurant, tmp_path):
+        previous = PreviousRun(tmp_path / "out.json")
+        assert previous.reuse(restaurant) is None
+        enriched = copy.deepcopy(restaurant)
+        enriched.phone = "617-555-0100"
+        enriched.menu = Menu(menus=[])
+        JsonWriter(previous.output_path).write([enriched])
+        previous.save()
+        return enriched
+
+    def test_unchanged_listing_reuses_previous_record(self, sample_restaurant, tmp_path):
+        enriched = self._previous_output(sample_restaurant, tmp_path)
+
+        previous = PreviousRun(tmp_path / "out.json")
+        reused = previous.reuse(copy.deepcopy(sample_restaurant))
+
+        assert reused is not None
+        assert reused.to_dict() == enriched.to_dict()
+        assert previous.reused == 1
+
+    def test_changed_listing_is_fetched_again(self, sample_restaurant, tmp_path):
+        self._previous_output(sample_restaurant, tmp_path)
+        changed = copy.deepcopy(sample_restaurant)
+        changed.pricing.dinner = 55
+
+        previous = PreviousRun(tmp_path / "out.json")
+
+        assert previous.reuse(changed) is None
+        assert previous.current == {changed.slug: listing_fingerprint(changed)}
+
+    def test_output_without_fingerprints_is_ignored(self, sample_restaurant, tmp_path):
+        JsonWriter(tmp_path / "out.json").write([sample_restaurant])
+
+        assert PreviousRun(tmp_path / "out.json").reuse(sample_restaurant) is None
+
+    def test_output_rewritten_without_incremental_is_ignored(self, sample_restaurant, tmp_path):
+        self._previous_output(sample_restaurant, tmp_path)
+        # A plain run rewrites the output, here without details, and leaves
+        # the fingerprints as they were.
+        JsonWriter(tmp_path / "out.json").write([copy.deepcopy(sample_restaurant)])
+
+        previous = PreviousRun(tmp_path / "out.json")
+
+        assert previous.reuse(copy.deepcopy(sample_restaurant)) is None
+        assert previous.reused == 0
+
+    def test_forgotten_restaurant_is_fetched_again(self, sample_restaurant, tmp_path):
+        previous = PreviousRun(tmp_path / "out.json")
+        previous.reuse(sample_restaurant)
+        previous.forget(sample_restaurant)
+        JsonWriter(previous.output_path).write([sample_restaurant])
+        previous.save()
+
+        assert PreviousRun(tmp_path / "out.json").reuse(sample_restaurant) is None
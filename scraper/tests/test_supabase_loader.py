@@ -0,0 +1,176 @@
+"""Tests for scraper.loader.supabase_loader, against a local PostgREST stand-in."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from scraper.loader.batches import UpsertAborted
+from scraper.loader.supabase_loader import upsert_restaurants
+
+SERVICE_KEY = "service-role-key"
+
+
+class _PostgrestHandler(BaseHTTPRequestHandler):
+    """Accept upserts to /rest/v1/restaurants the way PostgREST does.
+
+    A request is all-or-nothing: a row without a name fails it with the
+    NOT NULL violation PostgREST reports. ``server.outages`` lists statuses
+    to answer the next requests with instead, as a proxy in front would.
+    """
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        url = urlparse(self.path)
+        with self.server.lock:
+            self.server.requests.append(
+                {
+                    "path": url.path,
+                    "query": parse_qs(url.query),
+                    "prefer": self.headers.get("Prefer"),
+                    "slugs": [row["slug"] for row in body],
+                }
+            )
+            outage = self.server.outages.pop(0) if self.server.outages else None
+        if outage is not None:
+            self._reply(outage, b"<html>upstream unavailable</html>", "text/html")
+        elif self.headers.get("apikey") != SERVICE_KEY:
+            self._error(401, "PGRST301", "JWT could not be decoded")
+        elif any(row["name"] is None for row in body):
+            self._error(400, "23502", 'null value in column "name" violates not-null constraint')
+        else:
+            with self.server.lock:
+                self.server.rows.update((row["slug"], row) for row in body)
+            self._reply(201, b"", "application/json")
+
+    def _error(self, status, code, message):
+        body = {"code": code, "message": message, "details": None, "hint": None}
+        self._reply(status, json.dumps(body).encode(), "application/json")
+
+    def _reply(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Upsert:
+    """One ``client.table(...).upsert(...)`` request, sent by ``execute``."""
+
+    def __init__(self, client, table, rows, on_conflict):
+        self.client = client
+        self.table = table
+        self.rows = rows
+        self.on_conflict = on_conflict
+
+    def execute(self):
+        response = requests.post(
+            f"{self.client.url}/rest/v1/{self.table}",
+            params={"on_conflict": self.on_conflict},
+            json=self.rows,
+            headers={
+                "apikey": self.client.key,
+                "Authorization": f"Bearer {self.client.key}",
+                "Prefer": "resolution=merge-duplicates,return=minimal",
+            },
+            timeout=5,
+        )
+        response.raise_for_status()
+        return response
+
+
+class _Table:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def upsert(self, rows, on_conflict):
+        return _Upsert(self.client, self.name, rows, on_conflict)
+
+
+class _RestClient:
+    """Just enough of the Supabase client to upsert through PostgREST's HTTP API."""
+
+    def __init__(self, url, key=SERVICE_KEY):
+        self.url = url
+        self.key = key
+
+    def table(self, name):
+        return _Table(self, name)
+
+
+@pytest.fixture
+def postgrest():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PostgrestHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.rows = {}
+    server.outages = []
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr("scraper.loader.batches.random.uniform", lambda low, high: 0)
+
+
+def _rows(count):
+    return [{"slug": f"r{i}", "name": f"R{i}", "cuisine": ["Italian"]} for i in range(count)]
+
+
+class TestUpsertRestaurants:
+    def test_rows_are_upserted_on_slug(self, postgrest):
+        report = upsert_restaurants(_RestClient(postgrest.url), _rows(20))
+
+        assert sorted(postgrest.rows) == sorted(f"r{i}" for i in range(20))
+        assert len(report.upserted) == 20 and report.failed == []
+        request = postgrest.requests[0]
+        assert request["path"] == "/rest/v1/restaurants"
+        assert request["query"] == {"on_conflict": ["slug"]}
+        assert "resolution=merge-duplicates" in request["prefer"]
+
+    def test_rejected_row_is_isolated(self, postgrest):
+        rows = _rows(8)
+        rows[3]["name"] = None
+        report = upsert_restaurants(_RestClient(postgrest.url), rows)
+
+        assert [failed.row["slug"] for failed in report.failed] == ["r3"]
+        assert report.failed[0].error.response.status_code == 400
+        assert sorted(postgrest.rows) == sorted(f"r{i}" for i in range(8) if i != 3)
+
+    def test_outage_is_retried(self, postgrest):
+        postgrest.outages = [503, 502]
+        report = upsert_restaurants(_RestClient(postgrest.url), _rows(4))
+
+        assert len(postgrest.requests) == 3
+        assert len(report.upserted) == 4
+
+    @pytest.mark.parametrize(
+        "client, outages",
+        [("wrong key", []), (SERVICE_KEY, [503] * 10)],
+        ids=["unauthorized", "outage"],
+    )
+    def test_service_errors_abort_without_bisecting(self, postgrest, client, outages):
+        postgrest.outages = outages
+
+        with pytest.raises(UpsertAborted) as aborted:
+            upsert_restaurants(_RestClient(postgrest.url, key=client), _rows(8))
+
+        assert aborted.value.report.upserted == []
+        assert postgrest.rows == {}
+        # Retried as a whole, never split into smaller batches.
+        assert [len(request["slugs"]) for request in postgrest.requests] == [8, 8, 8]
@@ -45,6 +45,14 @@ class TestCuisineTransform:
         row = transform_restaurant(_make_restaurant(cuisine=""))
         assert row["cuisine"] is None
 
+    def test_cuisine_list(self):
+        row = transform_restaurant(_make_restaurant(cuisine=["Italian", "Pizza"]))
+        assert row["cuisine"] == ["Italian", "Pizza"]
+
+    def test_empty_cuisine_list(self):
+        row = transform_restaurant(_make_restaurant(cuisine=[]))
+        assert row["cuisine"] is None
+
 
 class TestPricingTransform:
     def test_all_prices_set(self):